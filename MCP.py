@@ -8,27 +8,25 @@ import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple, Union
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-import sqlite3
 import schedule
 import time
 import threading
 from dataclasses import dataclass, field
-import requests
 from bs4 import BeautifulSoup, Tag
 from bs4.element import NavigableString
 import re
 import hashlib
-from urllib.parse import urlparse, urljoin, quote
+from urllib.parse import urlparse, urljoin
 import os
 from pathlib import Path
 import aiofiles
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, flash, Response
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, flash, Response, stream_with_context
 import plotly.graph_objs as go
 import plotly.utils
 import pandas as pd
@@ -49,6 +47,26 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from osint_ratelimit import build_engine_rate_limiters
+from osint_cache import SERPCache, SearchResultCache
+from osint_keywords import get_classifier
+from osint_sqlite import SQLiteConnectionManager
+from osint_schema import apply_migrations, upsert_result_documents
+from osint_writequeue import ResultWriteQueue
+from osint_archive import ResultArchive, load_retention_settings
+from osint_export import EXPORT_FORMATS, stream_export
+from osint_ranking import BM25Ranker, DEFAULT_FIELD_WEIGHTS
+from osint_dedup import DEFAULT_HISTORY_DAYS, MAX_DISTANCE, collapse_near_duplicates
+from osint_urls import canonicalize_url
+from osint_stats import RISK_LEVELS, SYSTEM_USER_ID, increment_stats, read_user_stats, region_buckets, search_deltas
+from osint_pagination import decode_cursor, encode_cursor, page_size
+from osint_jobs import JobQueue, JobQueueFull
+from osint_http import http_session
+from osint_dns import gethostbyname
+from osint_engines import EngineBlockedError, EngineRegistry, get_engine
+from osint_batch import BatchError, BatchLocked, BatchRun, BatchStore, dedupe_targets, load_batch_settings, parse_targets
 
 # Importar el nuevo módulo de IA
 try:
@@ -134,6 +152,67 @@ class OSINTConfig:
     max_concurrent_requests: int = 10
     rate_limit_delay: float = 2.0
     
+    # Trabajos en segundo plano (búsquedas, campañas, IA): trabajos simultáneos (None =
+    # max_concurrent_searches de config/osint_platform.conf), pendientes admitidos y segundos
+    # que una petición síncrona espera el resultado antes de responder 202 con el id del trabajo.
+    # La interfaz web siempre pide respuesta asíncrona; la espera solo aplica a clientes de API
+    # antiguos que no envían async=1 ni Prefer: respond-async
+    job_max_workers: Optional[int] = None
+    job_max_pending: int = 100
+    job_sync_wait: float = 20.0
+    job_retention_hours: int = 24
+    
+    # Ritmo por motor (peticiones por segundo) y ráfaga máxima de los token buckets.
+    # Sobrescriben lo que declara cada plugin de osint_engines; el resto usa 1 / rate_limit_delay.
+    engine_rate_limits: Dict[str, float] = field(default_factory=dict)
+    engine_burst: float = 3.0
+    engine_bursts: Dict[str, float] = field(default_factory=dict)
+    # Selección adaptativa de motores: cuántos consultar por búsqueda (0 = todos los sanos),
+    # tamaño de la ventana de estadísticas, pausa inicial tras un bloqueo (se duplica si se repite),
+    # cada cuánto se prueba un motor degradado y antigüedad máxima de sus muestras
+    engine_fanout: int = 0
+    engine_stats_window: int = 50
+    engine_block_cooldown: float = 300.0
+    engine_probe_interval: float = 60.0
+    engine_stats_max_age: float = 1800.0
+    
+    # Campañas de dorking
+    dork_engines: List[str] = field(default_factory=lambda: ["google"])
+    max_dorks_per_category: int = 0  # 0 = ejecutar todos los dorks generados
+    
+    # Caché persistente de resultados de motores (SERP), compartida entre usuarios
+    serp_cache_enabled: bool = True
+    serp_cache_path: str = "serp_cache.db"
+    serp_cache_ttl: int = 6 * 3600
+    serp_cache_stale_ttl: int = 3 * 24 * 3600
+    serp_cache_negative_ttl: int = 600
+    serp_cache_max_entries: int = 50000
+    # Caché de búsquedas completas ya procesadas (misma base que la caché SERP, otra tabla).
+    # TTL en segundos por search_type; los tipos sin entrada usan search_cache_ttl
+    search_cache_enabled: bool = True
+    search_cache_ttl: int = 15 * 60
+    search_cache_ttls: Dict[str, int] = field(default_factory=lambda: {"news": 5 * 60, "domain": 6 * 3600, "ip": 6 * 3600})
+    search_cache_stale_ttl: int = 24 * 3600
+    search_cache_max_entries: int = 10000
+    # Peso de cada campo en el ranking BM25 de resultados
+    ranking_field_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_FIELD_WEIGHTS))
+    # Casi duplicados (SimHash): distancia máxima en bits y días de historial contra los que se
+    # comparan los documentos nuevos al guardarlos para anotar near_duplicate_of (0 = no se comparan)
+    dedup_enabled: bool = True
+    dedup_max_distance: int = MAX_DISTANCE
+    dedup_history_days: int = DEFAULT_HISTORY_DAYS
+    # Escritura diferida de resultados (lotes por tamaño o por intervalo en segundos)
+    result_write_behind: bool = True
+    result_write_batch_rows: int = 500
+    result_write_flush_interval: float = 0.5
+    
+    # Retención: resultados y reportes antiguos (None = valores de config/osint_platform.conf)
+    retention_enabled: bool = True
+    results_retention_days: Optional[int] = None
+    reports_retention_days: Optional[int] = None
+    retention_time: str = "03:30"
+    archive_dir: str = ""  # vacío = directorio archive/ junto a la base de datos
+    
     def __post_init__(self):
         # Generar hash de contraseña si no existe
         if not self.web_password_hash:
@@ -145,12 +224,18 @@ class OSINTConfig:
 class GoogleDorkingEngine:
     """Motor de Google Dorking avanzado con automatizaciones y patterns especializados"""
     
-    def __init__(self, config: OSINTConfig):
+    def __init__(self, config: OSINTConfig, rate_limiters=None, serp_cache: Optional[SERPCache] = None,
+                 engines: Optional[EngineRegistry] = None):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.rate_limiters = rate_limiters or build_engine_rate_limiters(config)
+        self.serp_cache = serp_cache
+        self.engines = engines or EngineRegistry(window=config.engine_stats_window,
+                                                 cooldown=config.engine_block_cooldown,
+                                                 probe_interval=config.engine_probe_interval,
+                                                 max_age=config.engine_stats_max_age)
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        }, namespace='search_engines')
         
         # Patrones de dorking categorizados en español
         self.dork_patterns = {
@@ -236,100 +321,187 @@ class GoogleDorkingEngine:
         
         return dorks
 
-    def execute_dork_campaign(self, target: str, categories: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Ejecuta una campaña completa de dorking automatizada"""
+    def execute_dork_campaign(self, target: str, categories: Optional[List[str]] = None,
+                              progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """Ejecuta una campaña completa de dorking automatizada (progress recibe cada dork terminado)"""
         if categories is None:
             categories = ['general', 'archivos_confidenciales']
         
+        candidates = [engine for engine in self.config.dork_engines if self._supports_dorks(engine)] or ['google']
+        # Los motores en pausa tras un bloqueo no reciben dorks hasta recuperarse
+        engines = self.engines.select(candidates)
+        if not engines:
+            logger.warning(f"Todos los motores de dorking están en pausa: {', '.join(candidates)}")
+        start = time.monotonic()
+        
         campaign_results = {
             'target': target,
             'start_time': datetime.now().isoformat(),
             'categories': categories,
+            'engines': engines,
             'total_dorks': 0,
+            'total_queries': 0,
             'total_results': 0,
             'results_by_category': {},
+            'dork_stats': [],
             'high_risk_findings': [],
             'recommendations': []
         }
         
+        # Cada dork se reparte por turnos a un motor; el resto queda de respaldo por si lo bloquea
+        tasks = []
         for category in categories:
-            logger.info(f"Ejecutando dorks para categoría: {category}")
-            
             dorks = self.generate_dorks_for_target(target, category)
+            if self.config.max_dorks_per_category > 0:
+                dorks = dorks[:self.config.max_dorks_per_category]
             campaign_results['total_dorks'] += len(dorks)
             
-            category_results = []
-            for dork in dorks[:5]:  # Limitar para evitar rate limiting
-                try:
-                    time.sleep(self.config.rate_limit_delay)
-                    results = self._execute_single_dork(dork)
-                    category_results.extend(results)
-                except Exception as e:
-                    logger.error(f"Error ejecutando dork '{dork}': {str(e)}")
-                    continue
+            for dork in dorks:
+                if engines:
+                    turn = len(tasks) % len(engines)
+                    tasks.append((category, dork, engines[turn:] + engines[:turn]))
+        
+        campaign_results['total_queries'] = len(tasks)
+        logger.info(f"Ejecutando {len(tasks)} dorks para {target} en {', '.join(engines)}")
+        
+        # Ejecutar concurrentemente; el ritmo lo marca el token bucket de cada motor
+        outcomes: List[Optional[tuple]] = [None] * len(tasks)
+        if tasks:
+            max_workers = max(1, min(self.config.max_concurrent_requests, len(tasks)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._run_campaign_dork, dork, order): index
+                    for index, (category, dork, order) in enumerate(tasks)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    index = futures[future]
+                    outcomes[index] = future.result()
+                    if progress:
+                        category, dork, _ = tasks[index]
+                        engine = outcomes[index][1]['engine']
+                        progress(f'{category}/{engine}: {dork}', outcomes[index][0], done, len(tasks))
+        
+        # Consolidar en el orden planificado para que el resultado sea estable
+        for category in categories:
+            campaign_results['results_by_category'].setdefault(category, {'total_results': 0, 'results': []})
+        
+        for (category, dork, _), outcome in zip(tasks, outcomes):
+            if outcome is None:
+                continue
+            results, stats = outcome
+            stats['category'] = category
+            campaign_results['dork_stats'].append(stats)
             
-            campaign_results['results_by_category'][category] = {
-                'total_results': len(category_results),
-                'results': category_results
-            }
-            campaign_results['total_results'] += len(category_results)
+            category_data = campaign_results['results_by_category'][category]
+            category_data['results'].extend(results)
+            category_data['total_results'] += len(results)
+            campaign_results['total_results'] += len(results)
+            campaign_results['high_risk_findings'].extend(
+                result for result in results if result.get('risk_level') == 'high'
+            )
         
+        latencies = sorted(stats['latency_ms'] for stats in campaign_results['dork_stats'])
+        campaign_results['elapsed_seconds'] = round(time.monotonic() - start, 3)
+        campaign_results['latency_summary'] = {
+            'count': len(latencies),
+            'p50_ms': latencies[len(latencies) // 2] if latencies else 0.0,
+            'max_ms': latencies[-1] if latencies else 0.0
+        }
         campaign_results['recommendations'] = self._generate_recommendations(campaign_results)
         return campaign_results
 
-    def _execute_single_dork(self, dork: str) -> List[Dict[str, Any]]:
-        """Ejecuta un dork individual y parsea los resultados"""
+    def _run_campaign_dork(self, dork: str, engines: List[str]) -> tuple:
+        """Ejecuta un dork de la campaña en el primer motor de `engines` y, si lo bloquea o está
+        en pausa, en los siguientes; mide la latencia total (incluida la espera del token bucket)"""
+        stats = {'dork': dork, 'engine': engines[0], 'cache': 'miss', 'latency_ms': 0.0, 'results': 0,
+                 'error': None, 'fallbacks': 0}
+        
+        start = time.monotonic()
+        results = []
+        for attempt, engine in enumerate(engines):
+            if attempt and self.engines.status(engine) == 'cooling_down':
+                continue
+            stats['engine'] = engine
+            stats['fallbacks'] = attempt
+            try:
+                results, stats['cache'] = self._fetch_dork_cached(dork, engine)
+                stats['error'] = None
+                break
+            except EngineBlockedError as e:
+                logger.warning(f"Dork '{dork}' bloqueado en {engine}, se prueba el siguiente motor")
+                stats['error'] = str(e)
+            except Exception as e:
+                logger.error(f"Error ejecutando dork '{dork}' en {engine}: {str(e)}")
+                stats['error'] = str(e)
+                break
+        stats['latency_ms'] = round((time.monotonic() - start) * 1000, 1)
+        stats['results'] = len(results)
+        
+        return results, stats
+
+    def _fetch_dork_cached(self, dork: str, engine: str) -> tuple:
+        """Ejecuta un dork leyendo a través de la caché SERP; retorna (resultados, estado_caché)"""
+        fetcher = lambda: self._fetch_single_dork(dork, engine)
+        if self.serp_cache is None:
+            return fetcher(), 'miss'
+        language = 'es' if engine == 'google' else ''
+        return self.serp_cache.fetch_serp(f'{engine}_dork', dork, fetcher, language=language)
+
+    def _execute_single_dork(self, dork: str, engine: str = 'google') -> List[Dict[str, Any]]:
+        """Ejecuta un dork individual (usando la caché SERP si está disponible)"""
+        try:
+            return self._fetch_dork_cached(dork, engine)[0]
+        except Exception as e:
+            logger.error(f"Error ejecutando dork '{dork}' en {engine}: {str(e)}")
+            return []
+
+    @staticmethod
+    def _supports_dorks(engine: str) -> bool:
         try:
-            search_url = "https://www.google.com/search"
-            params = {
-                'q': dork,
-                'num': min(10, self.config.max_results_per_source),
-                'hl': 'es'
-            }
+            return get_engine(engine).supports_dorks
+        except KeyError:
+            return False
+
+    def _fetch_single_dork(self, dork: str, engine: str = 'google') -> List[Dict[str, Any]]:
+        """Consulta el motor para un dork y parsea los resultados (EngineBlockedError si lo bloquea)"""
+        plugin = get_engine(engine)
+        start = None
+        try:
+            # Solo las peticiones reales consumen turno del token bucket
+            self.rate_limiters.acquire(engine)
             
-            response = self.session.get(search_url, params=params, timeout=self.config.request_timeout)
+            start = time.monotonic()
+            params = plugin.build_params(dork, min(10, self.config.max_results_per_source))
+            response = self.session.get(plugin.search_url, params=params, timeout=self.config.request_timeout)
+            if plugin.is_blocked(response):
+                self.engines.record(engine, (time.monotonic() - start) * 1000, 0, blocked=True)
+                # Un bloqueo no se guarda en la caché SERP como respuesta vacía
+                raise EngineBlockedError(f"{engine} bloqueó el dork (HTTP {response.status_code})")
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
             results = []
+            for item in plugin.extract(response.text):
+                results.append({
+                    'title': item['title'],
+                    'url': item['url'],
+                    'description': item['description'],
+                    'source': 'google_dork' if engine == 'google' else f'{engine}_dork',
+                    'dork_used': dork,
+                    'timestamp': datetime.now().isoformat(),
+                    'risk_level': self._assess_risk_level(' '.join((item['title'], item['url'], item['description'])))
+                })
             
-            # Buscar divs de resultados con diferentes clases
-            result_divs = soup.find_all('div', class_='g') or soup.find_all('div', class_='tF2Cxc')
-            
-            for result_div in result_divs:
-                try:
-                    # Buscar título y enlace con manejo robusto de tipos
-                    title_elem = None
-                    link_elem = None
-                    
-                    # Verificar si result_div es un Tag válido de BeautifulSoup
-                    if isinstance(result_div, Tag):
-                        title_elem = result_div.find('h3') or result_div.find('a')
-                        link_elem = result_div.find('a')
-                    
-                    if title_elem and link_elem:
-                        title = self._safe_get_text(title_elem)
-                        url = self._safe_get_attr(link_elem, 'href')
-                        
-                        if url and isinstance(url, str) and url.startswith('http'):
-                            results.append({
-                                'title': title,
-                                'url': url,
-                                'description': '',
-                                'source': 'google_dork',
-                                'dork_used': dork,
-                                'timestamp': datetime.now().isoformat(),
-                                'risk_level': self._assess_risk_level(title + ' ' + url)
-                            })
-                            
-                except Exception:
-                    continue
-            
+            self.engines.record(engine, (time.monotonic() - start) * 1000, len(results))
             return results
             
+        except EngineBlockedError:
+            raise
         except Exception as e:
+            if start is not None:
+                self.engines.record(engine, (time.monotonic() - start) * 1000, 0, error=True)
+            # Se propaga: un timeout no es una página vacía y no debe quedar en la caché SERP
             logger.error(f"Error ejecutando dork '{dork}': {str(e)}")
-            return []
+            raise
 
     def _safe_get_text(self, element) -> str:
         """Extrae texto de forma segura de un elemento"""
@@ -354,15 +526,7 @@ class GoogleDorkingEngine:
 
     def _assess_risk_level(self, content: str) -> str:
         """Evalúa el nivel de riesgo de un resultado"""
-        high_risk_keywords = [
-            'password', 'contraseña', 'login', 'admin', 'database',
-            'confidencial', 'private', 'internal', 'backup',
-            'error', 'warning', 'sql', 'dump'
-        ]
-        
-        content_lower = content.lower()
-        
-        if any(keyword in content_lower for keyword in high_risk_keywords):
+        if get_classifier('dork_risk').has_match(content, 'high'):
             return 'high'
         
         return 'low'
@@ -384,266 +548,361 @@ class GoogleDorkingEngine:
 class OSINTDatabase:
     """Base de datos mejorada para almacenar resultados de búsquedas OSINT"""
     
-    def __init__(self, db_path: str = "osint_data.db"):
+    def __init__(self, db_path: str = "osint_data.db", archive_dir: Optional[str] = None,
+                 near_duplicate_days: Optional[int] = DEFAULT_HISTORY_DAYS):
         self.db_path = db_path
+        self.near_duplicate_days = near_duplicate_days
+        self.pool = SQLiteConnectionManager(db_path)
+        # Resultados antiguos movidos por la retención (por defecto junto a la base)
+        self.archive = ResultArchive(
+            archive_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), 'archive')
+        )
         self.init_database()
     
     def init_database(self):
-        """Inicializa la base de datos con tablas mejoradas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabla de búsquedas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS searches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query TEXT NOT NULL,
-                search_type TEXT DEFAULT 'general',
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                results_count INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'pending',
-                user_id TEXT DEFAULT 'anonymous'
-            )
-        ''')
-        
-        # Tabla de resultados
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS search_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                search_id INTEGER,
-                source TEXT,
-                result_type TEXT DEFAULT 'web',
-                title TEXT,
-                url TEXT,
-                description TEXT,
-                content TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                relevance_score REAL DEFAULT 0.0,
-                risk_level TEXT DEFAULT 'low',
-                FOREIGN KEY (search_id) REFERENCES searches (id)
-            )
-        ''')
-        
-        # Tabla de reportes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                report_type TEXT DEFAULT 'daily',
-                date DATE,
-                title TEXT,
-                content TEXT,
-                format TEXT DEFAULT 'html',
-                file_path TEXT,
-                sent_at DATETIME,
-                status TEXT DEFAULT 'pending'
-            )
-        ''')
-        
-        # Tabla de usuarios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                full_name TEXT,
-                role TEXT DEFAULT 'user',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_login DATETIME,
-                is_active BOOLEAN DEFAULT 1,
-                email_verified BOOLEAN DEFAULT 0
-            )
-        ''')
-        
-        # Tabla de configuraciones de usuario
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                setting_name TEXT NOT NULL,
-                setting_value TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                UNIQUE(user_id, setting_name)
-            )
-        ''')
-        
-        # Tabla de configuraciones de reportes por usuario
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_report_configs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                report_name TEXT NOT NULL,
-                report_type TEXT DEFAULT 'daily',
-                frequency TEXT DEFAULT 'daily',
-                email_delivery BOOLEAN DEFAULT 1,
-                format TEXT DEFAULT 'html',
-                search_queries TEXT,
-                search_types TEXT,
-                enable_dorking BOOLEAN DEFAULT 0,
-                is_active BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Tabla de reportes generados por usuario
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                config_id INTEGER NOT NULL,
-                report_title TEXT,
-                report_content TEXT,
-                report_format TEXT,
-                file_path TEXT,
-                generated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                sent_at DATETIME,
-                status TEXT DEFAULT 'pending',
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (config_id) REFERENCES user_report_configs (id)
-            )
-        ''')
-        
-        # Modificar tabla de búsquedas para incluir user_id
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS searches_backup AS SELECT * FROM searches;
-        ''')
-        
-        cursor.execute('''
-            DROP TABLE IF EXISTS searches;
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS searches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER DEFAULT 1,
-                query TEXT NOT NULL,
-                search_type TEXT DEFAULT 'general',
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                results_count INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'pending',
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Restaurar datos de búsquedas con user_id por defecto
-        cursor.execute('''
-            INSERT INTO searches (query, search_type, timestamp, results_count, status)
-            SELECT query, search_type, timestamp, results_count, status 
-            FROM searches_backup;
-        ''')
-        
-        cursor.execute('''
-            DROP TABLE IF EXISTS searches_backup;
-        ''')
-        
-        # Crear usuario administrador por defecto si no existe
-        cursor.execute('SELECT COUNT(*) FROM users WHERE username = ?', ('admin',))
-        if cursor.fetchone()[0] == 0:
-            admin_password_hash = generate_password_hash('admin123')
-            cursor.execute('''
-                INSERT INTO users (username, email, password_hash, full_name, role, is_active, email_verified)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', ('admin', 'admin@osint.local', admin_password_hash, 'Administrador', 'admin', 1, 1))
-        
-        conn.commit()
-        conn.close()
+        """Inicializa la base de datos aplicando las migraciones pendientes"""
+        applied = apply_migrations(self.pool)
+        if applied:
+            logger.info(f"Esquema de {self.db_path} actualizado ({applied} migraciones)")
+        self.fts_enabled = bool(self.pool.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'result_documents_fts'"
+        ))
     
     def save_search(self, query: str, search_type: str = 'general', user_id: int = 1) -> int:
         """Guarda una nueva búsqueda y retorna el ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT INTO searches (query, search_type, user_id) VALUES (?, ?, ?)",
-            (query, search_type, user_id)
-        )
-        
-        search_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO searches (query, search_type, user_id) VALUES (?, ?, ?)",
+                (query, search_type, user_id)
+            )
+            search_id = cursor.lastrowid
+            increment_stats(cursor, search_deltas(user_id, query, search_type))
         
         return search_id if search_id is not None else 0
 
     def save_results(self, search_id: int, results: List[Dict[str, Any]]):
         """Guarda los resultados de una búsqueda"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for result in results:
-            cursor.execute('''
-                INSERT INTO search_results 
-                (search_id, source, title, url, description, content, relevance_score, risk_level)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                search_id,
-                result.get('source', ''),
-                result.get('title', ''),
-                result.get('url', ''),
-                result.get('description', ''),
-                result.get('content', ''),
-                result.get('relevance_score', 0.0),
-                result.get('risk_level', 'low')
-            ))
-        
-        # Actualizar contador de resultados
-        cursor.execute(
-            "UPDATE searches SET results_count = ?, status = 'completed' WHERE id = ?",
-            (len(results), search_id)
-        )
-        
-        conn.commit()
-        conn.close()
+        self.save_results_bulk([(search_id, results)])
+
+    def save_results_bulk(self, batch: List[Tuple[int, List[Dict[str, Any]]]]):
+        """Guarda los resultados de varias búsquedas en una sola transacción"""
+        flat = [(search_id, result) for search_id, results in batch for result in results]
+        
+        with self.pool.transaction() as cursor:
+            # Cada URL canónica (o casi duplicado reciente) se guarda una sola vez; la búsqueda solo añade un enlace
+            document_ids = upsert_result_documents(cursor, [result for _, result in flat], self.near_duplicate_days)
+            cursor.executemany('''
+                INSERT OR IGNORE INTO search_result_links
+                (search_id, document_id, source, relevance_score, risk_level)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (
+                    search_id,
+                    document_id,
+                    result.get('source', ''),
+                    result.get('relevance_score', 0.0),
+                    result.get('risk_level', 'low')
+                )
+                for (search_id, result), document_id in zip(flat, document_ids)
+            ])
+            
+            # El contador es el de enlaces distintos realmente guardados: los duplicados dentro
+            # de una búsqueda colapsan en un único enlace
+            counts = {search_id: 0 for search_id, _ in batch}
+            search_ids = list(counts)
+            for start in range(0, len(search_ids), 500):
+                chunk = search_ids[start:start + 500]
+                cursor.execute(
+                    f"SELECT search_id, COUNT(*) FROM search_result_links "
+                    f"WHERE search_id IN ({','.join('?' * len(chunk))}) GROUP BY search_id",
+                    chunk
+                )
+                counts.update(cursor.fetchall())
+
+            # Totales por usuario: se suma la diferencia con el contador anterior de cada búsqueda
+            deltas = []
+            for start in range(0, len(search_ids), 500):
+                chunk = search_ids[start:start + 500]
+                cursor.execute(
+                    f"SELECT id, user_id, results_count FROM searches WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                deltas.extend((user_id, 'results', 'total', counts[search_id] - (previous or 0))
+                              for search_id, user_id, previous in cursor.fetchall())
+            increment_stats(cursor, deltas)
+
+            # Actualizar contador de resultados
+            cursor.executemany(
+                "UPDATE searches SET results_count = ?, status = 'completed' WHERE id = ?",
+                [(count, search_id) for search_id, count in counts.items()]
+            )
 
-    def get_recent_results(self, days: int = 1) -> List[Dict[str, Any]]:
-        """Obtiene resultados recientes para el reporte"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def mark_searches_failed(self, search_ids: List[int]):
+        """Marca como fallidas las búsquedas cuyos resultados no se pudieron guardar"""
+        with self.pool.transaction() as cursor:
+            cursor.executemany("UPDATE searches SET status = 'failed' WHERE id = ?",
+                               [(search_id,) for search_id in search_ids])
+
+    def iter_recent_results(self, days: int = 1, include_archived: bool = False,
+                            user_id: Optional[int] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Recorre los resultados recientes por lotes, sin cargarlos todos en memoria"""
         date_threshold = datetime.now() - timedelta(days=days)
+        user_filter = 'AND s.user_id = ?' if user_id is not None else ''
+        params = (date_threshold,) + ((user_id,) if user_id is not None else ())
+        
+        with self.pool.read() as cursor:
+            cursor.execute(f'''
+                SELECT s.query, s.search_type, s.timestamp, sr.source,
+                       sr.title, sr.url, sr.description, sr.relevance_score, sr.risk_level
+                FROM searches s
+                JOIN search_results sr ON s.id = sr.search_id
+                WHERE s.timestamp >= ? {user_filter}
+                ORDER BY s.timestamp DESC, sr.relevance_score DESC
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'query': row[0],
+                        'search_type': row[1],
+                        'timestamp': row[2],
+                        'source': row[3],
+                        'title': row[4],
+                        'url': row[5],
+                        'description': row[6],
+                        'relevance_score': row[7],
+                        'risk_level': row[8]
+                    }
+        
+        if include_archived:
+            for row in self.iter_archived_results(date_threshold):
+                if user_id is None or row.get('user_id') == user_id:
+                    yield row
+
+    def get_recent_results(self, days: int = 1, include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Obtiene resultados recientes para el reporte (opcionalmente también los archivados)"""
+        return list(self.iter_recent_results(days, include_archived))
+
+    def iter_archived_results(self, since: datetime, until: Optional[datetime] = None):
+        """Recorre los resultados archivados de búsquedas realizadas en el rango"""
+        since_text = since.strftime('%Y-%m-%d %H:%M:%S')
+        until_text = until.strftime('%Y-%m-%d %H:%M:%S') if until else None
+        for row in self.archive.iter_rows(since.date(), until.date() if until else None):
+            timestamp = str(row.get('search_timestamp') or '')
+            if timestamp < since_text or (until_text and timestamp > until_text):
+                continue
+            yield {
+                'query': row.get('query'),
+                'search_type': row.get('search_type'),
+                'timestamp': timestamp,
+                'source': row.get('source'),
+                'title': row.get('title'),
+                'url': row.get('url'),
+                'description': row.get('description'),
+                'relevance_score': row.get('relevance_score'),
+                'risk_level': row.get('risk_level'),
+                'user_id': row.get('user_id'),
+                'archived': True
+            }
+
+    def archive_old_results(self, days: int, batch_size: int = 500, vacuum: bool = True) -> Dict[str, Any]:
+        """Mueve al archivo comprimido los resultados de búsquedas con más de `days` días"""
+        threshold = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        stats = {'searches': 0, 'results': 0, 'documents_deleted': 0, 'partitions': set()}
+        
+        while True:
+            search_ids = [row[0] for row in self.pool.execute(
+                "SELECT id FROM searches WHERE timestamp < ? AND status != 'archived' ORDER BY id LIMIT ?",
+                (threshold, batch_size)
+            )]
+            if not search_ids:
+                break
+            placeholders = ','.join('?' * len(search_ids))
+            
+            with self.pool.read() as cursor:
+                cursor.execute(f'''
+                    SELECT l.id, l.search_id, s.user_id, s.query, s.search_type, s.timestamp,
+                           l.document_id, l.source, d.result_type, d.title, d.url, d.canonical_url,
+                           d.description, d.content, l.timestamp, l.relevance_score, l.risk_level
+                    FROM search_result_links l
+                    JOIN searches s ON s.id = l.search_id
+                    JOIN result_documents d ON d.id = l.document_id
+                    WHERE l.search_id IN ({placeholders})
+                ''', search_ids)
+                columns = ['id', 'search_id', 'user_id', 'query', 'search_type', 'search_timestamp',
+                           'document_id', 'source', 'result_type', 'title', 'url', 'canonical_url',
+                           'description', 'content', 'timestamp', 'relevance_score', 'risk_level']
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            
+            # Primero se escribe (y sincroniza) el archivo; después se borra de la base
+            written = self.archive.append(rows) if rows else {}
+            
+            with self.pool.transaction() as cursor:
+                cursor.execute(f'DELETE FROM search_result_links WHERE search_id IN ({placeholders})', search_ids)
+                document_ids = list({row['document_id'] for row in rows})
+                for start in range(0, len(document_ids), 500):
+                    chunk = document_ids[start:start + 500]
+                    cursor.execute(f'''
+                        DELETE FROM result_documents
+                        WHERE id IN ({','.join('?' * len(chunk))})
+                          AND NOT EXISTS (SELECT 1 FROM search_result_links l WHERE l.document_id = result_documents.id)
+                    ''', chunk)
+                    stats['documents_deleted'] += cursor.rowcount
+                cursor.execute(f"UPDATE searches SET status = 'archived' WHERE id IN ({placeholders})", search_ids)
+            
+            stats['searches'] += len(search_ids)
+            stats['results'] += len(rows)
+            stats['partitions'].update(written)
+        
+        stats['partitions'] = sorted(stats['partitions'])
+        if vacuum and stats['searches']:
+            self.vacuum()
+        return stats
+
+    def cleanup_old_reports(self, days: int) -> int:
+        """Elimina los reportes generados con más de `days` días"""
+        threshold = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.pool.transaction() as cursor:
+            cursor.execute('DELETE FROM user_reports WHERE generated_at < ?', (threshold,))
+            return cursor.rowcount
+
+    def vacuum(self):
+        """Compacta la base y trunca el WAL tras borrar datos"""
+        conn = self.pool.connection()
+        if self.fts_enabled:
+            conn.execute("INSERT INTO result_documents_fts (result_documents_fts) VALUES ('optimize')")
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Convierte texto libre en una consulta FTS5 segura (términos entre comillas, AND implícito)"""
+        terms = []
+        for token in text.split():
+            prefix = token.endswith('*')
+            token = token.rstrip('*').replace('"', '')
+            if token:
+                terms.append(f'"{token}"*' if prefix else f'"{token}"')
+        return ' '.join(terms)
+
+    def search_results_fulltext(self, text: str, user_id: Optional[int] = None,
+                                limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Busca en los resultados almacenados por título, descripción, contenido o URL"""
+        fts_query = self._fts_query(text)
+        if not fts_query:
+            return {'results': [], 'total': 0, 'limit': limit, 'offset': offset}
+        
+        user_filter = 'AND s.user_id = ?' if user_id is not None else ''
+        user_params = (user_id,) if user_id is not None else ()
+        
+        if not self.fts_enabled:
+            return self._search_results_like(text, user_filter, user_params, limit, offset)
+        
+        # Un resultado por documento, asociado a la búsqueda más reciente (visible) que lo encontró
+        visible_links = f'''
+            FROM search_result_links l
+            JOIN searches s ON s.id = l.search_id
+            WHERE l.document_id = result_documents_fts.rowid {user_filter}
+        '''
         
-        cursor.execute('''
-            SELECT s.query, s.search_type, s.timestamp, sr.source,
-                   sr.title, sr.url, sr.description, sr.relevance_score, sr.risk_level
-            FROM searches s
-            JOIN search_results sr ON s.id = sr.search_id
-            WHERE s.timestamp >= ?
-            ORDER BY s.timestamp DESC, sr.relevance_score DESC
-        ''', (date_threshold,))
+        with self.pool.read() as cursor:
+            cursor.execute(f'''
+                SELECT COUNT(*)
+                FROM result_documents_fts
+                WHERE result_documents_fts MATCH ? AND EXISTS (SELECT 1 {visible_links})
+            ''', (fts_query,) + user_params)
+            total = cursor.fetchone()[0]
+            
+            # bm25 con mayor peso para el título y la URL
+            cursor.execute(f'''
+                SELECT (SELECT l.id {visible_links} ORDER BY l.search_id DESC LIMIT 1),
+                       (SELECT COUNT(*) {visible_links}),
+                       snippet(result_documents_fts, -1, '**', '**', '…', 16),
+                       bm25(result_documents_fts, 5.0, 1.0, 1.0, 3.0) AS rank
+                FROM result_documents_fts
+                WHERE result_documents_fts MATCH ? AND EXISTS (SELECT 1 {visible_links})
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            ''', user_params * 2 + (fts_query,) + user_params + (limit, offset))
+            hits = cursor.fetchall()
+            
+            links = {}
+            if hits:
+                cursor.execute(f'''
+                    SELECT l.id, l.search_id, s.query, s.timestamp, l.source, d.title, d.url,
+                           l.relevance_score, l.risk_level
+                    FROM search_result_links l
+                    JOIN searches s ON s.id = l.search_id
+                    JOIN result_documents d ON d.id = l.document_id
+                    WHERE l.id IN ({','.join('?' * len(hits))})
+                ''', [hit[0] for hit in hits])
+                links = {row[0]: row for row in cursor.fetchall()}
         
         results = []
-        for row in cursor.fetchall():
+        for link_id, seen_in, snippet, rank in hits:
+            row = links[link_id]
             results.append({
-                'query': row[0],
-                'search_type': row[1],
-                'timestamp': row[2],
-                'source': row[3],
-                'title': row[4],
-                'url': row[5],
-                'description': row[6],
+                'id': row[0],
+                'search_id': row[1],
+                'query': row[2],
+                'timestamp': row[3],
+                'source': row[4],
+                'title': row[5],
+                'url': row[6],
+                'snippet': snippet,
                 'relevance_score': row[7],
-                'risk_level': row[8]
+                'risk_level': row[8],
+                'rank': rank,
+                'seen_in_searches': seen_in
             })
         
-        conn.close()
-        return results
+        return {'results': results, 'total': total, 'limit': limit, 'offset': offset}
+
+    def _search_results_like(self, text: str, user_filter: str, user_params: tuple,
+                             limit: int, offset: int) -> Dict[str, Any]:
+        """Alternativa sin FTS5: coincidencia LIKE sobre título, descripción y URL"""
+        # % y _ del texto del usuario son literales, no comodines
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        pattern = f"%{escaped}%"
+        where = f'''
+            FROM search_results sr
+            JOIN searches s ON s.id = sr.search_id
+            WHERE (sr.title LIKE ? ESCAPE '\\' OR sr.description LIKE ? ESCAPE '\\'
+                   OR sr.url LIKE ? ESCAPE '\\') {user_filter}
+        '''
+        params = (pattern, pattern, pattern) + user_params
+        
+        with self.pool.read() as cursor:
+            cursor.execute(f'SELECT COUNT(*) {where}', params)
+            total = cursor.fetchone()[0]
+            cursor.execute(f'''
+                SELECT sr.id, sr.search_id, s.query, s.timestamp, sr.source, sr.title, sr.url,
+                       sr.description, sr.relevance_score, sr.risk_level
+                {where}
+                ORDER BY sr.relevance_score DESC
+                LIMIT ? OFFSET ?
+            ''', params + (limit, offset))
+            rows = cursor.fetchall()
+        
+        results = [{
+            'id': row[0], 'search_id': row[1], 'query': row[2], 'timestamp': row[3],
+            'source': row[4], 'title': row[5], 'url': row[6], 'snippet': row[7],
+            'relevance_score': row[8], 'risk_level': row[9], 'rank': None, 'seen_in_searches': 1
+        } for row in rows]
+        
+        return {'results': results, 'total': total, 'limit': limit, 'offset': offset}
 
     def get_user_by_credentials(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Autentica un usuario y retorna sus datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, username, email, password_hash, full_name, role, is_active
-            FROM users 
-            WHERE username = ? AND is_active = 1
-        ''', (username,))
-        
-        user_data = cursor.fetchone()
-        conn.close()
+        with self.pool.read() as cursor:
+            cursor.execute('''
+                SELECT id, username, email, password_hash, full_name, role, is_active
+                FROM users 
+                WHERE username = ? AND is_active = 1
+            ''', (username,))
+            user_data = cursor.fetchone()
         
         if user_data and check_password_hash(user_data[3], password):
             return {
@@ -656,148 +915,356 @@ class OSINTDatabase:
             }
         return None
 
+    def update_last_login(self, user_id: int):
+        """Registra la fecha del último inicio de sesión"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user_id,))
+
     def register_user(self, username: str, email: str, password: str, full_name: str = '') -> bool:
         """Registra un nuevo usuario"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Verificar si el usuario ya existe
-            cursor.execute('SELECT id FROM users WHERE username = ? OR email = ?', (username, email))
-            if cursor.fetchone():
-                conn.close()
-                return False
-            
-            password_hash = generate_password_hash(password)
-            cursor.execute('''
-                INSERT INTO users (username, email, password_hash, full_name, role, is_active)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (username, email, password_hash, full_name or username, 'user', 1))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as cursor:
+                # Verificar si el usuario ya existe
+                cursor.execute('SELECT id FROM users WHERE username = ? OR email = ?', (username, email))
+                if cursor.fetchone():
+                    return False
+                
+                password_hash = generate_password_hash(password)
+                cursor.execute('''
+                    INSERT INTO users (username, email, password_hash, full_name, role, is_active)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (username, email, password_hash, full_name or username, 'user', 1))
+                increment_stats(cursor, [(SYSTEM_USER_ID, 'system', 'users', 1)])
+
             return True
         except Exception as e:
             logger.error(f"Error registrando usuario: {str(e)}")
             return False
 
+    def iter_user_searches(self, user_id: int, limit: Optional[int] = None,
+                           batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Recorre las búsquedas de un usuario por lotes, de la más reciente a la más antigua"""
+        with self.pool.read() as cursor:
+            cursor.execute('''
+                SELECT s.id, s.query, s.search_type, s.timestamp, s.results_count, s.status
+                FROM searches s
+                WHERE s.user_id = ?
+                ORDER BY s.timestamp DESC, s.id DESC
+                LIMIT ?
+            ''', (user_id, limit if limit is not None else -1))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'id': row[0],
+                        'query': row[1],
+                        'search_type': row[2],
+                        'timestamp': row[3],
+                        'results_count': row[4],
+                        'status': row[5]
+                    }
+
     def get_user_searches(self, user_id: int, limit: int = 50) -> List[Dict[str, Any]]:
         """Obtiene las búsquedas de un usuario específico"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT s.id, s.query, s.search_type, s.timestamp, s.results_count, s.status
-            FROM searches s
-            WHERE s.user_id = ?
-            ORDER BY s.timestamp DESC
-            LIMIT ?
-        ''', (user_id, limit))
-        
-        searches = []
-        for row in cursor.fetchall():
-            searches.append({
+        return list(self.iter_user_searches(user_id, limit))
+
+    def get_user_searches_page(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                               search_type: Optional[str] = None, date_from: Optional[str] = None,
+                               date_to: Optional[str] = None) -> Dict[str, Any]:
+        """Página del historial ordenada por (timestamp, id) descendente, con cursor a la siguiente"""
+        conditions = ['s.user_id = ?']
+        params: List[Any] = [user_id]
+        after = decode_cursor(cursor, 2)
+        if after:
+            conditions.append('(s.timestamp, s.id) < (?, ?)')
+            params.extend(after)
+        if search_type:
+            conditions.append('s.search_type = ?')
+            params.append(search_type)
+        if date_from:
+            conditions.append('s.timestamp >= ?')
+            params.append(date_from)
+        if date_to:
+            # Fecha final inclusiva (AAAA-MM-DD)
+            conditions.append('s.timestamp < ?')
+            params.append((datetime.strptime(date_to[:10], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d'))
+
+        with self.pool.read() as db_cursor:
+            db_cursor.execute(f'''
+                SELECT s.id, s.query, s.search_type, s.timestamp, s.results_count, s.status
+                FROM searches s
+                WHERE {' AND '.join(conditions)}
+                ORDER BY s.timestamp DESC, s.id DESC
+                LIMIT ?
+            ''', params + [limit + 1])
+            rows = db_cursor.fetchall()
+
+        searches = [
+            {
                 'id': row[0],
                 'query': row[1],
                 'search_type': row[2],
                 'timestamp': row[3],
                 'results_count': row[4],
                 'status': row[5]
-            })
-        
-        conn.close()
-        return searches
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = searches[-1]
+            next_cursor = encode_cursor([last['timestamp'], last['id']])
+        return {'searches': searches, 'next_cursor': next_cursor}
+
+    def get_search(self, search_id: int) -> Optional[Dict[str, Any]]:
+        """Obtiene una búsqueda con el número de resultados por nivel de riesgo"""
+        with self.pool.read() as cursor:
+            cursor.execute('''
+                SELECT id, user_id, query, search_type, timestamp, results_count, status
+                FROM searches WHERE id = ?
+            ''', (search_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            cursor.execute('''
+                SELECT risk_level, COUNT(*) FROM search_result_links
+                WHERE search_id = ? GROUP BY risk_level
+            ''', (search_id,))
+            risk_counts = dict(cursor.fetchall())
+
+        return {
+            'id': row[0],
+            'user_id': row[1],
+            'query': row[2],
+            'search_type': row[3],
+            'timestamp': row[4],
+            'results_count': row[5],
+            'status': row[6],
+            'risk_counts': {level: risk_counts.get(level, 0) for level in RISK_LEVELS}
+        }
+
+    def get_search_results_page(self, search_id: int, limit: int = 50, cursor: Optional[str] = None,
+                                risk_level: Optional[str] = None, sort: str = 'relevance') -> Dict[str, Any]:
+        """Página de resultados de una búsqueda, filtrada por riesgo y ordenada por relevancia o riesgo"""
+        if sort not in ('relevance', 'risk'):
+            raise ValueError(f"Orden no soportado: {sort}")
+        if risk_level and risk_level not in RISK_LEVELS:
+            raise ValueError(f"Nivel de riesgo no válido: {risk_level}")
+
+        # Con sort=risk se recorre cada nivel por separado (índice search_id, risk_level, relevancia)
+        if sort == 'risk' and not risk_level:
+            after = decode_cursor(cursor, 3)
+            levels = list(RISK_LEVELS)
+            if after:
+                if after[0] not in RISK_LEVELS:
+                    raise ValueError("Cursor de paginación inválido")
+                levels = levels[levels.index(after[0]):]
+        else:
+            after = decode_cursor(cursor, 2)
+            after = [risk_level] + after if after else None
+            levels = [risk_level]
+
+        results: List[Dict[str, Any]] = []
+        more = False
+        with self.pool.read() as db_cursor:
+            for level in levels:
+                conditions = ['l.search_id = ?']
+                params: List[Any] = [search_id]
+                if level:
+                    conditions.append('l.risk_level = ?')
+                    params.append(level)
+                if after and after[0] == level:
+                    conditions.append('(l.relevance_score, l.id) < (?, ?)')
+                    params.extend(after[1:])
+
+                db_cursor.execute(f'''
+                    SELECT l.id, l.document_id, l.source, d.result_type, d.title, d.url, d.description,
+                           l.timestamp, l.relevance_score, l.risk_level, d.near_duplicate_of
+                    FROM search_result_links l
+                    JOIN result_documents d ON d.id = l.document_id
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY l.relevance_score DESC, l.id DESC
+                    LIMIT ?
+                ''', params + [limit - len(results) + 1])
+                for row in db_cursor.fetchall():
+                    if len(results) == limit:
+                        more = True
+                        break
+                    results.append({
+                        'id': row[0],
+                        'document_id': row[1],
+                        'source': row[2],
+                        'result_type': row[3],
+                        'title': row[4],
+                        'url': row[5],
+                        'description': row[6],
+                        'timestamp': row[7],
+                        'relevance_score': row[8],
+                        'risk_level': row[9],
+                        'near_duplicate_of': row[10]
+                    })
+                if more:
+                    break
+
+        next_cursor = None
+        if more:
+            last = results[-1]
+            key = [last['relevance_score'], last['id']]
+            next_cursor = encode_cursor([last['risk_level']] + key if sort == 'risk' and not risk_level else key)
+        return {'results': results, 'next_cursor': next_cursor}
+
+    def delete_search(self, search_id: int) -> bool:
+        """Elimina una búsqueda, sus enlaces y los documentos que queden huérfanos"""
+        with self.pool.transaction() as cursor:
+            cursor.execute(
+                'SELECT user_id, query, search_type, timestamp, results_count FROM searches WHERE id = ?',
+                (search_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return False
+            user_id, query, search_type, timestamp, results_count = row
+
+            cursor.execute('SELECT DISTINCT document_id FROM search_result_links WHERE search_id = ?', (search_id,))
+            document_ids = [doc_row[0] for doc_row in cursor.fetchall()]
+            cursor.execute('DELETE FROM search_result_links WHERE search_id = ?', (search_id,))
+            for start in range(0, len(document_ids), 500):
+                chunk = document_ids[start:start + 500]
+                cursor.execute(f'''
+                    DELETE FROM result_documents
+                    WHERE id IN ({','.join('?' * len(chunk))})
+                      AND NOT EXISTS (SELECT 1 FROM search_result_links l WHERE l.document_id = result_documents.id)
+                ''', chunk)
+            cursor.execute('DELETE FROM searches WHERE id = ?', (search_id,))
+
+            # Se descuentan de las estadísticas agregadas los mismos incrementos que sumó
+            try:
+                when = datetime.fromisoformat(str(timestamp)[:19]) if timestamp else None
+            except ValueError:
+                when = None
+            deltas = search_deltas(user_id, query, search_type, when)
+            deltas.append((user_id, 'results', 'total', results_count or 0))
+            increment_stats(cursor, [(uid, metric, bucket, -value) for uid, metric, bucket, value in deltas])
+
+        return True
+
+    def get_system_counts(self) -> Dict[str, int]:
+        """Totales del sistema para el panel de administración"""
+        with self.pool.read() as cursor:
+            system = read_user_stats(cursor, SYSTEM_USER_ID).get('system', {})
+
+        return {
+            'total_users': system.get('users', 0),
+            'total_searches': system.get('searches', 0),
+            'total_reports': system.get('reports', 0)
+        }
+
+    def get_user_stats(self, user_id: int) -> Dict[str, Any]:
+        """Estadísticas del dashboard sobre todo el historial del usuario"""
+        with self.pool.read() as cursor:
+            stats = read_user_stats(cursor, user_id)
+
+        risk = stats.get('risk', {})
+        weekday = stats.get('weekday', {})
+        region = stats.get('region', {})
+        return {
+            'total_searches': stats.get('searches', {}).get('total', 0),
+            'total_results': stats.get('results', {}).get('total', 0),
+            'risk_stats': {level: risk.get(level, 0) for level in RISK_LEVELS},
+            # Lunes a domingo
+            'activity_data': [weekday.get(str(day), 0) for day in range(7)],
+            'region_data': {name: region.get(name, 0) for name in region_buckets()},
+            'search_types': stats.get('search_type', {})
+        }
 
     def save_user_report_config(self, user_id: int, config_data: Dict[str, Any]) -> bool:
         """Guarda configuración de reporte personalizado"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO user_report_configs 
-                (user_id, report_name, report_type, frequency, email_delivery, format, 
-                 search_queries, search_types, enable_dorking, is_active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id,
-                config_data.get('report_name', 'Mi Reporte'),
-                config_data.get('report_type', 'daily'),
-                config_data.get('frequency', 'daily'),
-                config_data.get('email_delivery', True),
-                config_data.get('format', 'html'),
-                json.dumps(config_data.get('search_queries', [])),
-                json.dumps(config_data.get('search_types', [])),
-                config_data.get('enable_dorking', False),
-                config_data.get('is_active', True)
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO user_report_configs 
+                    (user_id, report_name, report_type, frequency, email_delivery, format, 
+                     search_queries, search_types, enable_dorking, is_active)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    user_id,
+                    config_data.get('report_name', 'Mi Reporte'),
+                    config_data.get('report_type', 'daily'),
+                    config_data.get('frequency', 'daily'),
+                    config_data.get('email_delivery', True),
+                    config_data.get('format', 'html'),
+                    json.dumps(config_data.get('search_queries', [])),
+                    json.dumps(config_data.get('search_types', [])),
+                    config_data.get('enable_dorking', False),
+                    config_data.get('is_active', True)
+                ))
+                increment_stats(cursor, [(SYSTEM_USER_ID, 'system', 'reports', 1)])
+
             return True
         except Exception as e:
             logger.error(f"Error guardando configuración de reporte: {str(e)}")
             return False
 
+    def iter_user_report_configs(self, user_id: int, batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Recorre las configuraciones de reportes de un usuario por lotes"""
+        with self.pool.read() as cursor:
+            cursor.execute('''
+                SELECT id, report_name, report_type, frequency, email_delivery, format,
+                       search_queries, search_types, enable_dorking, is_active, created_at
+                FROM user_report_configs 
+                WHERE user_id = ?
+                ORDER BY created_at DESC
+            ''', (user_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'id': row[0],
+                        'report_name': row[1],
+                        'report_type': row[2],
+                        'frequency': row[3],
+                        'email_delivery': row[4],
+                        'format': row[5],
+                        'search_queries': json.loads(row[6]) if row[6] else [],
+                        'search_types': json.loads(row[7]) if row[7] else [],
+                        'enable_dorking': row[8],
+                        'is_active': row[9],
+                        'created_at': row[10]
+                    }
+
     def get_user_report_configs(self, user_id: int) -> List[Dict[str, Any]]:
         """Obtiene configuraciones de reportes de un usuario"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, report_name, report_type, frequency, email_delivery, format,
-                   search_queries, search_types, enable_dorking, is_active, created_at
-            FROM user_report_configs 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-        ''', (user_id,))
-        
-        configs = []
-        for row in cursor.fetchall():
-            configs.append({
-                'id': row[0],
-                'report_name': row[1],
-                'report_type': row[2],
-                'frequency': row[3],
-                'email_delivery': row[4],
-                'format': row[5],
-                'search_queries': json.loads(row[6]) if row[6] else [],
-                'search_types': json.loads(row[7]) if row[7] else [],
-                'enable_dorking': row[8],
-                'is_active': row[9],
-                'created_at': row[10]
-            })
-        
-        conn.close()
-        return configs
+        return list(self.iter_user_report_configs(user_id))
 
     def generate_user_report(self, user_id: int, config_id: int) -> Optional[Dict[str, Any]]:
         """Genera un reporte personalizado para un usuario"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Obtener configuración
-            cursor.execute('''
-                SELECT report_name, report_type, frequency, format, search_queries, 
-                       search_types, enable_dorking
-                FROM user_report_configs 
-                WHERE id = ? AND user_id = ? AND is_active = 1
-            ''', (config_id, user_id))
-            
-            config_data = cursor.fetchone()
-            if not config_data:
-                return None
-            
-            report_name, report_type, frequency, format_type, search_queries, search_types, enable_dorking = config_data
-            
-            # Obtener datos del usuario
-            cursor.execute('SELECT email, full_name FROM users WHERE id = ?', (user_id,))
-            user_data = cursor.fetchone()
+            with self.pool.read() as cursor:
+                # Obtener configuración
+                cursor.execute('''
+                    SELECT report_name, report_type, frequency, format, search_queries, 
+                           search_types, enable_dorking
+                    FROM user_report_configs 
+                    WHERE id = ? AND user_id = ? AND is_active = 1
+                ''', (config_id, user_id))
+                config_data = cursor.fetchone()
+                
+                if not config_data:
+                    return None
+                
+                # Obtener datos del usuario
+                cursor.execute('SELECT email, full_name FROM users WHERE id = ?', (user_id,))
+                user_data = cursor.fetchone()
             
             if not user_data:
                 return None
             
+            report_name, report_type, frequency, format_type, search_queries, search_types, enable_dorking = config_data
             user_email, user_full_name = user_data
             
             # Generar contenido del reporte
@@ -810,15 +1277,13 @@ class OSINTDatabase:
             )
             
             # Guardar reporte
-            cursor.execute('''
-                INSERT INTO user_reports 
-                (user_id, config_id, report_title, report_content, report_format, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, config_id, report_name, report_content, format_type, 'generated'))
-            
-            report_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO user_reports 
+                    (user_id, config_id, report_title, report_content, report_format, status)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user_id, config_id, report_name, report_content, format_type, 'generated'))
+                report_id = cursor.lastrowid
             
             return {
                 'id': report_id,
@@ -1018,50 +1483,88 @@ class OSINTDatabase:
         
         return html_content
 
+class SourcesUnavailableError(RuntimeError):
+    """Ninguna fuente de la búsqueda respondió; `outcome` lleva las estadísticas con los errores"""
+
+    def __init__(self, outcome: Dict[str, Any]):
+        super().__init__("Todas las fuentes de la búsqueda fallaron")
+        self.outcome = outcome
+
 class EnhancedOSINTSearcher:
     """Buscador OSINT mejorado con capacidades avanzadas"""
     
     def __init__(self, config: OSINTConfig):
         self.config = config
-        self.db = OSINTDatabase()
-        self.dorking_engine = GoogleDorkingEngine(config)
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.db = OSINTDatabase(
+            archive_dir=config.archive_dir or None,
+            near_duplicate_days=config.dedup_history_days if config.dedup_enabled else None
+        )
+        self.rate_limiters = build_engine_rate_limiters(config)
+        self.engines = EngineRegistry(window=config.engine_stats_window, cooldown=config.engine_block_cooldown,
+                                      probe_interval=config.engine_probe_interval,
+                                      max_age=config.engine_stats_max_age, shared_pool=self.db.pool)
+        self.serp_cache = None
+        if config.serp_cache_enabled:
+            self.serp_cache = SERPCache(
+                config.serp_cache_path,
+                default_ttl=config.serp_cache_ttl,
+                stale_ttl=config.serp_cache_stale_ttl,
+                negative_ttl=config.serp_cache_negative_ttl,
+                max_entries=config.serp_cache_max_entries
+            )
+        self.search_cache = None
+        if config.search_cache_enabled:
+            self.search_cache = SearchResultCache(
+                config.serp_cache_path,
+                ttls=config.search_cache_ttls,
+                default_ttl=config.search_cache_ttl,
+                stale_ttl=config.search_cache_stale_ttl,
+                negative_ttl=config.serp_cache_negative_ttl,
+                max_entries=config.search_cache_max_entries
+            )
+        self.dorking_engine = GoogleDorkingEngine(config, self.rate_limiters, self.serp_cache, self.engines)
+        self.ranker = BM25Ranker(config.ranking_field_weights)
+        self.result_writer = None
+        if config.result_write_behind:
+            self.result_writer = ResultWriteQueue(
+                self.db.save_results_bulk,
+                max_batch_rows=config.result_write_batch_rows,
+                flush_interval=config.result_write_flush_interval,
+                mark_failed=self.db.mark_searches_failed
+            )
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        }, namespace='search_engines')
 
-    def search(self, query: str, search_type: str = 'general', enable_dorking: bool = False, user_id: int = 1) -> Dict[str, Any]:
-        """Realiza búsqueda OSINT completa"""
+    def search(self, query: str, search_type: str = 'general', enable_dorking: bool = False, user_id: int = 1,
+               progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """Realiza búsqueda OSINT completa (progress recibe los resultados de cada fuente al terminar)"""
         logger.info(f"Iniciando búsqueda OSINT para: {query}")
         
-        # Guardar búsqueda en BD
-        search_id = self.db.save_search(query, search_type, user_id)
-        
-        all_results = []
-        
-        # Búsqueda tradicional
-        traditional_results = self._traditional_search(query)
-        all_results.extend(traditional_results)
-        
-        # Búsqueda con Google Dorking si está habilitada
-        if enable_dorking:
-            dorking_results = self.dorking_engine.execute_dork_campaign(query)
-            for category_data in dorking_results['results_by_category'].values():
-                all_results.extend(category_data['results'])
-        
-        # Análisis especializado según tipo
-        if search_type == 'domain' and self.config.enable_domain_analysis:
-            domain_results = self._analyze_domain(query)
-            all_results.extend(domain_results)
-        elif search_type == 'ip' and self.config.enable_ip_analysis:
-            ip_results = self._analyze_ip(query)
-            all_results.extend(ip_results)
+        # Búsquedas idénticas recientes se sirven desde la caché (y se revalidan en segundo plano,
+        # sin el callback de progreso: la revalidación no pertenece al trabajo de esta petición)
+        try:
+            if self.search_cache is not None:
+                outcome, cache_status = self.search_cache.fetch_search(
+                    query, search_type, enable_dorking,
+                    lambda: self._checked_search(query, search_type, enable_dorking, progress),
+                    refresher=lambda: self._checked_search(query, search_type, enable_dorking)
+                )
+            else:
+                outcome, cache_status = self._checked_search(query, search_type, enable_dorking, progress), 'miss'
+        except SourcesUnavailableError as e:
+            # Todas las fuentes fallaron: se responde sin resultados, pero no se guarda en la caché
+            outcome, cache_status = e.outcome, 'error'
+        processed_results = outcome['results']
         
-        # Procesar y calcular relevancia
-        processed_results = self._process_results(all_results, query)
+        # Guardar búsqueda en BD (después de obtenerla: una búsqueda fallida no queda pendiente)
+        search_id = self.db.save_search(query, search_type, user_id)
         
-        # Guardar resultados
-        self.db.save_results(search_id, processed_results)
+        # Guardar resultados (en segundo plano si la escritura diferida está activa)
+        if self.result_writer:
+            self.result_writer.submit(search_id, processed_results)
+        else:
+            self.db.save_results(search_id, processed_results)
         
         return {
             'search_id': search_id,
@@ -1069,154 +1572,177 @@ class EnhancedOSINTSearcher:
             'search_type': search_type,
             'total_results': len(processed_results),
             'results': processed_results,
+            'source_stats': outcome['source_stats'],
+            'cache': cache_status,
             'timestamp': datetime.now().isoformat()
         }
 
-    def _traditional_search(self, query: str) -> List[Dict[str, Any]]:
-        """Búsqueda tradicional en motores configurados"""
-        all_results = []
+    def _checked_search(self, query: str, search_type: str, enable_dorking: bool,
+                        progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """_execute_search que lanza SourcesUnavailableError si ninguna fuente respondió"""
+        outcome = self._execute_search(query, search_type, enable_dorking, progress)
+        stats = outcome['source_stats']
+        if stats and all(source['error'] for source in stats):
+            raise SourcesUnavailableError(outcome)
+        return outcome
+
+    def _execute_search(self, query: str, search_type: str, enable_dorking: bool,
+                        progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """Consulta todas las fuentes y procesa los resultados (sin caché ni persistencia)"""
+        # Motores, dorking y análisis especializado se consultan en paralelo
+        all_results, source_stats = self._run_sources(self._plan_sources(query, search_type, enable_dorking), progress)
+        
+        # Procesar y calcular relevancia
+        return {'results': self._process_results(all_results, query), 'source_stats': source_stats}
+
+    def run_retention(self) -> Dict[str, Any]:
+        """Archiva resultados antiguos, elimina reportes vencidos y compacta la base"""
+        results_days, reports_days = load_retention_settings()
+        if self.config.results_retention_days is not None:
+            results_days = self.config.results_retention_days
+        if self.config.reports_retention_days is not None:
+            reports_days = self.config.reports_retention_days
         
+        try:
+            if self.result_writer:
+                self.result_writer.flush()
+            stats = self.db.archive_old_results(results_days)
+            stats['reports_deleted'] = self.db.cleanup_old_reports(reports_days)
+            logger.info(
+                f"Retención: {stats['searches']} búsquedas y {stats['results']} resultados archivados "
+                f"(> {results_days} días), {stats['reports_deleted']} reportes eliminados (> {reports_days} días)"
+            )
+            return stats
+        except Exception as e:
+            logger.error(f"Error ejecutando la retención: {str(e)}")
+            return {'error': str(e)}
+
+    def _engine_sources(self, query: str) -> List[Tuple[str, Callable[[], List[Dict[str, Any]]]]]:
+        """Fuentes (nombre, llamada) de los motores elegidos según sus estadísticas en vivo, leyendo
+        a través de la caché SERP. Los motores omitidos solo aportan lo que ya esté en la caché"""
+        selected = self.engines.select(self.config.search_engines, self.config.engine_fanout)
+        sources = []
         for engine in self.config.search_engines:
             try:
-                if engine == "google":
-                    results = self._search_google(query)
-                elif engine == "bing":
-                    results = self._search_bing(query)
-                elif engine == "duckduckgo":
-                    results = self._search_duckduckgo(query)
+                language = get_engine(engine).language
+            except KeyError:
+                continue
+            
+            if engine in selected:
+                if self.serp_cache is not None:
+                    call = lambda engine=engine, language=language: self.serp_cache.fetch_serp(
+                        engine, query, lambda: self._search_engine(engine, query), language=language
+                    )[0]
                 else:
+                    call = lambda engine=engine: self._search_engine(engine, query)
+            elif self.serp_cache is not None:
+                cached = self.serp_cache.get(self.serp_cache.serp_key(engine, query, language=language))
+                if cached is None:
                     continue
-                
-                all_results.extend(results)
-                time.sleep(self.config.rate_limit_delay)
-                
-            except Exception as e:
-                logger.error(f"Error en búsqueda {engine}: {str(e)}")
+                call = lambda value=cached[0]: value
+            else:
                 continue
-        
-        return all_results
+            sources.append((engine, call))
+        return sources
 
-    def _search_google(self, query: str) -> List[Dict[str, Any]]:
-        """Búsqueda básica en Google"""
-        try:
-            url = f"https://www.google.com/search?q={quote(query)}&num={self.config.max_results_per_source}&hl=es"
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            results = []
-            # Buscar diferentes tipos de contenedores de resultados
-            result_containers = soup.find_all('div', class_='g') or soup.find_all('div', class_='tF2Cxc')
-            
-            for container in result_containers[:self.config.max_results_per_source]:
-                try:
-                    title_elem = None
-                    link_elem = None
-                    
-                    if isinstance(container, Tag):
-                        title_elem = container.find('h3')
-                        link_elem = container.find('a')
-                    
-                    if title_elem and link_elem:
-                        title = self.dorking_engine._safe_get_text(title_elem)
-                        url_href = self.dorking_engine._safe_get_attr(link_elem, 'href')
-                        
-                        if url_href and url_href.startswith('http'):
-                            results.append({
-                                'source': 'google',
-                                'title': title,
-                                'url': url_href,
-                                'description': '',
-                                'content': '',
-                                'relevance_score': 0.0,
-                                'risk_level': 'low'
-                            })
-                except Exception:
-                    continue
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda Google: {str(e)}")
-            return []
+    def _plan_sources(self, query: str, search_type: str,
+                      enable_dorking: bool) -> List[Tuple[str, Callable[[], List[Dict[str, Any]]]]]:
+        """Todas las fuentes de una búsqueda, en el orden en que se combinan sus resultados"""
+        sources = self._engine_sources(query)
+        
+        if enable_dorking:
+            def dorking():
+                campaign = self.dorking_engine.execute_dork_campaign(query)
+                dork_stats = campaign['dork_stats']
+                if dork_stats and all(stats['error'] for stats in dork_stats):
+                    raise RuntimeError(f"Fallaron los {len(dork_stats)} dorks: {dork_stats[0]['error']}")
+                return [result for category_data in campaign['results_by_category'].values()
+                        for result in category_data['results']]
+            sources.append(('dorking', dorking))
+        
+        if search_type == 'domain' and self.config.enable_domain_analysis:
+            sources.append(('domain_analysis', lambda: self._analyze_domain(query)))
+        elif search_type == 'ip' and self.config.enable_ip_analysis:
+            sources.append(('ip_analysis', lambda: self._analyze_ip(query)))
+        
+        return sources
 
-    def _search_bing(self, query: str) -> List[Dict[str, Any]]:
-        """Búsqueda en Bing"""
-        try:
-            url = f"https://www.bing.com/search?q={quote(query)}&count={self.config.max_results_per_source}"
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            results = []
-            for container in soup.find_all('li', class_='b_algo')[:self.config.max_results_per_source]:
-                try:
-                    title_elem = None
-                    link_elem = None
-                    
-                    if isinstance(container, Tag):
-                        title_elem = container.find('h2')
-                        if isinstance(title_elem, Tag):
-                            link_elem = title_elem.find('a')
-                    
-                    if title_elem and link_elem:
-                        title = self.dorking_engine._safe_get_text(title_elem)
-                        url_href = self.dorking_engine._safe_get_attr(link_elem, 'href')
-                        
-                        if url_href and url_href.startswith('http'):
-                            results.append({
-                                'source': 'bing',
-                                'title': title,
-                                'url': url_href,
-                                'description': '',
-                                'content': '',
-                                'relevance_score': 0.0,
-                                'risk_level': 'low'
-                            })
-                except Exception:
-                    continue
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda Bing: {str(e)}")
-            return []
+    def _run_sources(self, sources: List[Tuple[str, Callable[[], List[Dict[str, Any]]]]],
+                     progress: Optional[Callable[..., None]] = None
+                     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Ejecuta las fuentes en paralelo; el ritmo de cada motor lo marca su token bucket.
+        progress(fuente, resultados, terminadas, total) se llama al terminar cada fuente"""
+        outcomes: List[Optional[List[Dict[str, Any]]]] = [None] * len(sources)
+        stats = [{'source': name, 'results': 0, 'latency_ms': 0.0, 'error': None} for name, _ in sources]
+        
+        def run(index: int) -> List[Dict[str, Any]]:
+            start = time.monotonic()
+            try:
+                return sources[index][1]()
+            finally:
+                stats[index]['latency_ms'] = round((time.monotonic() - start) * 1000, 1)
+        
+        if sources:
+            max_workers = max(1, min(self.config.max_concurrent_requests, len(sources)))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='osint-source') as executor:
+                futures = {executor.submit(run, index): index for index in range(len(sources))}
+                for done, future in enumerate(as_completed(futures), 1):
+                    index = futures[future]
+                    try:
+                        outcomes[index] = future.result()
+                        stats[index]['results'] = len(outcomes[index])
+                    except Exception as e:
+                        logger.error(f"Error en búsqueda {sources[index][0]}: {str(e)}")
+                        stats[index]['error'] = str(e)
+                    if progress:
+                        progress(sources[index][0], outcomes[index] or [], done, len(sources))
+        
+        # Se combinan en el orden planificado para que la deduplicación sea estable
+        merged = [result for outcome in outcomes if outcome for result in outcome]
+        return merged, stats
 
-    def _search_duckduckgo(self, query: str) -> List[Dict[str, Any]]:
-        """Búsqueda en DuckDuckGo"""
+    def _traditional_search(self, query: str) -> List[Dict[str, Any]]:
+        """Búsqueda tradicional en motores configurados (en paralelo)"""
+        return self._run_sources(self._engine_sources(query))[0]
+
+    def _search_engine(self, engine: str, query: str) -> List[Dict[str, Any]]:
+        """Descarga una página de resultados del motor y la parsea con su plugin"""
+        plugin = get_engine(engine)
+        # Solo las peticiones reales consumen turno del token bucket del motor
+        self.rate_limiters.acquire(engine)
+        start = time.monotonic()
         try:
-            url = f"https://duckduckgo.com/html?q={quote(query)}"
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            params = plugin.build_params(query, self.config.max_results_per_source)
+            response = self.session.get(plugin.search_url, params=params, timeout=self.config.request_timeout)
+            if plugin.is_blocked(response):
+                self.engines.record(engine, (time.monotonic() - start) * 1000, 0, blocked=True)
+                # Se propaga para que la caché SERP no guarde el bloqueo como página vacía
+                raise EngineBlockedError(f"{engine} bloqueó la búsqueda (HTTP {response.status_code})")
+            response.raise_for_status()
             
             results = []
-            for container in soup.find_all('div', class_='result')[:self.config.max_results_per_source]:
-                try:
-                    link_elem = None
-                    
-                    if isinstance(container, Tag):
-                        link_elem = container.find('a', {'class': 'result__a'})
-                    
-                    if link_elem:
-                        title = self.dorking_engine._safe_get_text(link_elem)
-                        url_href = self.dorking_engine._safe_get_attr(link_elem, 'href')
-                        
-                        if url_href and url_href.startswith('http'):
-                            results.append({
-                                'source': 'duckduckgo',
-                                'title': title,
-                                'url': url_href,
-                                'description': '',
-                                'content': '',
-                                'relevance_score': 0.0,
-                                'risk_level': 'low'
-                            })
-                except Exception:
-                    continue
+            for item in plugin.extract(response.text, limit=self.config.max_results_per_source):
+                results.append({
+                    'source': engine,
+                    'title': item['title'],
+                    'url': item['url'],
+                    'description': item['description'],
+                    'content': '',
+                    'relevance_score': 0.0,
+                    'risk_level': 'low'
+                })
             
+            self.engines.record(engine, (time.monotonic() - start) * 1000, len(results))
             return results
             
+        except EngineBlockedError:
+            raise
         except Exception as e:
-            logger.error(f"Error en búsqueda DuckDuckGo: {str(e)}")
-            return []
+            self.engines.record(engine, (time.monotonic() - start) * 1000, 0, error=True)
+            # Se propaga (como el bloqueo) para que la caché SERP no guarde el fallo como página vacía;
+            # _run_sources lo registra en las estadísticas de la fuente
+            logger.error(f"Error en búsqueda {engine}: {str(e)}")
+            raise
 
     def _analyze_domain(self, domain: str) -> List[Dict[str, Any]]:
         """Análisis básico de dominio"""
@@ -1224,7 +1750,7 @@ class EnhancedOSINTSearcher:
         
         try:
             # Obtener IP del dominio
-            ip = socket.gethostbyname(domain)
+            ip = gethostbyname(domain)
             results.append({
                 'source': 'domain_analysis',
                 'title': f'Dirección IP de {domain}',
@@ -1245,7 +1771,7 @@ class EnhancedOSINTSearcher:
         
         try:
             # Verificar si la IP responde
-            response = requests.get(f'http://{ip}', timeout=5)
+            response = self.session.get(f'http://{ip}', timeout=5, probe=True)
             results.append({
                 'source': 'ip_analysis',
                 'title': f'Servidor web en {ip}',
@@ -1263,31 +1789,25 @@ class EnhancedOSINTSearcher:
     def _process_results(self, results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
         """Procesa y mejora los resultados"""
         processed = []
+        canonicals = []
         seen_urls = set()
         
         for result in results:
             url = result.get('url', '')
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                
-                # Calcular relevancia básica
-                title = result.get('title', '').lower()
-                description = result.get('description', '').lower()
-                query_lower = query.lower()
-                
-                relevance = 0.0
-                if query_lower in title:
-                    relevance += 0.5
-                if query_lower in description:
-                    relevance += 0.3
-                
-                result['relevance_score'] = relevance
+            # Variantes de la misma URL (redirecciones del motor, parámetros de seguimiento)
+            canonical = canonicalize_url(url)
+            key = canonical or url
+            if url and key not in seen_urls:
+                seen_urls.add(key)
                 processed.append(result)
+                canonicals.append(canonical)
         
-        # Ordenar por relevancia
-        processed.sort(key=lambda x: x['relevance_score'], reverse=True)
+        # Espejos, páginas AMP y noticias sindicadas: se conserva el primero de cada grupo
+        if self.config.dedup_enabled:
+            processed = collapse_near_duplicates(processed, self.config.dedup_max_distance, canonicals)
         
-        return processed
+        # Relevancia BM25 sobre todo el lote y orden de mayor a menor
+        return self.ranker.rank(query, processed)
 
 class FlaskWebInterface:
     """Interfaz web Flask mejorada en español"""
@@ -1295,8 +1815,21 @@ class FlaskWebInterface:
     def __init__(self, osint_searcher: EnhancedOSINTSearcher, config: OSINTConfig):
         self.app = Flask(__name__)
         self.app.secret_key = config.secret_key
+        self.app.extensions['osint_web_interface'] = self
         self.osint_searcher = osint_searcher
         self.config = config
+        # Las investigaciones se ejecutan fuera del hilo de la petición, con concurrencia acotada
+        self.jobs = JobQueue(
+            osint_searcher.db.pool,
+            max_workers=config.job_max_workers,
+            max_pending=config.job_max_pending,
+            retention_hours=config.job_retention_hours
+        )
+        # Lotes de objetivos: checkpoint en disco y una ejecución en curso por lote (el estado
+        # vive en la tabla jobs y en el directorio del lote, compartidos por todos los workers)
+        self.batch_settings = load_batch_settings()
+        self.batches = BatchStore(self.batch_settings['directory'])
+        self._batch_start_lock = threading.Lock()
         
         self.setup_routes()
 
@@ -1315,6 +1848,33 @@ class FlaskWebInterface:
                 return session.get('user_data')
             return None
         
+        def wants_async(data: Dict[str, Any]) -> bool:
+            """La petición pide respuesta inmediata con el id del trabajo"""
+            return (bool(data.get('async')) or request.args.get('async') in ('1', 'true')
+                    or 'respond-async' in request.headers.get('Prefer', ''))
+        
+        def job_response(kind: str, user_id: int, params: Dict[str, Any], fn, wait: bool):
+            """Encola el trabajo; una petición síncrona espera su resultado un tiempo acotado"""
+            try:
+                job_id = self.jobs.submit(kind, user_id, params, fn)
+            except JobQueueFull as e:
+                logger.warning(f"Trabajo {kind} rechazado: {e}")
+                return jsonify({'error': 'Demasiadas investigaciones en curso, intente más tarde'}), 429
+            
+            job = self.jobs.wait(job_id, self.config.job_sync_wait) if wait else self.jobs.get(job_id)
+            if job and job['status'] == 'completed':
+                result = job['result'] or {}
+                return jsonify(result), 200 if result.get('success', True) else 500
+            if job and job['status'] == 'failed':
+                return jsonify({'error': job['error'], 'job_id': job_id}), 500
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': job['status'] if job else 'queued',
+                'status_url': url_for('api_job_status', job_id=job_id),
+                'results_url': url_for('api_job_results', job_id=job_id)
+            }), 202
+        
         @self.app.route('/')
         def index():
             auth_check = require_auth()
@@ -1339,11 +1899,7 @@ class FlaskWebInterface:
                         session['user_data'] = user
                         
                         # Actualizar último login
-                        conn = sqlite3.connect(self.osint_searcher.db.db_path)
-                        cursor = conn.cursor()
-                        cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user['id'],))
-                        conn.commit()
-                        conn.close()
+                        self.osint_searcher.db.update_last_login(user['id'])
                         
                         flash('¡Bienvenido! Has iniciado sesión correctamente.', 'success')
                         return redirect(url_for('dashboard'))
@@ -1402,26 +1958,15 @@ class FlaskWebInterface:
             recent_searches = self.osint_searcher.db.get_user_searches(user['id'], 10)
             report_configs = self.osint_searcher.db.get_user_report_configs(user['id'])
             
-            # Generar estadísticas básicas para el dashboard
+            # Estadísticas agregadas de todo el historial (tabla user_stats)
+            user_stats = self.osint_searcher.db.get_user_stats(user['id'])
             stats = {
-                'high_risk_findings': 0,
-                'medium_risk_findings': 0,
-                'low_risk_findings': 0,
-                'total_searches': len(recent_searches) if recent_searches else 0
+                'high_risk_findings': user_stats['risk_stats']['high'],
+                'medium_risk_findings': user_stats['risk_stats']['medium'],
+                'low_risk_findings': user_stats['risk_stats']['low'],
+                'total_searches': user_stats['total_searches']
             }
-            
-            # Calcular estadísticas de riesgo basadas en las búsquedas recientes
-            if recent_searches:
-                for search in recent_searches:
-                    # Simulación de análisis de riesgo basado en el tipo de búsqueda
-                    search_type = search.get('search_type', 'basic') if isinstance(search, dict) else getattr(search, 'search_type', 'basic')
-                    if search_type in ['advanced', 'government']:
-                        stats['high_risk_findings'] += 1
-                    elif search_type in ['business', 'news']:
-                        stats['medium_risk_findings'] += 1
-                    else:
-                        stats['low_risk_findings'] += 1
-            
+
             return render_template('dashboard.html', 
                                  user=user, 
                                  recent_searches=recent_searches,
@@ -1466,57 +2011,49 @@ class FlaskWebInterface:
                 if not user_prompt:
                     return jsonify({'error': 'Prompt requerido'}), 400
 
-                user = get_current_user()
-                user_id = user['id'] if user else 1 # Asignar un user_id por defecto si no hay sesión
-
-                logger.info(f"AI Search: Recibido prompt de user_id {user_id}: '{user_prompt}'")
-
-                # 1. Interpretar el prompt
-                if ai_core is None:
-                    return jsonify({'error': 'El módulo de IA no está disponible.'}), 503
-                interpretation = ai_core.interpret_prompt_for_osint(user_prompt)
-                logger.debug(f"AI Search: Interpretación: {interpretation}")
-                if interpretation.get("error"):
-                    return jsonify({'error': f"Error de interpretación de IA: {interpretation['error']}", 'details': interpretation.get('raw_response')}), 500
-
-                # Añadir user_id a specific_details para que la orquestación lo use si es necesario
-                interpretation.setdefault("specific_details", {})["user_id"] = user_id
-
-                # 2. Orquestar la búsqueda OSINT
-                # La instancia de osint_searcher ya está disponible como self.osint_searcher
                 if ai_core is None:
                     return jsonify({'error': 'El módulo de IA no está disponible.'}), 503
-                raw_osint_results = ai_core.orchestrate_osint_search(interpretation, self.osint_searcher)
-                logger.debug(f"AI Search: Resultados crudos OSINT: {raw_osint_results[:2]}") # Loguear solo una muestra
-
-                # Verificar si hubo error en la orquestación
-                if raw_osint_results and isinstance(raw_osint_results, list) and raw_osint_results[0].get("error"):
-                     return jsonify({'error': f"Error durante la búsqueda OSINT: {raw_osint_results[0]['error']}"}), 500
-
-                # 3. Generar el resumen/reporte con IA
-                summary = ai_core.generate_osint_report_summary(raw_osint_results, user_prompt, interpretation)
-                logger.debug(f"AI Search: Resumen generado: {summary[:200]}...") # Loguear inicio del resumen
 
-                # Guardar la búsqueda y los resultados (simplificado por ahora)
-                # Podríamos crear un nuevo tipo de 'search' o 'report' en la BD para esto.
-                # Por ahora, guardamos el prompt como query y el resumen como parte de la descripción del primer resultado.
+                user = get_current_user()
+                user_id = user['id'] if user else 1 # Asignar un user_id por defecto si no hay sesión
 
-                # search_id = self.osint_searcher.db.save_search(query=f"AI Prompt: {user_prompt[:100]}", search_type="ai_assisted", user_id=user_id)
-                # self.osint_searcher.db.save_results(search_id, [{
-                #     "source": "ai_summary",
-                #     "title": f"Resumen de IA para: {interpretation.get('main_target', 'Prompt')}",
-                #     "description": summary,
-                #     "content": json.dumps({"interpretation": interpretation, "raw_results_sample": raw_osint_results[:5]}), # Guardar muestra
-                #     "risk_level": "info"
-                # }])
+                logger.info(f"AI Search: Recibido prompt de user_id {user_id}: '{user_prompt}'")
 
+                def run_ai_search(progress):
+                    # 1. Interpretar el prompt
+                    progress('interpretación', done=0, total=3)
+                    interpretation = ai_core.interpret_prompt_for_osint(user_prompt)
+                    logger.debug(f"AI Search: Interpretación: {interpretation}")
+                    if interpretation.get("error"):
+                        return {'success': False, 'error': f"Error de interpretación de IA: {interpretation['error']}",
+                                'details': interpretation.get('raw_response')}
+
+                    # Añadir user_id a specific_details para que la orquestación lo use si es necesario
+                    interpretation.setdefault("specific_details", {})["user_id"] = user_id
+
+                    # 2. Orquestar la búsqueda OSINT
+                    progress('búsqueda', done=1, total=3)
+                    raw_osint_results = ai_core.orchestrate_osint_search(interpretation, self.osint_searcher)
+                    logger.debug(f"AI Search: Resultados crudos OSINT: {raw_osint_results[:2]}") # Loguear solo una muestra
+
+                    # Verificar si hubo error en la orquestación
+                    if raw_osint_results and isinstance(raw_osint_results, list) and raw_osint_results[0].get("error"):
+                        return {'success': False, 'error': f"Error durante la búsqueda OSINT: {raw_osint_results[0]['error']}"}
+
+                    # 3. Generar el resumen/reporte con IA
+                    progress('resumen', raw_osint_results[:10], done=2, total=3)
+                    summary = ai_core.generate_osint_report_summary(raw_osint_results, user_prompt, interpretation)
+                    logger.debug(f"AI Search: Resumen generado: {summary[:200]}...") # Loguear inicio del resumen
+
+                    return {
+                        'success': True,
+                        'interpretation': interpretation,
+                        'summary': summary,
+                        'raw_results_sample': raw_osint_results[:10] # Devolver una muestra de resultados crudos
+                    }
 
-                return jsonify({
-                    'success': True,
-                    'interpretation': interpretation,
-                    'summary': summary,
-                    'raw_results_sample': raw_osint_results[:10] # Devolver una muestra de resultados crudos
-                })
+                return job_response('ai_search', user_id, {'prompt': user_prompt}, run_ai_search,
+                                    not wants_async(data))
 
             except Exception as e:
                 logger.error(f"Error en API AI search: {str(e)}", exc_info=True)
@@ -1627,43 +2164,52 @@ class FlaskWebInterface:
                     if record_type and record_type != 'all':
                         search_query += f' {record_type}'
                 
-                # Realizar la búsqueda
-                results = self.osint_searcher.search(search_query, search_type, enable_dorking, user_id)
-                
-                # Enriquecer resultados con información específica del tipo de búsqueda
-                enriched_results = []
-                for result in results:
-                    if isinstance(result, dict):
-                        enriched_result = result.copy()
-                    else:
-                        # Si el result no es un dict, crear uno básico
-                        enriched_result = {
-                            'title': str(result),
-                            'url': '',
-                            'description': '',
-                            'source': 'unknown'
-                        }
+                def run_search(progress):
+                    # La búsqueda corre en el pool de trabajos; el progreso llega por cada fuente terminada
+                    outcome = self.osint_searcher.search(search_query, search_type, enable_dorking, user_id, progress)
                     
-                    # Asignar nivel de riesgo basado en el tipo de búsqueda y fuente
-                    if search_type in ['government', 'judicial']:
-                        enriched_result['risk_level'] = 'high'
-                    elif search_type in ['person', 'contact']:
-                        enriched_result['risk_level'] = 'medium'
-                    else:
-                        enriched_result['risk_level'] = 'low'
+                    # Enriquecer resultados con información específica del tipo de búsqueda
+                    enriched_results = []
+                    for result in outcome['results']:
+                        if isinstance(result, dict):
+                            enriched_result = result.copy()
+                        else:
+                            # Si el result no es un dict, crear uno básico
+                            enriched_result = {
+                                'title': str(result),
+                                'url': '',
+                                'description': '',
+                                'source': 'unknown'
+                            }
+                    
+                        # Asignar nivel de riesgo basado en el tipo de búsqueda y fuente
+                        if search_type in ['government', 'judicial']:
+                            enriched_result['risk_level'] = 'high'
+                        elif search_type in ['person', 'contact']:
+                            enriched_result['risk_level'] = 'medium'
+                        else:
+                            enriched_result['risk_level'] = 'low'
                     
-                    # Añadir metadatos específicos
-                    enriched_result['search_type'] = search_type
-                    enriched_result['timestamp'] = datetime.now().isoformat()
+                        # Añadir metadatos específicos
+                        enriched_result['search_type'] = search_type
+                        enriched_result['timestamp'] = datetime.now().isoformat()
                     
-                    enriched_results.append(enriched_result)
+                        enriched_results.append(enriched_result)
+                    
+                    return {
+                        'success': True,
+                        'data': enriched_results,
+                        'results': enriched_results,
+                        'search_id': outcome['search_id'],
+                        'total_results': outcome['total_results'],
+                        'search_type': search_type,
+                        'query': search_query,
+                        'source_stats': outcome['source_stats'],
+                        'cache': outcome['cache']
+                    }
                 
-                return jsonify({
-                    'success': True,
-                    'data': enriched_results,
-                    'search_type': search_type,
-                    'query': search_query
-                })
+                params = {'query': search_query, 'search_type': search_type, 'enable_dorking': enable_dorking}
+                return job_response('search', user_id, params, run_search, not wants_async(data))
                 
             except Exception as e:
                 logger.error(f"Error en API search: {str(e)}")
@@ -1737,12 +2283,15 @@ class FlaskWebInterface:
                 if not target:
                     return jsonify({'error': 'Target requerido'}), 400
                 
-                results = self.osint_searcher.dorking_engine.execute_dork_campaign(target, categories)
+                user = get_current_user()
+                user_id = user['id'] if user else 1
                 
-                return jsonify({
-                    'success': True,
-                    'data': results
-                })
+                def run_campaign(progress):
+                    results = self.osint_searcher.dorking_engine.execute_dork_campaign(target, categories, progress)
+                    return {'success': True, 'data': results}
+                
+                params = {'target': target, 'categories': categories}
+                return job_response('dork_campaign', user_id, params, run_campaign, not wants_async(data))
                 
             except Exception as e:
                 logger.error(f"Error en dork campaign: {str(e)}")
@@ -1759,84 +2308,460 @@ class FlaskWebInterface:
                 if not user:
                     return jsonify({'error': 'Usuario no encontrado'}), 404
                 
-                # Obtener búsquedas recientes para calcular estadísticas reales
-                recent_searches = self.osint_searcher.db.get_user_searches(user['id'], 100)
+                # Contadores agregados de todo el historial (tabla user_stats)
+                user_stats = self.osint_searcher.db.get_user_stats(user['id'])
                 
-                # Calcular estadísticas reales
-                risk_stats = {'high': 0, 'medium': 0, 'low': 0}
+                return jsonify({
+                    'success': True,
+                    'risk_stats': user_stats['risk_stats'],
+                    'activity_data': user_stats['activity_data'],
+                    'region_data': list(user_stats['region_data'].values()),
+                    'total_searches': user_stats['total_searches'],
+                    'total_results': user_stats['total_results']
+                })
+                
+            except Exception as e:
+                logger.error(f"Error en API dashboard stats: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/engines')
+        def api_engines():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            # Estadísticas en vivo de cada motor y orden en que se consultarían ahora
+            return jsonify({
+                'success': True,
+                'engines': self.osint_searcher.engines.snapshot(),
+                'selection': self.osint_searcher.engines.select(self.config.search_engines, self.config.engine_fanout,
+                                                                probe=False)
+            })
+
+        @self.app.route('/api/results/search')
+        def api_results_search():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+            
+            try:
+                text = request.args.get('q', '').strip()
+                if not text:
+                    return jsonify({'error': 'Parámetro q requerido'}), 400
                 
-                # Calcular actividad por días de la semana
-                activity_data = [0, 0, 0, 0, 0, 0, 0]  # Lun-Dom
+                page = max(request.args.get('page', 1, type=int), 1)
+                per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
                 
-                # Calcular búsquedas por tipo/región
-                region_data = {'bogota': 0, 'medellin': 0, 'cali': 0, 'barranquilla': 0, 'otros': 0}
+                # Los administradores buscan en todo el historial; el resto solo en el propio
+                user = get_current_user()
+                user_id = None if user and user.get('role') == 'admin' else (user['id'] if user else 1)
                 
-                if recent_searches:
-                    for search in recent_searches:
-                        search_type = search.get('search_type', 'basic') if isinstance(search, dict) else getattr(search, 'search_type', 'basic')
-                        
-                        # Clasificar por riesgo
-                        if search_type in ['advanced', 'government', 'judicial']:
-                            risk_stats['high'] += 1
-                        elif search_type in ['business', 'news', 'academic']:
-                            risk_stats['medium'] += 1
-                        else:
-                            risk_stats['low'] += 1
-                        
-                        # Calcular actividad por día (simulación básica)
-                        try:
-                            if hasattr(search, 'timestamp') or 'timestamp' in search:
-                                timestamp = search.get('timestamp') if isinstance(search, dict) else search.timestamp
-                                if timestamp:
-                                    # Parsear timestamp y obtener día de la semana
-                                    from datetime import datetime
-                                    if isinstance(timestamp, str):
-                                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                                    else:
-                                        dt = timestamp
-                                    weekday = dt.weekday()  # 0=Lunes, 6=Domingo
-                                    activity_data[weekday] += 1
-                        except:
-                            pass
-                        
-                        # Clasificar por región basado en el query
-                        query = search.get('query', '') if isinstance(search, dict) else getattr(search, 'query', '')
-                        query_lower = query.lower()
-                        
-                        if any(word in query_lower for word in ['bogotá', 'bogota', 'cundinamarca']):
-                            region_data['bogota'] += 1
-                        elif any(word in query_lower for word in ['medellín', 'medellin', 'antioquia']):
-                            region_data['medellin'] += 1
-                        elif any(word in query_lower for word in ['cali', 'valle']):
-                            region_data['cali'] += 1
-                        elif any(word in query_lower for word in ['barranquilla', 'atlántico', 'atlantico']):
-                            region_data['barranquilla'] += 1
-                        else:
-                            region_data['otros'] += 1
+                data = self.osint_searcher.db.search_results_fulltext(
+                    text, user_id=user_id, limit=per_page, offset=(page - 1) * per_page
+                )
                 
                 return jsonify({
                     'success': True,
-                    'risk_stats': risk_stats,
-                    'activity_data': activity_data,
-                    'region_data': list(region_data.values())
+                    'query': text,
+                    'page': page,
+                    'per_page': per_page,
+                    'total': data['total'],
+                    'results': data['results']
                 })
                 
             except Exception as e:
-                logger.error(f"Error en API dashboard stats: {str(e)}")
+                logger.error(f"Error en búsqueda de historial: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/export/results')
+        def api_export_results():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+            
+            fmt = request.args.get('format', 'csv').lower()
+            if fmt not in EXPORT_FORMATS:
+                return jsonify({'error': f'Formato no soportado: {fmt}'}), 400
+            days = min(max(request.args.get('days', 1, type=int), 1), 3650)
+            include_archived = request.args.get('archived', '0') in ('1', 'true')
+            
+            # Los administradores exportan todo; el resto solo sus propias búsquedas
+            user = get_current_user()
+            user_id = None if user and user.get('role') == 'admin' else (user['id'] if user else 1)
+            
+            rows = self.osint_searcher.db.iter_recent_results(
+                days, include_archived=include_archived, user_id=user_id
+            )
+            _, mimetype, extension = EXPORT_FORMATS[fmt]
+            filename = f"osint_resultados_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+            
+            return Response(
+                stream_with_context(stream_export(rows, fmt)),
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+
+        def visible_search(search_id: int):
+            """Búsqueda si el usuario actual puede verla (propia o administrador), si no None"""
+            search = self.osint_searcher.db.get_search(search_id)
+            if not search:
+                return None
+            user = get_current_user()
+            if user and user.get('role') != 'admin' and search['user_id'] != user['id']:
+                return None
+            if not user and self.config.web_auth_enabled:
+                return None
+            return search
+
+        @self.app.route('/api/history')
+        def api_history():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            try:
+                user = get_current_user()
+                page = self.osint_searcher.db.get_user_searches_page(
+                    user['id'] if user else 1,
+                    limit=page_size(request.args.get('limit'), 50),
+                    cursor=request.args.get('cursor'),
+                    search_type=request.args.get('search_type') or None,
+                    date_from=request.args.get('date_from') or None,
+                    date_to=request.args.get('date_to') or None
+                )
+                return jsonify({'success': True, **page})
+
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                logger.error(f"Error obteniendo historial: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/search/<int:search_id>', methods=['GET', 'DELETE'])
+        def api_search_detail(search_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            search = visible_search(search_id)
+            if not search:
+                return jsonify({'success': False, 'error': 'Búsqueda no encontrada'}), 404
+
+            if request.method == 'DELETE':
+                try:
+                    deleted = self.osint_searcher.db.delete_search(search_id)
+                    return jsonify({'success': deleted})
+                except Exception as e:
+                    logger.error(f"Error eliminando búsqueda {search_id}: {str(e)}")
+                    return jsonify({'success': False, 'error': str(e)}), 500
+
+            return jsonify({'success': True, 'search': search})
+
+        @self.app.route('/api/search/<int:search_id>/results')
+        def api_search_results(search_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            if not visible_search(search_id):
+                return jsonify({'success': False, 'error': 'Búsqueda no encontrada'}), 404
+
+            try:
+                page = self.osint_searcher.db.get_search_results_page(
+                    search_id,
+                    limit=page_size(request.args.get('limit'), 50),
+                    cursor=request.args.get('cursor'),
+                    risk_level=request.args.get('risk') or None,
+                    sort=request.args.get('sort', 'relevance')
+                )
+                return jsonify({'success': True, 'search_id': search_id, **page})
+
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                logger.error(f"Error obteniendo resultados de la búsqueda {search_id}: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/search/<int:search_id>/export')
+        def api_search_export(search_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            search = visible_search(search_id)
+            if not search:
+                return jsonify({'success': False, 'error': 'Búsqueda no encontrada'}), 404
+            fmt = request.args.get('format', 'csv').lower()
+            if fmt not in EXPORT_FORMATS:
+                return jsonify({'error': f'Formato no soportado: {fmt}'}), 400
+
+            def rows():
+                cursor = None
+                while True:
+                    page = self.osint_searcher.db.get_search_results_page(search_id, limit=500, cursor=cursor)
+                    for result in page['results']:
+                        yield {**result, 'query': search['query'], 'search_type': search['search_type']}
+                    cursor = page['next_cursor']
+                    if not cursor:
+                        break
+
+            _, mimetype, extension = EXPORT_FORMATS[fmt]
+            return Response(
+                stream_with_context(stream_export(rows(), fmt)),
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename=osint_busqueda_{search_id}.{extension}'}
+            )
+
+        def visible_job(job_id: str):
+            """Trabajo si el usuario actual puede verlo (propio o administrador), si no None"""
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            user = get_current_user()
+            if user and user.get('role') != 'admin' and job['user_id'] != user['id']:
+                return None
+            if not user and self.config.web_auth_enabled:
+                return None
+            return job
+
+        @self.app.route('/api/jobs')
+        def api_jobs():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            try:
+                user = get_current_user()
+                jobs = self.jobs.list_jobs(user['id'] if user else 1, limit=page_size(request.args.get('limit'), 20))
+                return jsonify({'success': True, 'jobs': jobs})
+            except Exception as e:
+                logger.error(f"Error listando trabajos: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+        def api_job_status(job_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            job = visible_job(job_id)
+            if not job:
+                return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+            if request.method == 'DELETE':
+                # Solo se cancelan trabajos que aún esperan turno
+                if not self.jobs.cancel(job_id):
+                    return jsonify({'success': False, 'error': f"El trabajo ya está {job['status']}"}), 409
+                return jsonify({'success': True})
+
+            return jsonify({'success': True, 'job': job})
+
+        @self.app.route('/api/jobs/<job_id>/results')
+        def api_job_results(job_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            job = visible_job(job_id)
+            if not job:
+                return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+            try:
+                since = int(request.args.get('since', 0))
+                events = self.jobs.events(job_id, since, limit=page_size(request.args.get('limit'), 50))
+                return jsonify({
+                    'success': True,
+                    'job_id': job_id,
+                    'status': job['status'],
+                    'events': events,
+                    'next_since': events[-1]['seq'] if events else since
+                })
+            except ValueError:
+                return jsonify({'error': 'since debe ser un entero'}), 400
+            except Exception as e:
+                logger.error(f"Error obteniendo resultados del trabajo {job_id}: {str(e)}")
+                return jsonify({'error': str(e)}), 500
+
+        def visible_batch(batch_id: str):
+            """Manifiesto del lote si el usuario actual puede verlo (propio o administrador), si no None"""
+            try:
+                batch = self.batches.status(batch_id)
+            except BatchError:
+                return None
+            if not batch:
+                return None
+            user = get_current_user()
+            if user and user.get('role') != 'admin' and batch.get('owner') != user['id']:
+                return None
+            if not user and self.config.web_auth_enabled:
+                return None
+            return batch
+
+        def start_batch(batch: Dict[str, Any], user_id: int, search_type: str, enable_dorking: bool):
+            """Encola la ejecución del lote; los objetivos ya guardados en results.jsonl se omiten"""
+            batch_id = batch['batch_id']
+            with self._batch_start_lock:
+                # En cola en algún worker o con el lock tomado (un trabajo 'running' sin lock murió con su
+                # proceso). Comprobar y encolar bajo el lock: dos peticiones a la vez no lanzan el lote dos
+                # veces; entre workers, la segunda ejecución terminaría en BatchLocked
+                queued = any(job['status'] == 'queued' for job in self.jobs.active('batch', batch_id=batch_id))
+                if queued or self.batches.is_running(batch_id):
+                    return jsonify({'success': False, 'error': 'El lote ya se está ejecutando', 'batch': batch}), 409
+                return enqueue_batch(batch, user_id, search_type, enable_dorking)
+
+        def enqueue_batch(batch: Dict[str, Any], user_id: int, search_type: str, enable_dorking: bool):
+            """Crea la ejecución del lote y la envía a la cola de trabajos"""
+            batch_id = batch['batch_id']
+
+            def search_target(target: str, target_type: str) -> Dict[str, Any]:
+                outcome = self.osint_searcher.search(target, target_type or search_type, enable_dorking, user_id)
+                return {key: outcome[key] for key in ('search_id', 'total_results', 'results', 'source_stats')}
+
+            run = BatchRun(
+                self.batches, batch_id, search_target,
+                workers=self.batch_settings['workers'],
+                rate_limit=self.batch_settings['rate_limit'],
+                burst=self.batch_settings['burst'],
+                max_attempts=self.batch_settings['max_attempts']
+            )
+
+            def run_batch(progress):
+                try:
+                    return {'success': True, **run.run(progress)}
+                except BatchLocked as e:
+                    return {'success': False, 'error': str(e)}
+
+            params = {'batch_id': batch_id, 'total': batch['total'], 'search_type': search_type}
+            response, status = job_response('batch', user_id, params, run_batch, False)
+            if status != 429:
+                body = response.get_json()
+                body.update(batch_id=batch_id, total=batch['total'],
+                            batch_url=url_for('api_batch_status', batch_id=batch_id))
+                response = jsonify(body)
+            return response, status
+
+        def batch_rows(items: Any) -> List[Tuple[Any, Any]]:
+            """(objetivo, tipo) de la lista JSON: cadenas, números u objetos {"target", "type"} (BatchError si no)"""
+            if not isinstance(items, list):
+                raise BatchError("targets debe ser una lista")
+            rows = []
+            for number, item in enumerate(items, 1):
+                if isinstance(item, (str, int)):
+                    rows.append((item, ''))
+                elif isinstance(item, dict) and isinstance(item.get('target') or '', (str, int)) \
+                        and isinstance(item.get('type') or '', str):
+                    rows.append((item.get('target') or '', item.get('type') or ''))
+                else:
+                    raise BatchError(f"Objetivo {number} inválido: se espera una cadena o un objeto con target")
+            return rows
+
+        @self.app.route('/api/batch', methods=['GET', 'POST'])
+        def api_batch():
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            user = get_current_user()
+            user_id = user['id'] if user else 1
+            if request.method == 'GET':
+                owner = None if user and user.get('role') == 'admin' else user_id
+                return jsonify({'success': True, 'batches': self.batches.list_batches(owner)})
+
+            try:
+                # Archivo subido (multipart, campo "file") o JSON con la lista de objetivos
+                upload = request.files.get('file')
+                if upload:
+                    data = request.form
+                    search_type = data.get('search_type', 'general')
+                    text = upload.read().decode('utf-8-sig')
+                    targets = parse_targets(text, Path(upload.filename or '').suffix or 'txt', search_type)
+                    source = upload.filename or ''
+                else:
+                    data = request.get_json() or {}
+                    search_type = data.get('search_type', 'general')
+                    rows = batch_rows(data.get('targets', []))
+                    targets = dedupe_targets(((str(target).strip(), kind) for target, kind in rows), search_type)
+                    source = 'api'
+                enable_dorking = str(data.get('enable_dorking', '')).lower() in ('1', 'true')
+
+                batch = self.batches.create(targets, user_id, source, self.batch_settings['max_targets'])
+                return start_batch(batch, user_id, search_type, enable_dorking)
+
+            except (BatchError, UnicodeDecodeError) as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            except Exception as e:
+                logger.error(f"Error creando lote: {str(e)}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/batch/<batch_id>', methods=['GET', 'DELETE'])
+        def api_batch_status(batch_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            batch = visible_batch(batch_id)
+            if not batch:
+                return jsonify({'success': False, 'error': 'Lote no encontrado'}), 404
+
+            if request.method == 'DELETE':
+                # Detiene el lote en el worker que lo tenga (o lo cancela si aún espera turno);
+                # lo ya investigado queda en el checkpoint para reanudarlo
+                queued = [job for job in self.jobs.active('batch', batch_id=batch_id) if job['status'] == 'queued']
+                cancelled = sum(1 for job in queued if self.jobs.cancel(job['id']))
+                if self.batches.is_running(batch_id):
+                    self.batches.request_stop(batch_id)
+                    return jsonify({'success': True, 'status': 'stopping'})
+                if cancelled:
+                    return jsonify({'success': True, 'status': 'cancelled'})
+                return jsonify({'success': False, 'error': f"El lote no está en ejecución ({batch['status']})"}), 409
+
+            return jsonify({'success': True, 'batch': batch})
+
+        @self.app.route('/api/batch/<batch_id>/resume', methods=['POST'])
+        def api_batch_resume(batch_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            batch = visible_batch(batch_id)
+            if not batch:
+                return jsonify({'success': False, 'error': 'Lote no encontrado'}), 404
+
+            data = request.get_json(silent=True) or {}
+            return start_batch(batch, batch.get('owner') or 1, data.get('search_type', 'general'),
+                               bool(data.get('enable_dorking', False)))
+
+        @self.app.route('/api/batch/<batch_id>/results')
+        def api_batch_results(batch_id):
+            auth_check = require_auth()
+            if auth_check and self.config.web_auth_enabled:
+                return jsonify({'error': 'No autorizado'}), 401
+
+            batch = visible_batch(batch_id)
+            if not batch:
+                return jsonify({'success': False, 'error': 'Lote no encontrado'}), 404
+
+            path = self.batches.results_path(batch_id)
+            if not path.exists():
+                return jsonify({'success': False, 'error': 'El lote aún no tiene resultados'}), 404
+            # Una línea por objetivo investigado; en los reintentos vale la última línea de cada clave
+            return send_file(str(path.resolve()), mimetype='application/x-ndjson', as_attachment=True,
+                             download_name=f'osint_lote_{batch_id}.jsonl')
+
         @self.app.route('/history')
         def history():
             auth_check = require_auth()
             if auth_check:
                 return auth_check
-            
+
             user = get_current_user()
             if not user:
                 return redirect(url_for('login'))
-            
-            user_searches = self.osint_searcher.db.get_user_searches(user['id'], 50)
-            return render_template('history.html', user=user, searches=user_searches)
+
+            # Primera página; las siguientes se cargan con /api/history y el cursor
+            page = self.osint_searcher.db.get_user_searches_page(user['id'], 50)
+            return render_template('history.html', user=user, searches=page['searches'],
+                                   next_cursor=page['next_cursor'])
 
         @self.app.route('/admin')
         def admin():
@@ -1850,25 +2775,13 @@ class FlaskWebInterface:
                 return redirect(url_for('dashboard'))
             
             # Obtener estadísticas del sistema
-            conn = sqlite3.connect(self.osint_searcher.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total_users = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM searches')
-            total_searches = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM user_report_configs')
-            total_reports = cursor.fetchone()[0]
-            
-            conn.close()
+            counts = self.osint_searcher.db.get_system_counts()
             
             return render_template('admin.html', 
                                  user=user,
-                                 total_users=total_users,
-                                 total_searches=total_searches,
-                                 total_reports=total_reports)
+                                 total_users=counts['total_users'],
+                                 total_searches=counts['total_searches'],
+                                 total_reports=counts['total_reports'])
 
         @self.app.route('/test')
         def test():
@@ -1920,11 +2833,25 @@ def create_config_from_json(config_path: str) -> OSINTConfig:
         logger.error(f"Error cargando configuración: {str(e)}")
         return OSINTConfig()
 
-def main():
-    """Función principal del servidor MCP mejorado"""
+def start_maintenance_scheduler(osint_searcher: EnhancedOSINTSearcher, config: OSINTConfig) -> Optional[threading.Thread]:
+    """Programa las tareas diarias de mantenimiento en un hilo en segundo plano"""
+    if not config.retention_enabled:
+        return None
     
-    # Crear configuración de ejemplo si no existe
-    config_path = "osint_config.json"
+    schedule.every().day.at(config.retention_time).do(osint_searcher.run_retention)
+    
+    def run_pending():
+        while True:
+            schedule.run_pending()
+            time.sleep(30)
+    
+    thread = threading.Thread(target=run_pending, name='maintenance-scheduler', daemon=True)
+    thread.start()
+    logger.info(f"Retención programada diariamente a las {config.retention_time}")
+    return thread
+
+def ensure_config_file(config_path: str = "osint_config.json"):
+    """Crea una configuración de ejemplo si no existe"""
     if not os.path.exists(config_path):
         example_config = {
             "email_smtp_server": "smtp.gmail.com",
@@ -1947,12 +2874,30 @@ def main():
             json.dump(example_config, f, indent=2, ensure_ascii=False)
         
         logger.info(f"Archivo de configuración creado: {config_path}")
+
+def create_web_interface(config_path: str = "osint_config.json", start_scheduler: bool = True) -> FlaskWebInterface:
+    """Construye buscador e interfaz web (el servidor de producción lo llama una vez antes de crear los workers)"""
+    ensure_config_file(config_path)
+    config = create_config_from_json(config_path)
+    
+    osint_searcher = EnhancedOSINTSearcher(config)
+    if start_scheduler:
+        start_maintenance_scheduler(osint_searcher, config)
+    return FlaskWebInterface(osint_searcher, config)
+
+def main():
+    """Función principal del servidor MCP mejorado"""
+    
+    # Crear configuración de ejemplo si no existe
+    config_path = "osint_config.json"
+    ensure_config_file(config_path)
     
     # Cargar configuración
     config = create_config_from_json(config_path)
     
     # Crear instancias principales
     osint_searcher = EnhancedOSINTSearcher(config)
+    start_maintenance_scheduler(osint_searcher, config)
     
     # Iniciar interfaz web si está habilitada
     if config.web_interface_enabled:
@@ -1964,6 +2909,8 @@ def main():
             logger.info(f"🔑 Contraseña: {config.web_password}")
         else:
             logger.info(f"🔑 Contraseña por defecto: admin123")
+        # Servidor de desarrollo (un proceso); en producción usar osint_wsgi.py
+        logger.info("Para producción (varios workers): python osint_wsgi.py")
         
         web_interface.app.run(
             host=config.web_host,
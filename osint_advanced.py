@@ -16,9 +16,7 @@ import base64
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 from urllib.parse import urlparse, urljoin
-import requests
 from bs4 import BeautifulSoup
-import dns.resolver
 import whois
 import ipwhois
 try:
@@ -45,6 +43,9 @@ import os
 import concurrent.futures
 from pathlib import Path
 
+from osint_http import http_session
+from osint_dns import gethostbyname, resolve
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,6 +56,7 @@ class SubdomainEnumerator:
     def __init__(self, timeout: int = 30):
         self.timeout = timeout
         self.found_subdomains = set()
+        self.session = http_session(namespace='subdomains')
         
     def enumerate_subdomains(self, domain: str) -> List[Dict[str, Any]]:
         """Enumera subdominios usando múltiples técnicas"""
@@ -79,13 +81,13 @@ class SubdomainEnumerator:
             """Verifica si un subdominio existe"""
             try:
                 full_domain = f"{subdomain}.{domain}"
-                ip = socket.gethostbyname(full_domain)
+                ip = gethostbyname(full_domain)
                 
                 # Verificar si es accesible vía HTTP/HTTPS
                 urls_to_test = [f"http://{full_domain}", f"https://{full_domain}"]
                 for url in urls_to_test:
                     try:
-                        response = requests.get(url, timeout=5, verify=False)
+                        response = self.session.get(url, timeout=5, verify=False, probe=True)
                         if response.status_code == 200:
                             return {
                                 'subdomain': full_domain,
@@ -173,7 +175,7 @@ class SubdomainEnumerator:
         try:
             # Usar crt.sh API
             url = f"https://crt.sh/?q=%.{domain}&output=json"
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -187,7 +189,7 @@ class SubdomainEnumerator:
                 
                 for subdomain in subdomains:
                     try:
-                        ip = socket.gethostbyname(subdomain)
+                        ip = gethostbyname(subdomain)
                         results.append({
                             'subdomain': subdomain,
                             'ip': ip,
@@ -225,7 +227,7 @@ class SubdomainEnumerator:
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
                 }
                 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
+                response = self.session.get(url, params=params, headers=headers, timeout=10)
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
                 # Extraer URLs de los resultados
@@ -362,10 +364,9 @@ class SocialMediaInvestigator:
     """Investigador de redes sociales"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='social')
     
     def search_username(self, username: str) -> Dict[str, Any]:
         """Busca un username en múltiples plataformas"""
@@ -559,7 +560,7 @@ class WebArchiveSearcher:
     """Buscador en archivos web (Wayback Machine)"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_session(namespace='wayback')
     
     def search_wayback(self, url: str) -> Dict[str, Any]:
         """Busca URL en Wayback Machine"""
@@ -598,7 +599,7 @@ class WebArchiveSearcher:
             try:
                 # Wayback Machine CDX API para obtener snapshots
                 cdx_url = f"https://web.archive.org/cdx/search/cdx?url={url}&output=json&limit=50"
-                response = requests.get(cdx_url, timeout=10)
+                response = self.session.get(cdx_url, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     if len(data) > 1:  # Primera línea son headers
@@ -625,10 +626,9 @@ class TechnologyDetector:
     """Detector de tecnologías web"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='technology')
     
     def detect_technologies(self, url: str) -> Dict[str, Any]:
         """Detecta tecnologías usadas en un sitio web"""
@@ -730,10 +730,9 @@ class CompanyInvestigator:
     """Investigador de información corporativa"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='company')
     
     def investigate_company(self, company_name: str) -> Dict[str, Any]:
         """Investiga información sobre una empresa"""
@@ -984,7 +983,7 @@ class AdvancedOSINTToolkit:
         
         for record_type in record_types:
             try:
-                answers = dns.resolver.resolve(domain, record_type)
+                answers = resolve(domain, record_type)
                 records[record_type] = [str(rdata) for rdata in answers]
             except:
                 records[record_type] = []
@@ -995,7 +994,7 @@ class AdvancedOSINTToolkit:
         """Obtiene información SSL"""
         try:
             context = ssl.create_default_context()
-            with socket.create_connection((domain, 443), timeout=10) as sock:
+            with socket.create_connection((gethostbyname(domain), 443), timeout=10) as sock:
                 with context.wrap_socket(sock, server_hostname=domain) as ssock:
                     cert = ssock.getpeercert()
                     
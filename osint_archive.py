@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Archivo comprimido de resultados antiguos, particionado por fecha
+Cada día es un archivo JSONL comprimido con zstd (o gzip si zstandard no está
+instalado); cada ejecución de la retención añade un nuevo frame al archivo del día
+"""
+
+import configparser
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_CONF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'osint_platform.conf')
+
+DEFAULT_RESULTS_RETENTION_DAYS = 30
+DEFAULT_REPORTS_RETENTION_DAYS = 60
+
+def load_retention_settings(path: str = PLATFORM_CONF_PATH) -> Tuple[int, int]:
+    """Lee (cleanup_old_searches_days, auto_cleanup_days) de la configuración de la plataforma"""
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        results_days = parser.getint('scheduler', 'cleanup_old_searches_days',
+                                     fallback=DEFAULT_RESULTS_RETENTION_DAYS)
+        reports_days = parser.getint('reports', 'auto_cleanup_days',
+                                     fallback=DEFAULT_REPORTS_RETENTION_DAYS)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo retención desde {path}: {e}")
+        return DEFAULT_RESULTS_RETENTION_DAYS, DEFAULT_REPORTS_RETENTION_DAYS
+    return results_days, reports_days
+
+class ResultArchive:
+    """Particiones diarias results-AAAA-MM-DD.jsonl.{zst,gz} en un directorio"""
+
+    PREFIX = 'results-'
+
+    def __init__(self, archive_dir: str = 'data/archive', compression: Optional[str] = None):
+        if compression is None:
+            compression = 'zstd' if ZSTD_AVAILABLE else 'gzip'
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("Compresión 'zstd' no disponible (instale zstandard)")
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.extension = '.jsonl.zst' if compression == 'zstd' else '.jsonl.gz'
+
+    def partition_path(self, day: str, extension: Optional[str] = None) -> str:
+        return os.path.join(self.archive_dir, f'{self.PREFIX}{day}{extension or self.extension}')
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(payload)
+        return gzip.compress(payload, compresslevel=6)
+
+    def append(self, rows: Iterable[Dict[str, Any]], partition_key: str = 'search_timestamp') -> Dict[str, int]:
+        """Añade filas a las particiones de su fecha. Retorna {día: filas escritas}"""
+        by_day: Dict[str, List[str]] = {}
+        for row in rows:
+            day = str(row.get(partition_key) or '')[:10] or date.today().isoformat()
+            by_day.setdefault(day, []).append(json.dumps(row, ensure_ascii=False, default=str))
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        written = {}
+        for day, lines in sorted(by_day.items()):
+            frame = self._compress(('\n'.join(lines) + '\n').encode('utf-8'))
+            with open(self.partition_path(day), 'ab') as f:
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            written[day] = len(lines)
+        return written
+
+    def partitions(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[str, str]]:
+        """Lista (día, ruta) de las particiones existentes dentro del rango, en orden"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        found = []
+        for name in os.listdir(self.archive_dir):
+            if not name.startswith(self.PREFIX):
+                continue
+            day = name[len(self.PREFIX):len(self.PREFIX) + 10]
+            if not (name.endswith('.jsonl.zst') or name.endswith('.jsonl.gz')):
+                continue
+            try:
+                day_date = datetime.strptime(day, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if (start and day_date < start) or (end and day_date > end):
+                continue
+            found.append((day, os.path.join(self.archive_dir, name)))
+        return sorted(found)
+
+    def _open_text(self, path: str) -> io.TextIOBase:
+        if path.endswith('.zst'):
+            if not ZSTD_AVAILABLE:
+                raise ValueError(f"No se puede leer {path}: zstandard no está instalado")
+            raw = open(path, 'rb')
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(reader, encoding='utf-8')
+        return gzip.open(path, 'rt', encoding='utf-8')
+
+    def iter_rows(self, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Recorre las filas archivadas del rango, partición por partición"""
+        for day, path in self.partitions(start, end):
+            # Una ejecución interrumpida puede haber archivado dos veces el mismo enlace
+            seen = set()
+            try:
+                with self._open_text(path) as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        row = json.loads(line)
+                        row_id = row.get('id')
+                        if row_id is not None:
+                            if row_id in seen:
+                                continue
+                            seen.add(row_id)
+                        yield row
+            except (OSError, ValueError, EOFError) as e:
+                logger.error(f"Error leyendo partición archivada {path}: {e}")
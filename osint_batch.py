@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Investigación masiva de objetivos (listas de dominios, correos, NITs)
+Lee un CSV/JSONL/TXT de objetivos, elimina duplicados y los reparte en un pool de
+hilos con un límite global de objetivos por segundo. Cada resultado se agrega a
+results.jsonl en cuanto termina: ese archivo es a la vez la salida y el checkpoint,
+así un lote interrumpido se reanuda sin repetir los objetivos ya investigados.
+La parada se pide con un archivo `stop` en el directorio del lote, visible para el
+proceso que lo ejecute (otro worker del servidor web o la línea de comandos)
+"""
+
+import configparser
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from osint_archive import PLATFORM_CONF_PATH
+from osint_ratelimit import TokenBucket
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de la sección [batch] de config/osint_platform.conf
+DEFAULT_BATCH_SETTINGS: Dict[str, Any] = {
+    'directory': 'exports/batches',
+    'workers': 4,
+    'rate_limit': 1.0,
+    'burst': 2.0,
+    'max_attempts': 2,
+    'max_targets': 10000,
+}
+
+# Columnas (CSV) o claves (JSONL) que se aceptan como objetivo y como tipo
+TARGET_FIELDS = ('target', 'objetivo', 'query', 'value', 'email', 'domain', 'nit')
+TYPE_FIELDS = ('type', 'search_type', 'tipo')
+
+MANIFEST_FILE = 'manifest.json'
+TARGETS_FILE = 'targets.jsonl'
+RESULTS_FILE = 'results.jsonl'
+LOCK_FILE = '.lock'
+STOP_FILE = 'stop'
+
+SearchFunction = Callable[[str, str], Dict[str, Any]]
+ProgressFunction = Callable[..., None]
+
+class BatchError(ValueError):
+    """El archivo de objetivos o el lote no son válidos"""
+
+class BatchLocked(RuntimeError):
+    """Otro proceso o hilo ya está ejecutando el lote"""
+
+def load_batch_settings(path: str = PLATFORM_CONF_PATH) -> Dict[str, Any]:
+    """Lee la sección [batch] de la configuración de la plataforma"""
+    settings = dict(DEFAULT_BATCH_SETTINGS)
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        for key, default in DEFAULT_BATCH_SETTINGS.items():
+            if isinstance(default, str):
+                settings[key] = parser.get('batch', key, fallback=default)
+            else:
+                getter = parser.getint if isinstance(default, int) else parser.getfloat
+                settings[key] = getter('batch', key, fallback=default)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo la sección [batch] desde {path}: {e}")
+    return settings
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+def target_key(target: str, search_type: str = '') -> str:
+    """Clave de deduplicación: mayúsculas, espacios repetidos y punto final no distinguen objetivos"""
+    normalized = ' '.join(target.split()).rstrip('.').casefold()
+    return f"{search_type}:{normalized}" if search_type else normalized
+
+def _pick(row: Dict[str, Any], fields: Tuple[str, ...]) -> str:
+    lowered = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    for field in fields:
+        value = lowered.get(field)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+def parse_targets(text: str, fmt: str = 'txt', default_type: str = '') -> List[Dict[str, str]]:
+    """Objetivos de un CSV (columna target o la primera), JSONL (cadenas u objetos) o TXT (uno por línea)"""
+    fmt = fmt.lower().lstrip('.')
+    rows: List[Tuple[str, str]] = []
+    if fmt in ('jsonl', 'ndjson', 'json'):
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise BatchError(f"Línea {number} no es JSON válido: {e}")
+            if isinstance(item, dict):
+                rows.append((_pick(item, TARGET_FIELDS), _pick(item, TYPE_FIELDS)))
+            else:
+                rows.append((str(item).strip(), ''))
+    elif fmt == 'csv':
+        header = next(csv.reader(io.StringIO(text)), [])
+        fields = [cell.strip().lower() for cell in header]
+        if any(field in TARGET_FIELDS for field in fields):
+            for row in csv.DictReader(io.StringIO(text)):
+                rows.append((_pick(row, TARGET_FIELDS), _pick(row, TYPE_FIELDS)))
+        else:
+            # Sin cabecera reconocible: la primera columna es el objetivo
+            for row in csv.reader(io.StringIO(text)):
+                if row:
+                    rows.append((row[0].strip(), ''))
+    else:
+        for line in text.splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                rows.append((line, ''))
+    return dedupe_targets(rows, default_type)
+
+def dedupe_targets(rows: Iterable[Tuple[str, str]], default_type: str = '') -> List[Dict[str, str]]:
+    """Elimina vacíos y duplicados conservando el orden de aparición"""
+    targets: Dict[str, Dict[str, str]] = {}
+    for target, search_type in rows:
+        if not target:
+            continue
+        search_type = search_type or default_type
+        key = target_key(target, search_type)
+        if key not in targets:
+            targets[key] = {'key': key, 'target': ' '.join(target.split()), 'type': search_type}
+    return list(targets.values())
+
+def read_targets(path: str, default_type: str = '') -> List[Dict[str, str]]:
+    """Objetivos de un archivo; el formato se deduce de la extensión"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        text = f.read()
+    return parse_targets(text, Path(path).suffix or 'txt', default_type)
+
+def batch_id_for(targets: List[Dict[str, str]], owner: Optional[int] = None) -> str:
+    """Id determinista: la misma lista de objetivos del mismo usuario siempre es el mismo lote"""
+    keys = [str(owner)] + [item['key'] for item in targets]
+    digest = hashlib.sha256('\n'.join(keys).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _temp_path(path: Path) -> Path:
+    """Temporal propio de cada hilo y proceso: escrituras simultáneas no se pisan"""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]):
+    temp = _temp_path(path)
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+class BatchStore:
+    """Directorio de lotes: cada lote guarda su manifiesto, sus objetivos y sus resultados"""
+
+    def __init__(self, directory: str = DEFAULT_BATCH_SETTINGS['directory']):
+        self.directory = Path(directory)
+
+    def path(self, batch_id: str) -> Path:
+        if not batch_id.isalnum():
+            raise BatchError(f"Id de lote inválido: {batch_id}")
+        return self.directory / batch_id
+
+    def create(self, targets: List[Dict[str, str]], owner: Optional[int] = None,
+               source: str = '', max_targets: int = 0) -> Dict[str, Any]:
+        """Registra el lote (o retorna el existente si ya se había enviado la misma lista)"""
+        if not targets:
+            raise BatchError("El archivo no contiene objetivos")
+        if max_targets and len(targets) > max_targets:
+            raise BatchError(f"{len(targets)} objetivos; el máximo por lote es {max_targets}")
+
+        batch_id = batch_id_for(targets, owner)
+        batch_dir = self.path(batch_id)
+        existing = self.manifest(batch_id)
+        if existing:
+            return existing
+
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        temp = _temp_path(batch_dir / TARGETS_FILE)
+        with open(temp, 'w', encoding='utf-8') as f:
+            for item in targets:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        os.replace(temp, batch_dir / TARGETS_FILE)
+
+        manifest = {
+            'batch_id': batch_id,
+            'owner': owner,
+            'source': source,
+            'status': 'pending',
+            'total': len(targets),
+            'completed': 0,
+            'failed': 0,
+            'created_at': _now(),
+            'updated_at': _now()
+        }
+        _write_json_atomic(batch_dir / MANIFEST_FILE, manifest)
+        logger.info(f"Lote {batch_id} creado con {len(targets)} objetivos")
+        return manifest
+
+    def manifest(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(batch_id) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def targets(self, batch_id: str) -> List[Dict[str, str]]:
+        with open(self.path(batch_id) / TARGETS_FILE, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def results_path(self, batch_id: str) -> Path:
+        return self.path(batch_id) / RESULTS_FILE
+
+    def is_running(self, batch_id: str) -> bool:
+        """Indica si algún proceso tiene tomado el lock del lote"""
+        lock_path = self.path(batch_id) / LOCK_FILE
+        if not FCNTL_AVAILABLE or not lock_path.exists():
+            return False
+        with open(lock_path, 'a') as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        return False
+
+    def request_stop(self, batch_id: str):
+        """Pide al proceso que ejecuta el lote que no inicie más objetivos"""
+        (self.path(batch_id) / STOP_FILE).touch()
+
+    def stop_requested(self, batch_id: str) -> bool:
+        return (self.path(batch_id) / STOP_FILE).exists()
+
+    def clear_stop(self, batch_id: str):
+        try:
+            (self.path(batch_id) / STOP_FILE).unlink()
+        except FileNotFoundError:
+            pass
+
+    def status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Manifiesto del lote; un lote 'running' sin proceso que lo ejecute quedó interrumpido"""
+        manifest = self.manifest(batch_id)
+        if manifest and manifest.get('status') == 'running' and not self.is_running(batch_id):
+            manifest['status'] = 'interrupted'
+        return manifest
+
+    def list_batches(self, owner: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        batches = [self.status(entry.name) for entry in self.directory.iterdir() if entry.is_dir()]
+        batches = [batch for batch in batches if batch and (owner is None or batch.get('owner') == owner)]
+        return sorted(batches, key=lambda batch: batch.get('created_at', ''), reverse=True)
+
+class BatchRun:
+    """Ejecución (o reanudación) de un lote ya registrado en un BatchStore"""
+
+    def __init__(self, store: BatchStore, batch_id: str, search_fn: SearchFunction, workers: int = 4,
+                 rate_limit: float = 1.0, burst: float = 2.0, max_attempts: int = 2,
+                 stop_event: Optional[threading.Event] = None):
+        self.store = store
+        self.batch_id = batch_id
+        self.batch_dir = store.path(batch_id)
+        self.search_fn = search_fn
+        self.workers = max(1, workers)
+        # Límite global de objetivos iniciados por segundo, compartido por todos los hilos
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.max_attempts = max(1, max_attempts)
+        self.stop_event = stop_event or threading.Event()
+
+        self._write_lock = threading.Lock()
+        self._results_file = None
+        self.counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+
+    def stopping(self) -> bool:
+        """Parada pedida en este proceso (stop) o desde otro (archivo stop del lote)"""
+        if not self.stop_event.is_set() and self.store.stop_requested(self.batch_id):
+            logger.info(f"Lote {self.batch_id}: parada solicitada")
+            self.stop_event.set()
+        return self.stop_event.is_set()
+
+    def checkpoint(self) -> Tuple[Set[str], Dict[str, int]]:
+        """Objetivos terminados y fallos por objetivo según results.jsonl. Una última línea
+        a medio escribir (caída durante la escritura) se descarta truncando el archivo"""
+        done: Set[str] = set()
+        failures: Dict[str, int] = {}
+        path = self.batch_dir / RESULTS_FILE
+        if not path.exists():
+            return done, failures
+
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                valid_size += len(line)
+                if record.get('status') == 'completed':
+                    done.add(record['key'])
+                else:
+                    failures[record['key']] = failures.get(record['key'], 0) + 1
+
+        if valid_size < path.stat().st_size:
+            logger.warning(f"Lote {self.batch_id}: se descarta una línea incompleta de {RESULTS_FILE}")
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+        return done, failures
+
+    def _update_manifest(self, **fields):
+        manifest = self.store.manifest(self.batch_id) or {'batch_id': self.batch_id}
+        manifest.update(fields, updated_at=_now())
+        _write_json_atomic(self.batch_dir / MANIFEST_FILE, manifest)
+
+    def _append(self, record: Dict[str, Any]):
+        """Agrega un resultado y lo lleva a disco antes de darlo por terminado"""
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._write_lock:
+            self._results_file.write(line)
+            self._results_file.flush()
+            os.fsync(self._results_file.fileno())
+
+    def _investigate(self, item: Dict[str, str], attempt: int) -> Dict[str, Any]:
+        record = {'key': item['key'], 'target': item['target'], 'type': item['type'], 'attempt': attempt}
+        start = time.time()
+        try:
+            result = self.search_fn(item['target'], item['type'])
+            record.update(status='completed', result=result)
+        except Exception as e:
+            logger.error(f"Lote {self.batch_id}: error investigando {item['target']}: {e}")
+            record.update(status='failed', error=str(e))
+        record['duration'] = round(time.time() - start, 3)
+        record['finished_at'] = _now()
+        return record
+
+    def run(self, progress: Optional[ProgressFunction] = None) -> Dict[str, Any]:
+        """Investiga los objetivos pendientes y retorna el resumen del lote (BatchLocked si ya corre)"""
+        lock = open(self.batch_dir / LOCK_FILE, 'w')
+        try:
+            if FCNTL_AVAILABLE:
+                try:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise BatchLocked(f"El lote {self.batch_id} ya se está ejecutando")
+            # Una parada pedida a una ejecución anterior no detiene esta
+            self.store.clear_stop(self.batch_id)
+            try:
+                return self._run(progress)
+            finally:
+                self.store.clear_stop(self.batch_id)
+        finally:
+            lock.close()
+
+    def _run(self, progress: Optional[ProgressFunction]) -> Dict[str, Any]:
+        targets = self.store.targets(self.batch_id)
+        done, failures = self.checkpoint()
+        pending = [(item, failures.get(item['key'], 0) + 1) for item in targets
+                   if item['key'] not in done and failures.get(item['key'], 0) < self.max_attempts]
+        total = len(targets)
+        self.counts['skipped'] = len(done)
+        exhausted = sum(1 for item in targets
+                        if item['key'] not in done and failures.get(item['key'], 0) >= self.max_attempts)
+        finished = len(done) + exhausted
+
+        if done or failures:
+            logger.info(f"Lote {self.batch_id}: reanudando, {len(done)} terminados y {len(pending)} pendientes")
+        self._update_manifest(status='running', total=total, started_at=_now())
+        if progress:
+            progress(f"{len(pending)} objetivos pendientes", done=finished, total=total)
+
+        # Ventana acotada de trabajos en vuelo: los miles de objetivos no se encolan de golpe
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def work(item: Dict[str, str], attempt: int):
+            nonlocal finished
+            try:
+                if self.stopping():
+                    return
+                while not self.bucket.acquire(timeout=1.0):
+                    if self.stopping():
+                        return
+                record = self._investigate(item, attempt)
+                self._append(record)
+                with self._write_lock:
+                    self.counts[record['status']] += 1
+                    finished += 1
+                    count = finished
+                if progress:
+                    progress(f"{record['status']}: {item['target']}", done=count, total=total,
+                             results=[{key: record[key] for key in ('target', 'type', 'status', 'attempt')}])
+            finally:
+                slots.release()
+
+        with open(self.batch_dir / RESULTS_FILE, 'a', encoding='utf-8') as results_file:
+            self._results_file = results_file
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='osint-batch') as executor:
+                for item, attempt in pending:
+                    slots.acquire()
+                    if self.stopping():
+                        slots.release()
+                        break
+                    executor.submit(work, item, attempt)
+            self._results_file = None
+
+        done, failures = self.checkpoint()
+        failed = sum(1 for key in failures if key not in done)
+        status = 'cancelled' if self.stop_event.is_set() else 'completed'
+        summary = {
+            'batch_id': self.batch_id,
+            'status': status,
+            'total': total,
+            'completed': len(done),
+            'failed': failed,
+            'remaining': total - len(done) - failed,
+            'run': dict(self.counts),
+            'results_file': str(self.batch_dir / RESULTS_FILE)
+        }
+        self._update_manifest(status=status, completed=len(done), failed=failed, finished_at=_now())
+        logger.info(f"Lote {self.batch_id} {status}: {len(done)} completados, {failed} fallidos de {total}")
+        return summary
+
+    def stop(self):
+        """Deja de iniciar objetivos nuevos; los que están en curso terminan y se guardan"""
+        self.stop_event.set()
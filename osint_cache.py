@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Caché persistente para resultados de motores de búsqueda (SERP)
+Almacena en SQLite con TTL, expulsión por tamaño y stale-while-revalidate
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from osint_sqlite import SQLiteConnectionManager
+
+logger = logging.getLogger(__name__)
+
+class PersistentTTLCache:
+    """Caché clave/valor en SQLite compartida entre usuarios, campañas y procesos"""
+
+    def __init__(self, db_path: str, table: str = 'cache_entries', default_ttl: float = 3600,
+                 stale_ttl: float = 86400, max_entries: int = 50000, negative_ttl: float = 600,
+                 access_interval: float = 60, wait_timeout: float = 60):
+        self.db_path = db_path
+        self.table = table
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        # Segundos entre escrituras de last_access de una misma entrada (los aciertos intermedios
+        # se acumulan en memoria) y espera máxima de una petición coalescida
+        self.access_interval = access_interval
+        self.wait_timeout = wait_timeout
+
+        self._inflight: Dict[str, threading.Event] = {}
+        self._refreshing = set()
+        self._pending_hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self.pool = SQLiteConnectionManager(db_path)
+        self.init_storage()
+
+    def init_storage(self):
+        """Crea la tabla de la caché si no existe"""
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    cache_key TEXT PRIMARY KEY,
+                    namespace TEXT,
+                    label TEXT,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table} (last_access)')
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Genera una clave estable a partir de sus componentes"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Retorna (valor, es_fresco) o None si no existe o ya no es utilizable"""
+        now = time.time()
+        with self.pool.read() as cursor:
+            cursor.execute(
+                f'SELECT value, expires_at, stale_until, last_access FROM {self.table} WHERE cache_key = ?',
+                (key,)
+            )
+            row = cursor.fetchone()
+
+        if not row or row[2] < now:
+            return None
+
+        # Un acierto no abre una transacción de escritura: last_access solo se actualiza si
+        # tiene más de access_interval segundos, junto con los aciertos acumulados desde entonces
+        with self._lock:
+            hits = self._pending_hits.pop(key, 0) + 1
+            if now - row[3] < self.access_interval:
+                self._pending_hits[key] = hits
+                hits = 0
+        if hits:
+            with self.pool.transaction() as cursor:
+                cursor.execute(
+                    f'UPDATE {self.table} SET last_access = ?, hits = hits + ? WHERE cache_key = ?',
+                    (now, hits, key)
+                )
+
+        return json.loads(row[0]), row[1] >= now
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None,
+            namespace: str = '', label: str = ''):
+        """Guarda un valor con su TTL y ventana de stale-while-revalidate"""
+        if ttl is None:
+            ttl = self.default_ttl if value else self.negative_ttl
+        now = time.time()
+
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO {self.table}
+                (cache_key, namespace, label, value, created_at, expires_at, stale_until, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (
+                key, namespace, label, json.dumps(value, ensure_ascii=False, default=str),
+                now, now + ttl, now + ttl + self.stale_ttl, now
+            ))
+
+        with self._lock:
+            self._pending_hits.pop(key, None)
+            self._writes_since_evict += 1
+            should_evict = self._writes_since_evict >= 100
+            if should_evict:
+                self._writes_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Elimina entradas vencidas y las menos usadas si se supera el tamaño máximo"""
+        with self._lock:
+            pending = [(hits, key) for key, hits in self._pending_hits.items()]
+            self._pending_hits.clear()
+        with self.pool.transaction() as cursor:
+            # Los aciertos acumulados en memoria se vuelcan antes de decidir qué expulsar
+            cursor.executemany(f'UPDATE {self.table} SET hits = hits + ? WHERE cache_key = ?', pending)
+            cursor.execute(f'DELETE FROM {self.table} WHERE stale_until < ?', (time.time(),))
+
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            excess = cursor.fetchone()[0] - self.max_entries
+            if excess > 0:
+                # Liberar un 10% adicional para no expulsar en cada escritura
+                excess += self.max_entries // 10
+                cursor.execute(f'''
+                    DELETE FROM {self.table} WHERE cache_key IN (
+                        SELECT cache_key FROM {self.table} ORDER BY last_access ASC LIMIT ?
+                    )
+                ''', (excess,))
+
+    def invalidate(self, key: str):
+        """Elimina una entrada de la caché"""
+        with self._lock:
+            self._pending_hits.pop(key, None)
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE cache_key = ?', (key,))
+
+    def fetch(self, key: str, fetcher: Callable[[], Any], ttl: Optional[float] = None,
+              namespace: str = '', label: str = '',
+              refresher: Optional[Callable[[], Any]] = None) -> Tuple[Any, str]:
+        """Lee a través de la caché. Retorna (valor, estado) con estado 'hit', 'stale' o 'miss'.
+        `refresher` revalida en segundo plano (por defecto el mismo fetcher)"""
+        cached = self.get(key)
+        if cached is not None:
+            value, fresh = cached
+            if fresh:
+                return value, 'hit'
+            self._schedule_refresh(key, refresher or fetcher, ttl, namespace, label)
+            return value, 'stale'
+
+        # Coalescer peticiones concurrentes de la misma clave
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._inflight[key] = event
+
+        if not owner:
+            if not event.wait(self.wait_timeout):
+                # La petición en vuelo no terminó a tiempo: se consulta directamente
+                logger.warning(f"Espera de caché agotada para {label or key}, consultando sin coalescer")
+                return fetcher(), 'miss'
+            cached = self.get(key)
+            if cached is not None:
+                return cached[0], 'hit'
+            # La consulta en vuelo falló: se propaga el mismo error sin repetir la petición
+            error = getattr(event, 'error', None)
+            if error is not None:
+                raise error
+            return fetcher(), 'miss'
+
+        try:
+            value = fetcher()
+        except Exception as e:
+            # Timeouts, bloqueos y errores de parseo no se guardan: solo las respuestas reales
+            event.error = e
+            raise
+        else:
+            self.set(key, value, ttl, namespace, label)
+            return value, 'miss'
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def get_or_fetch(self, key: str, fetcher: Callable[[], Any], ttl: Optional[float] = None,
+                     namespace: str = '', label: str = '') -> Any:
+        """Igual que fetch() pero retorna solo el valor"""
+        return self.fetch(key, fetcher, ttl, namespace, label)[0]
+
+    def _schedule_refresh(self, key: str, fetcher: Callable[[], Any], ttl: Optional[float],
+                          namespace: str, label: str):
+        """Revalida una entrada obsoleta en segundo plano (una sola vez por clave)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = fetcher()
+            except Exception as e:
+                # Se conserva la entrada obsoleta: sigue siendo mejor que una respuesta vacía
+                logger.error(f"Error revalidando entrada de caché {label or key}: {e}")
+            else:
+                self.set(key, value, ttl, namespace, label)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key[:8]}", daemon=True).start()
+
+class SERPCache(PersistentTTLCache):
+    """Caché de páginas de resultados por (motor, consulta normalizada, página, idioma)"""
+
+    def __init__(self, db_path: str = "serp_cache.db", **kwargs):
+        super().__init__(db_path, table='serp_cache', **kwargs)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normaliza la consulta: Unicode NFC, minúsculas y espacios colapsados"""
+        return ' '.join(unicodedata.normalize('NFC', query).casefold().split())
+
+    def serp_key(self, engine: str, query: str, page: int = 1, language: str = '') -> str:
+        return self.make_key(engine, self.normalize_query(query), page, language)
+
+    def fetch_serp(self, engine: str, query: str, fetcher: Callable[[], Any],
+                   page: int = 1, language: str = '') -> Tuple[Any, str]:
+        """Obtiene los resultados de un motor leyendo a través de la caché"""
+        key = self.serp_key(engine, query, page, language)
+        return self.fetch(key, fetcher, namespace=engine, label=self.normalize_query(query))
+
+class SearchResultCache(PersistentTTLCache):
+    """Caché de búsquedas ya procesadas por (consulta normalizada, tipo, dorking), con TTL por tipo"""
+
+    def __init__(self, db_path: str = "serp_cache.db", ttls: Optional[Dict[str, float]] = None, **kwargs):
+        super().__init__(db_path, table='search_cache', **kwargs)
+        self.ttls = dict(ttls or {})
+
+    def ttl_for(self, search_type: str) -> float:
+        return self.ttls.get(search_type, self.default_ttl)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None,
+            namespace: str = '', label: str = ''):
+        # El namespace es el tipo de búsqueda; una búsqueda sin resultados usa el TTL negativo
+        if ttl is None:
+            ttl = self.ttl_for(namespace) if value and value.get('results') else self.negative_ttl
+        super().set(key, value, ttl, namespace, label)
+
+    def fetch_search(self, query: str, search_type: str, enable_dorking: bool, fetcher: Callable[[], Any],
+                     refresher: Optional[Callable[[], Any]] = None) -> Tuple[Any, str]:
+        """Obtiene una búsqueda procesada leyendo a través de la caché"""
+        normalized = SERPCache.normalize_query(query)
+        key = self.make_key('search', normalized, search_type, bool(enable_dorking))
+        return self.fetch(key, fetcher, namespace=search_type, label=normalized, refresher=refresher)
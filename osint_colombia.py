@@ -4,7 +4,6 @@ Módulo OSINT especializado para Colombia
 Incluye fuentes de información gubernamentales, medios de comunicación y bases de datos públicas
 """
 
-import requests
 import json
 import time
 from datetime import datetime
@@ -13,16 +12,18 @@ import re
 from bs4 import BeautifulSoup
 import logging
 
+from osint_keywords import get_classifier
+from osint_http import http_session
+
 class ColombiaOSINT:
     """
     Clase para realizar búsquedas OSINT específicas para Colombia
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }, namespace='media')
         
         # Fuentes gubernamentales colombianas
         self.government_sources = {
@@ -521,21 +522,13 @@ class ColombiaOSINT:
 
     def _analyze_news_risk(self, articles: List[Dict]) -> str:
         """Análisis de riesgo basado en contenido de noticias"""
-        risk_keywords = [
-            'corrupción', 'fraude', 'delito', 'investigación', 'captura',
-            'condena', 'sanción', 'multa', 'proceso judicial', 'demanda',
-            'escándalo', 'irregularidad', 'malversación', 'soborno'
-        ]
-        
-        risk_score = 0
+        classifier = get_classifier('news_risk')
+        risk_score = 0.0
         
         for article in articles:
-            content = article.get('content', '').lower()
-            title = article.get('title', '').lower()
-            
-            for keyword in risk_keywords:
-                if keyword in content or keyword in title:
-                    risk_score += 1
+            # Una sola pasada sobre título y contenido; cada palabra clave cuenta una vez por artículo
+            scores = classifier.score(article.get('title', ''), article.get('content', ''))
+            risk_score += scores.get('risk', 0.0)
                     
         # Normalizar por número de artículos
         if articles:
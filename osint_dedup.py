@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Detección de resultados casi duplicados con huellas SimHash
+Espejos, páginas AMP, noticias sindicadas y redirecciones de cada motor tienen URLs
+distintas pero título y fragmento casi iguales: sus huellas de 64 bits difieren en
+pocos bits. Un índice LSH por bandas encuentra los candidatos sin comparar todos
+contra todos, dentro de una búsqueda y contra los documentos guardados recientemente
+"""
+
+import hashlib
+import sqlite3
+import string
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from osint_keywords import fold_text
+from osint_ranking import STOPWORDS
+from osint_urls import canonicalize_url
+
+FINGERPRINT_BITS = 64
+MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Dos huellas a distancia de Hamming <= 3 coinciden al menos en una de 4 bandas de 16 bits
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+MAX_DISTANCE = 3
+
+# Con menos rasgos la huella no es fiable (textos vacíos colisionarían entre sí)
+MIN_FEATURES = 4
+# Palabras de título + fragmento consideradas por resultado
+MAX_TOKENS = 128
+
+# Días de historial contra los que se comparan los documentos nuevos
+DEFAULT_HISTORY_DAYS = 30
+
+# Peso de cada palabra o par de palabras del texto frente a un segmento de la URL: los
+# espejos y las noticias sindicadas comparten el texto pero no la ruta
+TEXT_WEIGHT = 3
+
+# Nombre del sitio al final del título ("... - El Tiempo", "... | Semana")
+TITLE_SEPARATORS = (' - ', ' | ', ' – ', ' — ', ' · ')
+MAX_SITE_NAME = 40
+
+# Segmentos de ruta que no distinguen el contenido (versiones AMP, móviles, extensiones)
+URL_NOISE = {'amp', 'www', 'm', 'mobile', 'index', 'html', 'htm', 'php', 'aspx', 'jsp'}
+
+# Puntuación a espacios: con el texto ya normalizado, split() separa las palabras
+PUNCTUATION = str.maketrans(dict.fromkeys(string.punctuation + '¿¡«»“”‘’—–…·', ' '))
+
+# Separador de resultados al normalizar el lote entero (split() lo trata como espacio)
+SEPARATOR = '\x1e'
+
+# Constantes de mezcla para el hash de un par de palabras a partir de los de cada una
+PAIR_MULTIPLIER = 0x9E3779B97F4A7C15
+PAIR_MIXER = 0xBF58476D1CE4E5B9
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    """Hash estable de 64 bits (hash() de Python cambia entre procesos)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def _pair_hash(first: int, second: int) -> int:
+    return ((((first * PAIR_MULTIPLIER) & MASK) ^ second) * PAIR_MIXER) & MASK
+
+def strip_site_name(title: str) -> str:
+    """Título sin el nombre del sitio que añaden muchos portales al final"""
+    head, separator, tail = max((title.rpartition(separator) for separator in TITLE_SEPARATORS),
+                                key=lambda parts: len(parts[0]))
+    return head if separator and head and len(tail) <= MAX_SITE_NAME else title
+
+def batch_features(results: Sequence[Dict[str, Any]],
+                   canonicals: Optional[Sequence[str]] = None) -> List[Tuple[List[str], List[str]]]:
+    """Palabras normalizadas de título + fragmento y segmentos de la ruta canónica de cada resultado.
+    Rasgos: cada palabra (salvo las vacías, comunes a casi todos los textos), cada par de palabras
+    consecutivas y cada segmento de la ruta"""
+    # Todo el lote se normaliza de una vez (como en el ranking)
+    values = [f"{strip_site_name(str(result.get('title') or ''))} {result.get('description') or ''}"
+              for result in results]
+    records = fold_text(SEPARATOR.join(values)).translate(PUNCTUATION).split(SEPARATOR)
+    if len(records) != len(results):
+        # Algún texto contenía el separador: se limpia (caso excepcional)
+        records = fold_text(SEPARATOR.join(value.replace(SEPARATOR, ' ') for value in values)) \
+            .translate(PUNCTUATION).split(SEPARATOR)
+
+    if canonicals is None:
+        canonicals = [canonicalize_url(result.get('url', '')) for result in results]
+    features = []
+    for record, canonical in zip(records, canonicals):
+        # https://host/ruta?consulta -> ruta
+        path = canonical.split('/', 3)[3].partition('?')[0].lower().translate(PUNCTUATION).split() \
+            if canonical else []
+        features.append((record.split()[:MAX_TOKENS], [f'url:{token}' for token in path if token not in URL_NOISE]))
+    return features
+
+def _simhash_python(features: List[Tuple[List[str], List[str]]]) -> List[int]:
+    fingerprints = []
+    for tokens, url_tokens in features:
+        hashes = [_feature_hash(token) for token in tokens]
+        weighted = [(_pair_hash(first, second), TEXT_WEIGHT) for first, second in zip(hashes, hashes[1:])]
+        weighted += [(value, TEXT_WEIGHT) for value, token in zip(hashes, tokens) if token not in STOPWORDS]
+        weighted += [(_feature_hash(token), 1) for token in url_tokens]
+        weights = [0] * FINGERPRINT_BITS
+        for value, weight in weighted:
+            for bit in range(FINGERPRINT_BITS):
+                weights[bit] += weight if value >> bit & 1 else -weight
+        fingerprints.append(sum(1 << bit for bit, total in enumerate(weights) if total > 0))
+    return fingerprints
+
+def _bit_counts(hashes, sizes):
+    """Bits a 1 por posición en los hashes de cada resultado (hashes consecutivos por fila)"""
+    # Matriz rellenada (resultado x rasgo) con hash 0, que no suma ningún bit
+    padded = np.zeros((len(sizes), int(sizes.max(initial=0))), dtype='<u8')
+    padded[np.arange(padded.shape[1]) < sizes[:, None]] = hashes
+    bits = np.unpackbits(padded.view(np.uint8).reshape(padded.shape + (8,)), axis=2, bitorder='little')
+    return bits.sum(axis=1, dtype=np.int32)
+
+def _simhash_numpy(features: List[Tuple[List[str], List[str]]]) -> List[int]:
+    # Cada palabra distinta del lote se hashea una vez; los pares se derivan de esos hashes
+    vocabulary: Dict[str, int] = {}
+    for tokens, url_tokens in features:
+        vocabulary.update(dict.fromkeys(tokens))
+        vocabulary.update(dict.fromkeys(url_tokens))
+    table = np.fromiter(map(_feature_hash, vocabulary), dtype=np.uint64, count=len(vocabulary))
+    stopwords = np.fromiter((feature in STOPWORDS for feature in vocabulary), dtype=bool, count=len(vocabulary))
+    vocabulary = {feature: i for i, feature in enumerate(vocabulary)}
+
+    token_sizes = np.fromiter((len(tokens) for tokens, _ in features), dtype=np.int64, count=len(features))
+    url_sizes = np.fromiter((len(url_tokens) for _, url_tokens in features), dtype=np.int64, count=len(features))
+    token_ids = np.fromiter(map(vocabulary.__getitem__, chain.from_iterable(tokens for tokens, _ in features)),
+                            dtype=np.intp, count=int(token_sizes.sum()))
+    url_ids = np.fromiter(map(vocabulary.__getitem__, chain.from_iterable(urls for _, urls in features)),
+                          dtype=np.intp, count=int(url_sizes.sum()))
+
+    token_hashes = table[token_ids]
+    # Pares de palabras consecutivas del mismo resultado
+    rows = np.repeat(np.arange(len(features)), token_sizes)
+    same_row = rows[:-1] == rows[1:]
+    pair_hashes = ((token_hashes[:-1] * np.uint64(PAIR_MULTIPLIER)) ^ token_hashes[1:]) * np.uint64(PAIR_MIXER)
+    pair_sizes = np.maximum(token_sizes - 1, 0)
+    words = ~stopwords[token_ids]
+    word_sizes = np.bincount(rows[words], minlength=len(features))
+
+    counts = (TEXT_WEIGHT * (_bit_counts(token_hashes[words], word_sizes) + _bit_counts(pair_hashes[same_row], pair_sizes))
+              + _bit_counts(table[url_ids], url_sizes))
+    sizes = TEXT_WEIGHT * (word_sizes + pair_sizes) + url_sizes
+    packed = np.packbits(2 * counts > sizes[:, None], axis=1, bitorder='little').view('<u8').ravel()
+    return [int(value) for value in packed]
+
+def simhash_batch(results: Sequence[Dict[str, Any]],
+                  canonicals: Optional[Sequence[str]] = None) -> List[Optional[int]]:
+    """Huella SimHash de cada resultado (None si tiene muy pocos rasgos)"""
+    features = batch_features(results, canonicals)
+    positions = [i for i, (tokens, url_tokens) in enumerate(features)
+                 if max(2 * len(tokens) - 1, 0) + len(url_tokens) >= MIN_FEATURES]
+    fingerprints: List[Optional[int]] = [None] * len(results)
+    if not positions:
+        return fingerprints
+
+    selected = [features[i] for i in positions]
+    values = _simhash_numpy(selected) if NUMPY_AVAILABLE else _simhash_python(selected)
+    for i, value in zip(positions, values):
+        fingerprints[i] = value
+    return fingerprints
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count('1')
+
+def band_buckets(fingerprint: int) -> List[int]:
+    """Claves LSH de una huella: cada banda de 16 bits etiquetada con su número"""
+    mask = (1 << BAND_BITS) - 1
+    return [(band << BAND_BITS) | (fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+def to_signed(fingerprint: int) -> int:
+    """Huella como entero con signo de 64 bits (INTEGER de SQLite)"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+def from_signed(value: int) -> int:
+    return value & MASK
+
+class SimHashIndex:
+    """Índice LSH en memoria: huellas agrupadas por banda"""
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.buckets: Dict[int, List[Any]] = {}
+        self.fingerprints: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.fingerprints
+
+    def add(self, key: Any, fingerprint: int, buckets: Optional[Iterable[int]] = None):
+        """Añade la huella en sus bandas (o solo en `buckets` si ya se conocen)"""
+        self.fingerprints[key] = fingerprint
+        for bucket in band_buckets(fingerprint) if buckets is None else buckets:
+            self.buckets.setdefault(bucket, []).append(key)
+
+    def nearest(self, fingerprint: int) -> Optional[Any]:
+        """Clave más cercana a distancia <= max_distance (None si no hay)"""
+        best, best_distance = None, self.max_distance + 1
+        for bucket in band_buckets(fingerprint):
+            for key in self.buckets.get(bucket, ()):
+                distance = hamming_distance(fingerprint, self.fingerprints[key])
+                if distance < best_distance:
+                    best, best_distance = key, distance
+        return best
+
+def collapse_near_duplicates(results: List[Dict[str, Any]], max_distance: int = MAX_DISTANCE,
+                             canonicals: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Conserva el primer resultado de cada grupo de casi duplicados y anota en él
+    las URLs de los descartados (duplicate_urls). Cada resultado guarda su huella"""
+    fingerprints = simhash_batch(results, canonicals)
+    index = SimHashIndex(max_distance)
+    kept: List[Dict[str, Any]] = []
+    for result, fingerprint in zip(results, fingerprints):
+        if fingerprint is None:
+            kept.append(result)
+            continue
+        match = index.nearest(fingerprint)
+        if match is None:
+            result['simhash'] = fingerprint
+            index.add(len(kept), fingerprint)
+            kept.append(result)
+        elif result.get('url'):
+            kept[match].setdefault('duplicate_urls', []).append(result['url'])
+    return kept
+
+def near_duplicate_matches(cursor: sqlite3.Cursor, keys: List[str], fingerprints: List[Optional[int]],
+                           history_days: int = DEFAULT_HISTORY_DAYS,
+                           max_distance: int = MAX_DISTANCE) -> List[Optional[str]]:
+    """Para cada documento nuevo, la clave de un casi duplicado anterior del mismo lote o visto
+    en los últimos `history_days` días (None si no hay). Solo informa: cada resultado se sigue
+    guardando como su propio documento, con su URL"""
+    unique_keys = list(dict.fromkeys(keys))
+    existing = set()
+    for start in range(0, len(unique_keys), 500):
+        chunk = unique_keys[start:start + 500]
+        cursor.execute(
+            f"SELECT url_hash FROM result_documents WHERE url_hash IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        existing.update(row[0] for row in cursor.fetchall())
+
+    # Candidatos del historial: documentos recientes que comparten alguna banda
+    history = SimHashIndex(max_distance)
+    buckets = list({bucket for key, fingerprint in zip(keys, fingerprints)
+                    if fingerprint is not None and key not in existing
+                    for bucket in band_buckets(fingerprint)})
+    for start in range(0, len(buckets), 500):
+        chunk = buckets[start:start + 500]
+        cursor.execute(f'''
+            SELECT b.bucket, d.url_hash, f.simhash
+            FROM document_simhash_bands b
+            JOIN result_documents d ON d.id = b.document_id
+            JOIN document_fingerprints f ON f.document_id = b.document_id
+            WHERE b.bucket IN ({','.join('?' * len(chunk))}) AND d.last_seen >= datetime('now', ?)
+        ''', chunk + [f'-{int(history_days)} days'])
+        for bucket, url_hash, simhash in cursor.fetchall():
+            history.add(url_hash, from_signed(simhash), (bucket,))
+
+    batch = SimHashIndex(max_distance)
+    matches: List[Optional[str]] = [None] * len(keys)
+    for i, (key, fingerprint) in enumerate(zip(keys, fingerprints)):
+        if fingerprint is None:
+            continue
+        if key not in existing:
+            match = batch.nearest(fingerprint)
+            if match is None:
+                match = history.nearest(fingerprint)
+            if match is not None and match != key:
+                matches[i] = match
+        if key not in batch:
+            batch.add(key, fingerprint)
+    return matches
+
+def index_fingerprints(cursor: sqlite3.Cursor, document_ids: Iterable[int],
+                       fingerprints: Iterable[Optional[int]]):
+    """Registra la huella y las bandas LSH de documentos (conserva la primera huella)"""
+    rows = {}
+    for document_id, fingerprint in zip(document_ids, fingerprints):
+        if fingerprint is not None:
+            rows.setdefault(document_id, fingerprint)
+    if not rows:
+        return
+    cursor.executemany(
+        'INSERT OR IGNORE INTO document_fingerprints (document_id, simhash) VALUES (?, ?)',
+        [(document_id, to_signed(fingerprint)) for document_id, fingerprint in rows.items()]
+    )
+    cursor.executemany(
+        'INSERT OR IGNORE INTO document_simhash_bands (bucket, document_id) VALUES (?, ?)',
+        [(bucket, document_id) for document_id, fingerprint in rows.items()
+         for bucket in band_buckets(fingerprint)]
+    )
+
+def backfill_fingerprints(cursor: sqlite3.Cursor, batch_size: int = 2000):
+    """Calcula las huellas de los documentos que aún no tienen"""
+    last_id = 0
+    while True:
+        cursor.execute('''
+            SELECT id, canonical_url, url, title, description FROM result_documents
+            WHERE id > ? AND id NOT IN (SELECT document_id FROM document_fingerprints)
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        results = [{'url': url, 'title': title, 'description': description}
+                   for _, _, url, title, description in rows]
+        canonicals = [canonical or '' for _, canonical, _, _, _ in rows]
+        index_fingerprints(cursor, [row[0] for row in rows], simhash_batch(results, canonicals))
+        last_id = rows[-1][0]
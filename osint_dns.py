@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Resolución DNS compartida por todos los módulos OSINT
+Caché positiva según el TTL de cada respuesta, caché negativa según el SOA de la
+zona (RFC 2308) y coalescencia de consultas idénticas en vuelo. Los servidores y el
+puerto son configurables, así puede probarse contra un servidor DNS local
+"""
+
+import configparser
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import dns.exception
+import dns.inet
+import dns.rdatatype
+import dns.resolver
+
+from osint_archive import PLATFORM_CONF_PATH
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de la sección [dns] de config/osint_platform.conf
+DEFAULT_DNS_SETTINGS: Dict[str, Any] = {
+    'nameservers': '',
+    'port': 53,
+    'timeout': 3.0,
+    'lifetime': 6.0,
+    'min_ttl': 5.0,
+    'max_ttl': 3600.0,
+    'negative_ttl': 300.0,
+    'failure_ttl': 30.0,
+    'max_entries': 10000,
+}
+
+# Respuestas negativas definitivas (se guardan con el TTL del SOA)
+NEGATIVE_ERRORS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+CacheKey = Tuple[str, str]
+
+def load_dns_settings(path: str = PLATFORM_CONF_PATH) -> Dict[str, Any]:
+    """Lee la sección [dns] de la configuración de la plataforma"""
+    settings = dict(DEFAULT_DNS_SETTINGS)
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        for key, default in DEFAULT_DNS_SETTINGS.items():
+            if isinstance(default, str):
+                settings[key] = parser.get('dns', key, fallback=default)
+            else:
+                getter = parser.getint if isinstance(default, int) else parser.getfloat
+                settings[key] = getter('dns', key, fallback=default)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo la sección [dns] desde {path}: {e}")
+    return settings
+
+def _soa_ttl(response) -> Optional[float]:
+    """TTL negativo de una respuesta: mínimo entre el TTL del SOA y su campo minimum"""
+    if response is None:
+        return None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return float(min(rrset.ttl, rrset[0].minimum))
+    return None
+
+def _fresh_exception(error: Exception) -> Exception:
+    """Copia de una excepción guardada en la caché: cada hit lanza un objeto propio, así el
+    traceback no crece con cada raise ni se comparte entre hilos"""
+    clone = type(error).__new__(type(error), *error.args)
+    clone.__dict__.update(error.__dict__)
+    return clone
+
+class CachingResolver:
+    """Resolver con caché LRU por (nombre, tipo) compartido entre hilos"""
+
+    def __init__(self, nameservers: Optional[List[str]] = None, port: int = 53, timeout: float = 3.0,
+                 lifetime: float = 6.0, min_ttl: float = 5.0, max_ttl: float = 3600.0,
+                 negative_ttl: float = 300.0, failure_ttl: float = 30.0, max_entries: int = 10000):
+        self.resolver = dns.resolver.Resolver(configure=not nameservers)
+        if nameservers:
+            self.resolver.nameservers = list(nameservers)
+        self.resolver.port = port
+        self.resolver.timeout = timeout
+        self.resolver.lifetime = lifetime
+
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+
+        # clave -> (vence, rdatas o excepción)
+        self._cache: 'OrderedDict[CacheKey, Tuple[float, Any]]' = OrderedDict()
+        self._inflight: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'coalesced': 0, 'queries': 0}
+
+    @staticmethod
+    def _key(name: str, rdtype: str) -> CacheKey:
+        return name.strip().rstrip('.').lower(), rdtype.upper()
+
+    def _cached(self, key: CacheKey) -> Optional[Any]:
+        """Valor vigente de la caché (llamar con el lock tomado)"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: CacheKey, value: Any, ttl: float):
+        if isinstance(value, Exception):
+            # Sin los frames de la consulta original: la entrada vive todo el TTL
+            value.__traceback__ = None
+            value.__context__ = None
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _query(self, key: CacheKey):
+        """Consulta al servidor y guarda la respuesta (o el error) con su TTL"""
+        name, rdtype = key
+        with self._lock:
+            self.stats['queries'] += 1
+        try:
+            answer = self.resolver.resolve(name, rdtype, search=False)
+        except dns.resolver.NXDOMAIN as e:
+            ttls = [_soa_ttl(response) for response in e.responses().values()]
+            ttl = min((value for value in ttls if value is not None), default=self.negative_ttl)
+            self._store(key, e, min(ttl, self.negative_ttl))
+            return
+        except dns.resolver.NoAnswer as e:
+            ttl = _soa_ttl(e.kwargs.get('response'))
+            self._store(key, e, min(ttl if ttl is not None else self.negative_ttl, self.negative_ttl))
+            return
+        except dns.exception.DNSException as e:
+            # SERVFAIL, timeouts: se guardan poco tiempo para no martillar un servidor caído
+            self._store(key, e, self.failure_ttl)
+            return
+
+        # expiration ya es el mínimo TTL de toda la cadena de CNAME
+        ttl = min(self.max_ttl, max(self.min_ttl, answer.expiration - time.time()))
+        self._store(key, tuple(answer), ttl)
+
+    def resolve(self, name: str, rdtype: str = 'A') -> Tuple[Any, ...]:
+        """Registros de `name` (rdatas de dnspython); lanza las mismas excepciones que dns.resolver"""
+        key = self._key(name, rdtype)
+        while True:
+            with self._lock:
+                value = self._cached(key)
+                if value is None:
+                    event = self._inflight.get(key)
+                    owner = event is None
+                    if owner:
+                        event = threading.Event()
+                        self._inflight[key] = event
+                        self.stats['misses'] += 1
+                    else:
+                        self.stats['coalesced'] += 1
+                elif isinstance(value, Exception):
+                    self.stats['negative_hits'] += 1
+                else:
+                    self.stats['hits'] += 1
+
+            if value is not None:
+                if isinstance(value, Exception):
+                    raise _fresh_exception(value)
+                return value
+
+            if not owner:
+                # Otra consulta idéntica está en vuelo: se espera su resultado
+                event.wait(self.resolver.lifetime + 1)
+                continue
+
+            try:
+                self._query(key)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    def gethostbyname(self, name: str) -> str:
+        """Primera dirección IPv4 de `name`, como socket.gethostbyname (socket.gaierror si no hay)"""
+        if dns.inet.is_address(name):
+            return name
+        try:
+            return str(self.resolve(name, 'A')[0])
+        except NEGATIVE_ERRORS as e:
+            # localhost y los nombres de /etc/hosts no existen en DNS: se consulta al sistema
+            address = self._system_lookup(name)
+            if address:
+                return address
+            raise socket.gaierror(socket.EAI_NONAME, f"{name}: {e}") from None
+        except dns.exception.DNSException as e:
+            raise socket.gaierror(socket.EAI_NONAME, f"{name}: {e}") from None
+
+    def _system_lookup(self, name: str) -> str:
+        """Dirección IPv4 según el resolver del sistema (hosts, nsswitch), cacheada con el TTL negativo"""
+        key = (self._key(name, 'A')[0], 'SYSTEM')
+        with self._lock:
+            cached = self._cached(key)
+        if cached is not None:
+            return cached[0] if cached else ''
+        try:
+            infos = socket.getaddrinfo(name, None, socket.AF_INET, socket.SOCK_STREAM)
+            address = infos[0][4][0] if infos else ''
+        except (socket.gaierror, UnicodeError):
+            address = ''
+        self._store(key, (address,) if address else (), self.negative_ttl)
+        return address
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+_resolver: Optional[CachingResolver] = None
+_resolver_pid: Optional[int] = None
+_resolver_lock = threading.Lock()
+
+def get_resolver() -> CachingResolver:
+    """Resolver del proceso, creado bajo demanda según la sección [dns]"""
+    global _resolver, _resolver_pid
+    if _resolver is None or _resolver_pid != os.getpid():
+        with _resolver_lock:
+            if _resolver is None or _resolver_pid != os.getpid():
+                settings = load_dns_settings()
+                nameservers = [server.strip() for server in settings.pop('nameservers').split(',') if server.strip()]
+                _resolver = CachingResolver(nameservers or None, **settings)
+                _resolver_pid = os.getpid()
+    return _resolver
+
+def resolve(name: str, rdtype: str = 'A') -> Tuple[Any, ...]:
+    """Reemplazo con caché de dns.resolver.resolve"""
+    return get_resolver().resolve(name, rdtype)
+
+def gethostbyname(name: str) -> str:
+    """Reemplazo con caché de socket.gethostbyname"""
+    return get_resolver().gethostbyname(name)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Registro de motores de búsqueda como plugins
+Cada motor declara su URL y parámetros, su ritmo y coste por petición y cómo
+reconocer un bloqueo (CAPTCHA, 429). El registro lleva estadísticas móviles por
+motor (latencia, páginas con resultados, bloqueos) y ordena los motores por
+resultados esperados por segundo de presupuesto, omitiendo los bloqueados
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
+
+from osint_serp import get_extractor
+
+logger = logging.getLogger(__name__)
+
+# Estados HTTP con los que un motor rechaza peticiones automatizadas
+BLOCK_STATUSES = (403, 429, 503)
+
+class EngineBlockedError(RuntimeError):
+    """El motor respondió con un bloqueo (CAPTCHA o límite de peticiones)"""
+
+class SearchEngine:
+    """Plugin base: construye la petición, detecta bloqueos y extrae resultados"""
+
+    name = ''
+    search_url = ''
+    count_param: Optional[str] = None
+    extra_params: Dict[str, str] = {}
+    language = ''
+    # Peticiones por segundo y ráfaga del token bucket; coste relativo de cada petición
+    rate_limit = 1.0
+    burst: Optional[float] = None
+    cost = 1.0
+    # Admite operadores de dorking (site:, filetype:, inurl:...)
+    supports_dorks = True
+    # Marcas de bloqueo en la URL final y en el HTML (en minúsculas)
+    block_url_markers: Tuple[str, ...] = ()
+    block_text_markers: Tuple[str, ...] = ()
+
+    def build_params(self, query: str, limit: int) -> Dict[str, Any]:
+        params: Dict[str, Any] = {'q': query}
+        if self.count_param:
+            params[self.count_param] = limit
+        params.update(self.extra_params)
+        return params
+
+    def is_blocked(self, response) -> bool:
+        """Indica si la respuesta es un bloqueo en lugar de una página de resultados"""
+        if response.status_code in BLOCK_STATUSES:
+            return True
+        url = (response.url or '').lower()
+        if any(marker in url for marker in self.block_url_markers):
+            return True
+        # Las páginas de bloqueo son cortas: basta revisar el inicio del documento
+        head = response.text[:20000].lower()
+        return any(marker in head for marker in self.block_text_markers)
+
+    def extract(self, html: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        return get_extractor(self.name).extract(html, limit=limit)
+
+class GoogleEngine(SearchEngine):
+    name = 'google'
+    search_url = 'https://www.google.com/search'
+    count_param = 'num'
+    extra_params = {'hl': 'es'}
+    language = 'es'
+    rate_limit = 0.5
+    cost = 2.0
+    block_url_markers = ('/sorry/',)
+    block_text_markers = ('g-recaptcha', 'unusual traffic', 'tráfico inusual')
+
+class BingEngine(SearchEngine):
+    name = 'bing'
+    search_url = 'https://www.bing.com/search'
+    count_param = 'count'
+    rate_limit = 1.0
+    block_text_markers = ('/turing/captcha',)
+
+class DuckDuckGoEngine(SearchEngine):
+    name = 'duckduckgo'
+    search_url = 'https://duckduckgo.com/html'
+    rate_limit = 1.0
+    supports_dorks = False
+    block_text_markers = ('anomaly-modal', 'bots use duckduckgo too')
+
+_ENGINES: Dict[str, Type[SearchEngine]] = {}
+_instances: Dict[str, SearchEngine] = {}
+
+def register_engine(engine_cls: Type[SearchEngine]):
+    """Registra (o reemplaza) el plugin de un motor"""
+    _ENGINES[engine_cls.name] = engine_cls
+    _instances.pop(engine_cls.name, None)
+
+def get_engine(name: str) -> SearchEngine:
+    """Obtiene la instancia compartida del plugin de un motor"""
+    engine = _instances.get(name)
+    if engine is None:
+        if name not in _ENGINES:
+            raise KeyError(f"No hay plugin registrado para el motor: {name}")
+        engine = _ENGINES[name]()
+        _instances[name] = engine
+    return engine
+
+def available_engines() -> List[str]:
+    return list(_ENGINES.keys())
+
+def engine_rate_limits() -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Ritmos y ráfagas declarados por los plugins (la configuración puede sobrescribirlos)"""
+    rates = {name: cls.rate_limit for name, cls in _ENGINES.items()}
+    bursts = {name: cls.burst for name, cls in _ENGINES.items() if cls.burst is not None}
+    return rates, bursts
+
+class EngineStats:
+    """Ventana móvil de las últimas peticiones reales a un motor"""
+
+    def __init__(self, window: int = 50, max_age: float = 1800.0):
+        # (momento, latencia_ms, resultados, bloqueado, error)
+        self.samples: Deque[Tuple[float, float, int, bool, bool]] = deque(maxlen=window)
+        self.max_age = max_age
+        self.consecutive_blocks = 0
+        self.blocked_until = 0.0
+        self.last_probe = 0.0
+        self.skipped = 0
+        self.probes = 0
+
+    def expire(self):
+        """Descarta las muestras más antiguas que max_age: un motor degradado se recupera con el tiempo"""
+        cutoff = time.monotonic() - self.max_age
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def summary(self) -> Dict[str, Any]:
+        self.expire()
+        count = len(self.samples)
+        latencies = sorted(sample[1] for sample in self.samples)
+        answered = [sample for sample in self.samples if not sample[3] and not sample[4]]
+        return {
+            'requests': count,
+            'latency_ms': round(sum(latencies) / count, 1) if count else 0.0,
+            'p50_ms': latencies[count // 2] if count else 0.0,
+            'yield_rate': round(sum(1 for sample in answered if sample[2] > 0) / count, 3) if count else 0.0,
+            'avg_results': round(sum(sample[2] for sample in answered) / count, 2) if count else 0.0,
+            'block_rate': round(sum(1 for sample in self.samples if sample[3]) / count, 3) if count else 0.0,
+            'error_rate': round(sum(1 for sample in self.samples if sample[4]) / count, 3) if count else 0.0,
+            'consecutive_blocks': self.consecutive_blocks,
+            'skipped': self.skipped,
+            'probes': self.probes
+        }
+
+class EngineRegistry:
+    """Estadísticas en vivo por motor y selección adaptativa de los motores a consultar.
+    Los motores degradados no se consultan salvo una petición de prueba cada `probe_interval`
+    segundos; sus muestras caducan tras `max_age` segundos, así pueden recuperarse.
+    Con shared_pool, las pausas por bloqueo se publican en la tabla engine_blocks y las ven
+    todos los procesos del servidor"""
+
+    # Segundos entre lecturas de engine_blocks por motor
+    SHARED_CHECK_INTERVAL = 1.0
+
+    def __init__(self, window: int = 50, min_samples: int = 5, block_threshold: float = 0.3,
+                 min_yield: float = 0.1, cooldown: float = 300.0, max_cooldown: float = 3600.0,
+                 probe_interval: float = 60.0, max_age: float = 1800.0, shared_pool=None):
+        self.window = window
+        self.shared_pool = shared_pool
+        self._shared_checked: Dict[str, float] = {}
+        self.probe_interval = probe_interval
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.block_threshold = block_threshold
+        self.min_yield = min_yield
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._stats: Dict[str, EngineStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> EngineStats:
+        """Estadísticas del motor (llamar con el lock tomado)"""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = EngineStats(self.window, self.max_age)
+        return stats
+
+    def record(self, name: str, latency_ms: float, results: int, blocked: bool = False, error: bool = False):
+        """Registra una petición real; cada bloqueo seguido duplica la pausa del motor"""
+        with self._lock:
+            stats = self._get(name)
+            stats.samples.append((time.monotonic(), latency_ms, results, blocked, error))
+            if not blocked:
+                stats.consecutive_blocks = 0
+                return
+            stats.consecutive_blocks += 1
+            pause = min(self.max_cooldown, self.cooldown * 2 ** (stats.consecutive_blocks - 1))
+            stats.blocked_until = time.monotonic() + pause
+            logger.warning(f"Motor {name} bloqueado ({stats.consecutive_blocks} seguidos), en pausa {pause:.0f}s")
+        self._publish_block(name, time.time() + pause)
+
+    def _publish_block(self, name: str, until: float):
+        """Publica la pausa para los demás procesos (se conserva la más larga)"""
+        if self.shared_pool is None:
+            return
+        try:
+            with self.shared_pool.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO engine_blocks (engine, blocked_until) VALUES (?, ?)
+                    ON CONFLICT (engine) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until)
+                ''', (name, until))
+        except Exception as e:
+            logger.error(f"Error publicando la pausa del motor {name}: {e}")
+
+    def _sync_block(self, name: str):
+        """Adopta la pausa publicada por otro proceso (como mucho una lectura por segundo y motor)"""
+        now = time.monotonic()
+        if self.shared_pool is None or now - self._shared_checked.get(name, 0.0) < self.SHARED_CHECK_INTERVAL:
+            return
+        self._shared_checked[name] = now
+        try:
+            rows = self.shared_pool.execute('SELECT blocked_until FROM engine_blocks WHERE engine = ?', (name,))
+        except Exception as e:
+            logger.error(f"Error leyendo la pausa del motor {name}: {e}")
+            return
+        if rows:
+            until = now + (rows[0][0] - time.time())
+            with self._lock:
+                stats = self._get(name)
+                stats.blocked_until = max(stats.blocked_until, until)
+
+    def status(self, name: str) -> str:
+        """'cooling_down' (en pausa tras un bloqueo, aquí o en otro proceso), 'degraded' o 'healthy'"""
+        self._sync_block(name)
+        with self._lock:
+            stats = self._get(name)
+            if stats.blocked_until > time.monotonic():
+                return 'cooling_down'
+            summary = stats.summary()
+            if summary['requests'] < self.min_samples:
+                return 'healthy'
+
+        if summary['block_rate'] >= self.block_threshold or summary['yield_rate'] < self.min_yield:
+            return 'degraded'
+        return 'healthy'
+
+    def score(self, name: str) -> float:
+        """Resultados esperados por segundo de presupuesto (latencia + espera del bucket) y coste"""
+        engine = get_engine(name)
+        with self._lock:
+            summary = self._get(name).summary()
+            if summary['requests'] < self.min_samples:
+                summary = None
+        if summary is None:
+            # Pocos datos: estimación optimista para que los motores nuevos se exploren
+            yield_rate, latency_s = 1.0, 1.0
+        else:
+            # Los bloqueos y errores cuentan como peticiones sin resultados
+            yield_rate = summary['yield_rate']
+            latency_s = summary['latency_ms'] / 1000.0
+        seconds = latency_s + 1.0 / engine.rate_limit
+        return yield_rate / (seconds * engine.cost)
+
+    def select(self, names: List[str], limit: int = 0, probe: bool = True) -> List[str]:
+        """Motores a consultar, del más al menos rentable. Omite los que están en pausa y los
+        degradados; a estos se les concede una petición de prueba cada probe_interval (probe=False
+        solo consulta la selección, sin gastar pruebas). limit > 0 consulta solo los `limit`
+        mejores sanos. Si no queda ninguno sano se usa el mejor degradado"""
+        healthy: List[Tuple[float, str]] = []
+        degraded: List[Tuple[float, str]] = []
+        probes: List[str] = []
+        now = time.monotonic()
+        for name in dict.fromkeys(names):
+            if name not in _ENGINES:
+                continue
+            status = self.status(name)
+            if status == 'healthy':
+                healthy.append((-self.score(name), name))
+                continue
+            with self._lock:
+                stats = self._get(name)
+                if status == 'degraded' and now - stats.last_probe >= self.probe_interval:
+                    if probe:
+                        stats.last_probe = now
+                        stats.probes += 1
+                    probes.append(name)
+                    continue
+                stats.skipped += 1
+            if status == 'degraded':
+                degraded.append((-self.score(name), name))
+
+        selected = [name for _, name in sorted(healthy)]
+        if limit > 0:
+            selected = selected[:limit]
+        if not selected and not probes and degraded:
+            selected = [min(degraded)[1]]
+        return selected + probes
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Estado, puntuación y estadísticas de cada motor registrado"""
+        snapshot = {}
+        for name in available_engines():
+            with self._lock:
+                summary = self._get(name).summary()
+            summary['status'] = self.status(name)
+            summary['score'] = round(self.score(name), 4)
+            snapshot[name] = summary
+        return snapshot
+
+register_engine(GoogleEngine)
+register_engine(BingEngine)
+register_engine(DuckDuckGoEngine)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Exportación en streaming de resultados OSINT
+Los codificadores consumen un iterador de filas y producen fragmentos de texto,
+de modo que la memoria no depende del número de resultados exportados
+"""
+
+import csv
+import html
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+EXPORT_FIELDS: List[str] = [
+    'timestamp', 'query', 'search_type', 'source', 'title', 'url',
+    'description', 'relevance_score', 'risk_level'
+]
+
+CHUNK_SIZE = 64 * 1024
+
+def iter_csv(rows: Iterable[Dict[str, Any]], fields: List[str] = EXPORT_FIELDS) -> Iterator[str]:
+    """CSV con cabecera, en fragmentos de ~64 KB"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_jsonl(rows: Iterable[Dict[str, Any]], fields: List[str] = EXPORT_FIELDS) -> Iterator[str]:
+    """Un objeto JSON por línea"""
+    chunk = []
+    size = 0
+    for row in rows:
+        line = json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False, default=str) + '\n'
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+def iter_html_report(rows: Iterable[Dict[str, Any]], fields: List[str] = EXPORT_FIELDS,
+                     title: str = 'Resultados OSINT') -> Iterator[str]:
+    """Reporte HTML con una tabla que se emite fila a fila"""
+    yield (
+        '<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="UTF-8">\n'
+        f'<title>{html.escape(title)}</title>\n'
+        '<style>body{font-family:Segoe UI,Arial,sans-serif;margin:20px}'
+        'table{border-collapse:collapse;width:100%;font-size:13px}'
+        'th,td{border:1px solid #dee2e6;padding:6px;text-align:left;vertical-align:top}'
+        'th{background:#343a40;color:#fff}tr.high{background:#f8d7da}tr.medium{background:#fff3cd}</style>\n'
+        f'</head>\n<body>\n<h1>{html.escape(title)}</h1>\n'
+        f'<p>Generado: {datetime.now().strftime("%d/%m/%Y %H:%M")}</p>\n<table>\n<tr>'
+        + ''.join(f'<th>{html.escape(field)}</th>' for field in fields) + '</tr>\n'
+    )
+
+    chunk = []
+    size = 0
+    count = 0
+    for row in rows:
+        risk = html.escape(str(row.get('risk_level') or ''))
+        cells = []
+        for field in fields:
+            value = html.escape(str(row.get(field) if row.get(field) is not None else ''))
+            if field == 'url' and value.startswith(('http://', 'https://')):
+                value = f'<a href="{value}" rel="noopener noreferrer">{value}</a>'
+            cells.append(f'<td>{value}</td>')
+        line = f'<tr class="{risk}">' + ''.join(cells) + '</tr>\n'
+        chunk.append(line)
+        size += len(line)
+        count += 1
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+    yield f'</table>\n<p>Total de resultados: {count}</p>\n</body>\n</html>\n'
+
+EXPORT_FORMATS: Dict[str, Tuple[Callable[..., Iterator[str]], str, str]] = {
+    'csv': (iter_csv, 'text/csv', 'csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson', 'jsonl'),
+    'html': (iter_html_report, 'text/html', 'html'),
+}
+
+def stream_export(rows: Iterable[Dict[str, Any]], fmt: str, **kwargs) -> Iterator[str]:
+    """Codifica las filas en el formato indicado ('csv', 'jsonl' o 'html')"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+    return EXPORT_FORMATS[fmt][0](rows, **kwargs)
+
+def write_export(path: str, rows: Iterable[Dict[str, Any]], fmt: Optional[str] = None, **kwargs) -> int:
+    """Escribe la exportación en un archivo. Retorna los bytes escritos"""
+    fmt = fmt or path.rsplit('.', 1)[-1].lower()
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in stream_export(rows, fmt, **kwargs):
+            f.write(chunk)
+            written += len(chunk.encode('utf-8'))
+    return written
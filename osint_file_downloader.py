@@ -5,7 +5,6 @@ Descarga archivos importantes encontrados durante las búsquedas
 """
 
 import os
-import requests
 import hashlib
 import mimetypes
 import asyncio
@@ -20,6 +19,9 @@ import logging
 from datetime import datetime
 import json
 
+from osint_keywords import get_classifier
+from osint_http import http_session
+
 logger = logging.getLogger(__name__)
 
 class OSINTFileDownloader:
@@ -41,6 +43,9 @@ class OSINTFileDownloader:
             'certificates': ['.crt', '.cer', '.pem', '.key', '.p12', '.pfx'],
             'logs': ['.log', '.logs', '.access', '.error']
         }
+        self._important_suffixes = tuple(
+            ext for extensions in self.important_extensions.values() for ext in extensions
+        )
         
         # MIME types importantes
         self.important_mime_types = [
@@ -68,6 +73,7 @@ class OSINTFileDownloader:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         }
+        self.session = http_session(self.headers, namespace='downloads')
     
     def is_important_file(self, url: str, content_type: Optional[str] = None) -> bool:
         """Determina si un archivo es importante para OSINT"""
@@ -76,23 +82,15 @@ class OSINTFileDownloader:
             path = unquote(parsed.path.lower())
             
             # Verificar extensión
-            for category, extensions in self.important_extensions.items():
-                if any(path.endswith(ext) for ext in extensions):
-                    return True
+            if path.endswith(self._important_suffixes):
+                return True
             
             # Verificar MIME type
             if content_type and content_type.lower() in self.important_mime_types:
                 return True
                 
             # Verificar patrones específicos en la URL
-            important_patterns = [
-                'backup', 'dump', 'export', 'config', 'database', 'db',
-                'admin', 'private', 'secret', 'confidential', 'internal',
-                'password', 'passwd', 'credentials', 'key', 'token',
-                'report', 'document', 'file', 'download', 'attachment'
-            ]
-            
-            if any(pattern in path for pattern in important_patterns):
+            if get_classifier('file_patterns').has_match(path, 'important'):
                 return True
                 
             return False
@@ -112,7 +110,7 @@ class OSINTFileDownloader:
             download_path.mkdir(parents=True, exist_ok=True)
             
             # Realizar petición HEAD para obtener información del archivo
-            response = requests.head(url, headers=self.headers, timeout=10, allow_redirects=True)
+            response = self.session.head(url, timeout=10, allow_redirects=True)
             
             # Verificar tamaño del archivo
             content_length = response.headers.get('content-length')
@@ -127,7 +125,7 @@ class OSINTFileDownloader:
             file_path = download_path / filename
             
             # Descargar archivo
-            response = requests.get(url, headers=self.headers, stream=True, timeout=30)
+            response = self.session.get(url, stream=True, timeout=30)
             response.raise_for_status()
             
             total_size = 0
@@ -412,7 +410,7 @@ class OSINTFileDownloader:
             path = parsed.path.lower()
             
             # Verificar que tenga extensión de archivo
-            if not any(path.endswith(ext) for category in self.important_extensions.values() for ext in category):
+            if not path.endswith(self._important_suffixes):
                 return False
             
             # Excluir URLs problemáticas
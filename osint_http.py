@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP compartido por todos los módulos OSINT
+Una sola sesión con pool de conexiones por host (reutiliza TCP/TLS entre módulos),
+reintentos con backoff, límite de peticiones simultáneas y circuit breaker por host,
+timeouts por defecto consistentes y caché HTTP en disco (osint_httpcache)
+"""
+
+import configparser
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from osint_archive import PLATFORM_CONF_PATH
+from osint_httpcache import HTTPCache, build_http_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Valores por defecto de la sección [http] de config/osint_platform.conf
+DEFAULT_HTTP_SETTINGS: Dict[str, float] = {
+    'pool_connections': 64,
+    'pool_maxsize': 16,
+    'max_retries': 2,
+    'backoff_factor': 0.5,
+    'per_host_limit': 8,
+    'failure_threshold': 5,
+    'reset_timeout': 60.0,
+    'connect_timeout': 5.0,
+    'read_timeout': 15.0,
+}
+
+# 429 no se reintenta: los motores lo controlan con sus token buckets (osint_ratelimit)
+RETRY_STATUSES = (500, 502, 503, 504)
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+Timeout = Union[float, Tuple[float, float]]
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El host falló repetidamente y sus peticiones se rechazan hasta que se recupere"""
+
+def load_http_settings(path: str = PLATFORM_CONF_PATH) -> Dict[str, float]:
+    """Lee la sección [http] de la configuración de la plataforma"""
+    settings = dict(DEFAULT_HTTP_SETTINGS)
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        for key, default in DEFAULT_HTTP_SETTINGS.items():
+            getter = parser.getint if isinstance(default, int) else parser.getfloat
+            settings[key] = getter('http', key, fallback=default)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo la sección [http] desde {path}: {e}")
+    return settings
+
+class CircuitBreaker:
+    """Abre el circuito tras `failure_threshold` fallos seguidos; tras `reset_timeout`
+    segundos deja pasar una petición de prueba (semiabierto) que lo cierra o lo reabre"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return 'open'
+            return 'half_open'
+
+    def allow(self) -> bool:
+        """Indica si se puede hacer una petición al host"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            # Un fallo de la petición de prueba reabre el circuito de inmediato
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+class HostState:
+    """Límite de concurrencia, circuit breaker y contadores de un host"""
+
+    def __init__(self, limit: int, failure_threshold: int, reset_timeout: float):
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+
+class HTTPClient:
+    """Sesión HTTP compartida con pool de conexiones, reintentos y protección por host"""
+
+    def __init__(self, settings: Optional[Dict[str, float]] = None, cache: Optional[HTTPCache] = None):
+        self.settings = dict(DEFAULT_HTTP_SETTINGS, **(settings or {}))
+        self.cache = cache
+        self.timeout: Tuple[float, float] = (self.settings['connect_timeout'], self.settings['read_timeout'])
+        retry = Retry(
+            total=int(self.settings['max_retries']),
+            backoff_factor=self.settings['backoff_factor'],
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.session = self._build_session(retry)
+        # Sondeos (fuerza bruta de subdominios, IPs): un host inexistente no merece reintentos
+        self.probe_session = self._build_session(Retry(total=0, raise_on_status=False))
+
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _build_session(self, retry: Retry) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=int(self.settings['pool_connections']),
+            pool_maxsize=int(self.settings['pool_maxsize']),
+            max_retries=retry
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = DEFAULT_USER_AGENT
+        return session
+
+    def _host(self, url: str) -> Tuple[str, HostState]:
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = HostState(int(self.settings['per_host_limit']), int(self.settings['failure_threshold']),
+                                  self.settings['reset_timeout'])
+                self._hosts[host] = state
+        return host, state
+
+    def request(self, method: str, url: str, timeout: Optional[Timeout] = None, probe: bool = False,
+                namespace: str = '', use_cache: bool = True, **kwargs) -> requests.Response:
+        """Petición HTTP a través de la caché (CircuitOpenError si el host tiene el circuito abierto)"""
+        cacheable = (self.cache is not None and use_cache and method.upper() == 'GET'
+                     and not probe and not kwargs.get('stream'))
+        if not cacheable:
+            return self._send(method, url, timeout, probe, **kwargs)
+
+        # La clave es la URL final, con los parámetros ya codificados
+        url = requests.Request(method, url, params=kwargs.pop('params', None)).prepare().url
+        headers = CaseInsensitiveDict(self.session.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        entry = self.cache.lookup(url, headers)
+        if entry and entry['fresh']:
+            cached = self.cache.response(entry)
+            if cached is not None:
+                return cached
+        if entry is None:
+            self.cache.record_miss()
+
+        request_headers = CaseInsensitiveDict(headers)
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        try:
+            response = self._send(method, url, timeout, probe, headers=request_headers, **kwargs)
+        except requests.RequestException:
+            # Origen caído o circuito abierto: se sirve la copia obsoleta si lo permite
+            stale = self.cache.response(entry, 'stale') if entry and self.cache.can_serve_stale(entry) else None
+            if stale is None:
+                raise
+            return stale
+
+        if entry and response.status_code == 304:
+            self.cache.refresh(entry, response, namespace)
+            revalidated = self.cache.response(entry, 'revalidated')
+            if revalidated is not None:
+                return revalidated
+            # El cuerpo desapareció del disco: se repite sin condiciones
+            response = self._send(method, url, timeout, probe, headers=headers, **kwargs)
+        elif entry and response.status_code >= 500 and self.cache.can_serve_stale(entry):
+            stale = self.cache.response(entry, 'stale')
+            if stale is not None:
+                return stale
+
+        try:
+            self.cache.store(url, headers, response, namespace)
+        except Exception as e:
+            logger.error(f"Error guardando {url} en la caché HTTP: {e}")
+        return response
+
+    def _send(self, method: str, url: str, timeout: Optional[Timeout], probe: bool, **kwargs) -> requests.Response:
+        host, state = self._host(url)
+        if not state.breaker.allow():
+            state.rejected += 1
+            raise CircuitOpenError(f"Circuito abierto para {host}, petición omitida")
+
+        session = self.probe_session if probe else self.session
+        with state.semaphore:
+            state.requests += 1
+            try:
+                response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except requests.RequestException:
+                state.failures += 1
+                state.breaker.record_failure()
+                raise
+
+        # Los 4xx son respuestas válidas del host (perfil inexistente, etc.); solo 5xx cuenta como fallo
+        if response.status_code >= 500:
+            state.failures += 1
+            state.breaker.record_failure()
+        else:
+            state.breaker.record_success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Peticiones, fallos, rechazos y estado del circuito por host"""
+        with self._lock:
+            hosts = list(self._hosts.items())
+        return {host: {'requests': state.requests, 'failures': state.failures, 'rejected': state.rejected,
+                       'circuit': state.breaker.state}
+                for host, state in hosts}
+
+    def close(self):
+        self.session.close()
+        self.probe_session.close()
+
+class HTTPSession:
+    """Vista de un módulo sobre el cliente compartido: mismas llamadas que requests.Session
+    (get/head/post/request y headers propios) sin abrir conexiones nuevas. El namespace
+    identifica al módulo para los TTL de la caché HTTP"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, namespace: str = ''):
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.namespace = namespace
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        merged = CaseInsensitiveDict(self.headers)
+        if headers:
+            merged.update(headers)
+        kwargs.setdefault('namespace', self.namespace)
+        return get_http_client().request(method, url, headers=merged, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+_client: Optional[HTTPClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> HTTPClient:
+    """Cliente del proceso, creado bajo demanda (y de nuevo tras un fork: los sockets no se comparten)"""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = HTTPClient(load_http_settings(), build_http_cache())
+                _client_pid = os.getpid()
+    return _client
+
+def http_session(headers: Optional[Dict[str, str]] = None, namespace: str = '') -> HTTPSession:
+    """Sesión de un módulo sobre el cliente compartido"""
+    return HTTPSession(headers, namespace)
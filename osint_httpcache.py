@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Caché HTTP en disco para el cliente compartido (osint_http)
+Respeta Cache-Control/Expires, guarda ETag y Last-Modified para revalidar con
+peticiones condicionales (304), admite TTL por módulo o host para las fuentes que
+no envían cabeceras de caché y expulsa por tamaño total (LRU)
+"""
+
+import configparser
+import hashlib
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from osint_archive import PLATFORM_CONF_PATH
+from osint_sqlite import SQLiteConnectionManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join('cache', 'http')
+DEFAULT_MAX_SIZE_MB = 256
+
+# Fuentes lentas que rara vez cambian y casi nunca envían cabeceras de caché (segundos).
+# Las claves son el namespace del módulo (http_session(namespace=...)) o un host
+DEFAULT_TTL_OVERRIDES: Dict[str, float] = {
+    'crt.sh': 86400,
+    'web.archive.org': 86400,
+    'github': 3600,
+    'social': 21600,
+    'media': 1800,
+    'pastebin': 3600,
+    'company': 21600,
+    'technology': 86400,
+    'certificates': 86400,
+}
+
+# Estados que se pueden almacenar sin cabeceras explícitas (RFC 9111 §4.2.2)
+HEURISTIC_STATUSES = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+CACHEABLE_STATUSES = HEURISTIC_STATUSES | {302, 307}
+
+# El cuerpo se guarda ya decodificado: estas cabeceras dejan de ser válidas
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive')
+
+# Cabeceras que un 304 no debe sobrescribir en la entrada guardada
+NOT_UPDATED_HEADERS = DROPPED_HEADERS + ('content-type',)
+
+HEURISTIC_FRACTION = 0.1
+MAX_HEURISTIC_TTL = 86400
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Directivas de Cache-Control en minúsculas ({'max-age': '60', 'no-cache': None, ...})"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+def authorized_storable(request_headers: Mapping[str, str], response: requests.Response) -> bool:
+    """RFC 9111 §3.5: la respuesta a una petición con Authorization solo se guarda en una caché
+    compartida si el origen lo permite explícitamente (public, s-maxage o must-revalidate)"""
+    if not any(name.lower() == 'authorization' for name in request_headers):
+        return True
+    directives = parse_cache_control(response.headers.get('Cache-Control'))
+    return any(name in directives for name in ('public', 's-maxage', 'must-revalidate'))
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value)) if value is not None else None
+    except ValueError:
+        return None
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def load_http_cache_settings(path: str = PLATFORM_CONF_PATH) -> Tuple[bool, str, int, Dict[str, float]]:
+    """Lee (enabled, directory, max_size_mb, ttl_overrides) de [http_cache] y [http_cache_ttl]"""
+    ttls = dict(DEFAULT_TTL_OVERRIDES)
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        enabled = parser.getboolean('http_cache', 'enabled', fallback=True)
+        directory = parser.get('http_cache', 'directory', fallback=DEFAULT_CACHE_DIR)
+        max_size_mb = parser.getint('http_cache', 'max_size_mb', fallback=DEFAULT_MAX_SIZE_MB)
+        if parser.has_section('http_cache_ttl'):
+            ttls.update({name: parser.getfloat('http_cache_ttl', name) for name in parser.options('http_cache_ttl')})
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo la caché HTTP desde {path}: {e}")
+        return True, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB, dict(DEFAULT_TTL_OVERRIDES)
+    return enabled, directory, max_size_mb, ttls
+
+class HTTPCache:
+    """Respuestas GET en disco: cuerpos como archivos y metadatos en un índice SQLite"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_size_mb: int = DEFAULT_MAX_SIZE_MB,
+                 ttl_overrides: Optional[Dict[str, float]] = None, stale_if_error: float = 86400):
+        self.directory = directory
+        self.max_size = max_size_mb * 1024 * 1024
+        self.ttl_overrides = {key.lower(): value for key, value in (ttl_overrides or {}).items()}
+        self.stale_if_error = stale_if_error
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'stale_errors': 0, 'evicted': 0}
+
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.pool = SQLiteConnectionManager(os.path.join(directory, 'index.db'))
+        self.init_storage()
+
+    def init_storage(self):
+        """Crea el índice de la caché si no existe"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    vary TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    must_revalidate INTEGER DEFAULT 0,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache (last_access)')
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        return hashlib.sha256(f'GET {url}'.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def ttl_override(self, url: str, namespace: str = '') -> Optional[float]:
+        """TTL configurado para el host (prioridad) o el módulo"""
+        host = (requests.utils.urlparse(url).hostname or '').lower()
+        if host in self.ttl_overrides:
+            return self.ttl_overrides[host]
+        return self.ttl_overrides.get(namespace.lower()) if namespace else None
+
+    def lookup(self, url: str, request_headers: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        """Entrada guardada para la URL (fresca o no) si coincide con las cabeceras de Vary"""
+        key = self.make_key(url)
+        rows = self.pool.execute('''
+            SELECT url, status, headers, vary, etag, last_modified, expires_at, must_revalidate
+            FROM http_cache WHERE cache_key = ?
+        ''', (key,))
+        if not rows:
+            return None
+        url, status, headers, vary, etag, last_modified, expires_at, must_revalidate = rows[0]
+        if vary:
+            lowered = {name.lower(): value for name, value in request_headers.items()}
+            if any(lowered.get(name) != value for name, value in json.loads(vary).items()):
+                return None
+        return {
+            'key': key, 'url': url, 'status': status, 'headers': json.loads(headers), 'etag': etag,
+            'last_modified': last_modified, 'expires_at': expires_at, 'must_revalidate': bool(must_revalidate),
+            'fresh': expires_at > time.time()
+        }
+
+    def conditional_headers(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        """Cabeceras para revalidar una entrada obsoleta"""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def can_serve_stale(self, entry: Dict[str, Any]) -> bool:
+        """Una entrada obsoleta puede cubrir un error del origen (stale-if-error)"""
+        return not entry['must_revalidate'] and entry['expires_at'] + self.stale_if_error > time.time()
+
+    def freshness(self, url: str, response: requests.Response, namespace: str = '') -> Optional[Tuple[float, bool]]:
+        """(segundos de frescura, must-revalidate) o None si la respuesta no se puede guardar"""
+        if response.status_code not in CACHEABLE_STATUSES:
+            return None
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        # Caché compartida entre módulos y usuarios: las respuestas privadas no se guardan
+        if 'no-store' in directives or 'private' in directives or response.headers.get('Vary', '').strip() == '*':
+            return None
+        must_revalidate = 'must-revalidate' in directives or 'proxy-revalidate' in directives
+
+        if 'no-cache' in directives:
+            ttl: Optional[float] = 0
+        elif _seconds(directives.get('s-maxage')) is not None:
+            ttl = _seconds(directives.get('s-maxage'))
+        elif _seconds(directives.get('max-age')) is not None:
+            ttl = _seconds(directives.get('max-age'))
+        elif 'Expires' in response.headers:
+            expires = _http_date(response.headers['Expires'])
+            date = _http_date(response.headers.get('Date')) or time.time()
+            ttl = max(0.0, expires - date) if expires else 0
+        else:
+            # Sin cabeceras explícitas: TTL configurado o heurística sobre Last-Modified
+            ttl = self.ttl_override(url, namespace)
+            if ttl is None and response.status_code in HEURISTIC_STATUSES:
+                date = _http_date(response.headers.get('Date')) or time.time()
+                modified = _http_date(response.headers.get('Last-Modified'))
+                ttl = min(MAX_HEURISTIC_TTL, (date - modified) * HEURISTIC_FRACTION) if modified else 0
+        if ttl is None:
+            return None
+
+        ttl -= _seconds(response.headers.get('Age')) or 0
+        has_validators = 'ETag' in response.headers or 'Last-Modified' in response.headers
+        if ttl <= 0 and not has_validators:
+            return None
+        return max(0.0, ttl), must_revalidate
+
+    def store(self, url: str, request_headers: Mapping[str, str], response: requests.Response,
+              namespace: str = '') -> bool:
+        """Guarda la respuesta si es almacenable; retorna si se guardó"""
+        if not authorized_storable(request_headers, response):
+            return False
+        freshness = self.freshness(url, response, namespace)
+        if freshness is None:
+            return False
+        ttl, must_revalidate = freshness
+
+        key = self.make_key(url)
+        body = response.content
+        path = self._body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(body)
+        os.replace(temporary, path)
+
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+        lowered = {name.lower(): value for name, value in request_headers.items()}
+        vary_names = [name.strip().lower() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        vary = {name: lowered.get(name) for name in vary_names if name != 'accept-encoding'}
+
+        now = time.time()
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO http_cache
+                (cache_key, url, status, headers, vary, etag, last_modified, stored_at, expires_at,
+                 must_revalidate, size, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (key, url, response.status_code, json.dumps(headers), json.dumps(vary) if vary else None,
+                  response.headers.get('ETag'), response.headers.get('Last-Modified'), now, now + ttl,
+                  int(must_revalidate), len(body), now))
+
+        with self._lock:
+            self.stats['stored'] += 1
+            self._writes_since_evict += 1
+            should_evict = self._writes_since_evict >= 20
+            if should_evict:
+                self._writes_since_evict = 0
+        if should_evict:
+            self.evict()
+        return True
+
+    def refresh(self, entry: Dict[str, Any], response: requests.Response, namespace: str = ''):
+        """Actualiza una entrada revalidada con un 304 (cabeceras nuevas y frescura renovada)"""
+        for name, value in response.headers.items():
+            if name.lower() not in NOT_UPDATED_HEADERS:
+                entry['headers'][name] = value
+        merged = requests.Response()
+        merged.status_code = entry['status']
+        merged.headers = CaseInsensitiveDict(entry['headers'])
+        freshness = self.freshness(entry['url'], merged, namespace)
+        directives = parse_cache_control(merged.headers.get('Cache-Control'))
+        if freshness is None and ('private' in directives or 'no-store' in directives):
+            # El origen dejó de permitir guardarla: se descarta y el cliente repite sin condiciones
+            self.invalidate(entry['key'])
+            return
+        ttl, must_revalidate = freshness if freshness else (0, entry['must_revalidate'])
+
+        now = time.time()
+        entry['expires_at'] = now + ttl
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                UPDATE http_cache SET headers = ?, etag = COALESCE(?, etag),
+                       last_modified = COALESCE(?, last_modified), expires_at = ?, must_revalidate = ?
+                WHERE cache_key = ?
+            ''', (json.dumps(entry['headers']), response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                  entry['expires_at'], int(must_revalidate), entry['key']))
+        with self._lock:
+            self.stats['revalidated'] += 1
+
+    def response(self, entry: Dict[str, Any], state: str = 'hit') -> Optional[requests.Response]:
+        """Reconstruye la respuesta guardada (None si su cuerpo ya no está en disco)"""
+        try:
+            with open(self._body_path(entry['key']), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            self.invalidate(entry['key'])
+            return None
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = http.client.responses.get(entry['status'], '')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.url = entry['url']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = state
+
+        with self.pool.transaction() as cursor:
+            cursor.execute('UPDATE http_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?',
+                           (time.time(), entry['key']))
+        with self._lock:
+            if state == 'hit':
+                self.stats['hits'] += 1
+            elif state == 'stale':
+                self.stats['stale_errors'] += 1
+        return response
+
+    def record_miss(self):
+        with self._lock:
+            self.stats['misses'] += 1
+
+    def invalidate(self, key: str):
+        """Elimina una entrada y su cuerpo"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('DELETE FROM http_cache WHERE cache_key = ?', (key,))
+        try:
+            os.remove(self._body_path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Elimina entradas inservibles y las menos usadas si se supera el tamaño máximo"""
+        now = time.time()
+        with self.pool.transaction() as cursor:
+            # Vencidas, fuera de la ventana stale-if-error y sin validadores para revalidar
+            cursor.execute('''
+                SELECT cache_key, size FROM http_cache
+                WHERE expires_at + ? < ? AND etag IS NULL AND last_modified IS NULL
+            ''', (self.stale_if_error, now))
+            removed = cursor.fetchall()
+
+            cursor.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache')
+            excess = cursor.fetchone()[0] - sum(size for _, size in removed) - self.max_size
+            if excess > 0:
+                # Liberar un 10% adicional para no expulsar en cada escritura
+                excess += self.max_size // 10
+                cursor.execute('SELECT cache_key, size FROM http_cache ORDER BY last_access ASC')
+                expired = {key for key, _ in removed}
+                for key, size in cursor:
+                    if excess <= 0:
+                        break
+                    if key not in expired:
+                        removed.append((key, size))
+                        excess -= size
+
+            cursor.executemany('DELETE FROM http_cache WHERE cache_key = ?', [(key,) for key, _ in removed])
+
+        for key, _ in removed:
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self.stats['evicted'] += len(removed)
+
+def build_http_cache(path: str = PLATFORM_CONF_PATH) -> Optional[HTTPCache]:
+    """Caché HTTP según la configuración de la plataforma (None si está deshabilitada)"""
+    enabled, directory, max_size_mb, ttls = load_http_cache_settings(path)
+    if not enabled:
+        return None
+    try:
+        return HTTPCache(directory, max_size_mb, ttls)
+    except Exception as e:
+        logger.error(f"No se pudo abrir la caché HTTP en {directory}: {e}")
+        return None
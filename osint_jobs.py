@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos de investigación (búsquedas, campañas de dorking, búsquedas con IA)
+Las peticiones web solo encolan el trabajo y retornan su id; un pool acotado de
+hilos los ejecuta. Estado, progreso y resultados parciales se guardan en SQLite,
+así cualquier proceso del servidor puede responder las consultas de estado
+"""
+
+import atexit
+import configparser
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from osint_archive import PLATFORM_CONF_PATH
+from osint_sqlite import SQLiteConnectionManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_JOBS = 5
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+JOB_COLUMNS = ('id', 'user_id', 'kind', 'params', 'status', 'step', 'progress_done', 'progress_total',
+               'result', 'error', 'created_at', 'started_at', 'finished_at', 'updated_at')
+
+class JobQueueFull(RuntimeError):
+    """Hay demasiados trabajos pendientes para aceptar uno nuevo"""
+
+def load_job_settings(path: str = PLATFORM_CONF_PATH) -> int:
+    """Lee max_concurrent_searches de la configuración de la plataforma"""
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        return parser.getint('osint', 'max_concurrent_searches', fallback=DEFAULT_MAX_CONCURRENT_JOBS)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo max_concurrent_searches desde {path}: {e}")
+        return DEFAULT_MAX_CONCURRENT_JOBS
+
+def _now() -> str:
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+class JobProgress:
+    """Callback que recibe cada trabajo para informar su avance"""
+
+    def __init__(self, jobs: 'JobQueue', job_id: str):
+        self.jobs = jobs
+        self.job_id = job_id
+
+    def __call__(self, step: str, results: Optional[List[Dict[str, Any]]] = None,
+                 done: Optional[int] = None, total: Optional[int] = None):
+        self.jobs.report(self.job_id, step, results, done, total)
+
+JobFunction = Callable[[JobProgress], Dict[str, Any]]
+
+class JobQueue:
+    """Pool acotado de hilos que ejecuta trabajos y persiste su estado"""
+
+    def __init__(self, pool: SQLiteConnectionManager, max_workers: Optional[int] = None,
+                 max_pending: int = 100, retention_hours: int = 24, stale_after: int = 3600):
+        self.pool = pool
+        self.max_workers = max(1, max_workers or load_job_settings())
+        self.max_pending = max_pending
+        self.retention_hours = retention_hours
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done: Dict[str, threading.Event] = {}
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+
+        self.fail_stale(stale_after)
+        self.purge()
+        atexit.register(self.shutdown)
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        """Crea el pool de forma perezosa (y de nuevo tras un fork)"""
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='osint-job')
+            self._pid = os.getpid()
+            self._pending = 0
+            self._done = {}
+        return self._executor
+
+    def submit(self, kind: str, user_id: int, params: Dict[str, Any], fn: JobFunction) -> str:
+        """Encola un trabajo y retorna su id (JobQueueFull si no caben más)"""
+        with self._lock:
+            executor = self._ensure_executor()
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise JobQueueFull(f"{self._pending} trabajos pendientes (máximo {self.max_pending})")
+            self._pending += 1
+
+            job_id = uuid.uuid4().hex
+            self._done[job_id] = threading.Event()
+            with self.pool.transaction() as cursor:
+                cursor.execute(
+                    'INSERT INTO jobs (id, user_id, kind, params, status, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (job_id, user_id, kind, json.dumps(params, default=str), 'queued', _now())
+                )
+            self.stats['submitted'] += 1
+            executor.submit(self._run, job_id, fn)
+        return job_id
+
+    def _run(self, job_id: str, fn: JobFunction):
+        try:
+            with self.pool.transaction() as cursor:
+                cursor.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? "
+                    "WHERE id = ? AND status = 'queued'",
+                    (_now(), _now(), job_id)
+                )
+                if cursor.rowcount == 0:
+                    # Cancelado mientras esperaba turno
+                    return
+
+            try:
+                result = fn(JobProgress(self, job_id))
+                self._finish(job_id, 'completed', result=result)
+            except Exception as e:
+                logger.error(f"Error en trabajo {job_id}: {str(e)}", exc_info=True)
+                self._finish(job_id, 'failed', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+            done = self._done.pop(job_id, None)
+            if done:
+                done.set()
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None):
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ?,
+                       progress_done = MAX(progress_done, progress_total)
+                WHERE id = ?
+            ''', (status, json.dumps(result, default=str) if result is not None else None,
+                  error, _now(), _now(), job_id))
+        self.stats[status] += 1
+
+    def report(self, job_id: str, step: str, results: Optional[List[Dict[str, Any]]] = None,
+               done: Optional[int] = None, total: Optional[int] = None):
+        """Registra el avance de un trabajo en curso y sus resultados parciales"""
+        try:
+            with self.pool.transaction() as cursor:
+                # Solo trabajos en curso (una revalidación tardía de la caché no reabre uno terminado)
+                cursor.execute('''
+                    UPDATE jobs SET step = ?, progress_done = COALESCE(?, progress_done),
+                           progress_total = COALESCE(?, progress_total), updated_at = ?
+                    WHERE id = ? AND status = 'running'
+                ''', (step, done, total, _now(), job_id))
+                if cursor.rowcount and results:
+                    cursor.execute('''
+                        INSERT INTO job_events (job_id, seq, step, results)
+                        SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM job_events WHERE job_id = ?
+                    ''', (job_id, step, json.dumps(results, default=str), job_id))
+        except Exception as e:
+            logger.error(f"Error registrando progreso del trabajo {job_id}: {str(e)}")
+
+    def get(self, job_id: str, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Estado de un trabajo (None si no existe o es de otro usuario)"""
+        user_filter = 'AND user_id = ?' if user_id is not None else ''
+        params = (job_id,) + ((user_id,) if user_id is not None else ())
+        rows = self.pool.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ? {user_filter}", params)
+        if not rows:
+            return None
+        job = dict(zip(JOB_COLUMNS, rows[0]))
+        for key in ('params', 'result'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        job['partial_results'] = self.pool.execute(
+            'SELECT COUNT(*) FROM job_events WHERE job_id = ?', (job_id,)
+        )[0][0]
+        return job
+
+    def events(self, job_id: str, since: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Resultados parciales registrados después del evento `since`"""
+        rows = self.pool.execute('''
+            SELECT seq, step, results, created_at FROM job_events
+            WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?
+        ''', (job_id, since, limit))
+        return [{'seq': seq, 'step': step, 'results': json.loads(results), 'created_at': created_at}
+                for seq, step, results, created_at in rows]
+
+    def list_jobs(self, user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Trabajos más recientes de un usuario (sin resultados)"""
+        columns = ('id', 'kind', 'status', 'step', 'progress_done', 'progress_total', 'error',
+                   'created_at', 'started_at', 'finished_at')
+        rows = self.pool.execute(
+            f"SELECT {', '.join(columns)} FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            (user_id, limit)
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
+    def active(self, kind: str, **params: Any) -> List[Dict[str, Any]]:
+        """Trabajos en cola o en curso de un tipo cuyos parámetros coinciden, en cualquier proceso"""
+        filters = ''.join(f" AND json_extract(params, '$.{key}') = ?" for key in params)
+        rows = self.pool.execute(
+            f"SELECT id, status FROM jobs WHERE kind = ? AND status IN ('queued', 'running'){filters}",
+            (kind,) + tuple(params.values())
+        )
+        return [{'id': job_id, 'status': status} for job_id, status in rows]
+
+    def wait(self, job_id: str, timeout: float, poll_interval: float = 0.5) -> Optional[Dict[str, Any]]:
+        """Espera hasta `timeout` segundos a que termine un trabajo; los de otro proceso
+        se consultan en la base cada poll_interval segundos"""
+        done = self._done.get(job_id) if self._pid == os.getpid() else None
+        if done is not None:
+            done.wait(timeout)
+            return self.get(job_id)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+
+    def cancel(self, job_id: str, user_id: Optional[int] = None) -> bool:
+        """Cancela un trabajo que aún no empezó"""
+        user_filter = 'AND user_id = ?' if user_id is not None else ''
+        params = (_now(), _now(), job_id) + ((user_id,) if user_id is not None else ())
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'''
+                UPDATE jobs SET status = 'cancelled', finished_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'queued' {user_filter}
+            ''', params)
+            cancelled = cursor.rowcount > 0
+        if cancelled:
+            self.stats['cancelled'] += 1
+        return cancelled
+
+    def fail_stale(self, stale_after: int = 3600) -> int:
+        """Marca como fallidos los trabajos sin avance reciente (interrumpidos por un reinicio)"""
+        threshold = (datetime.utcnow() - timedelta(seconds=stale_after)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                UPDATE jobs SET status = 'failed', error = 'Interrumpido', finished_at = ?, updated_at = ?
+                WHERE status IN ('queued', 'running') AND updated_at < ?
+            ''', (_now(), _now(), threshold))
+            return cursor.rowcount
+
+    def purge(self, hours: Optional[int] = None) -> int:
+        """Elimina los trabajos terminados hace más de `hours` horas"""
+        hours = self.retention_hours if hours is None else hours
+        threshold = (datetime.utcnow() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'''
+                DELETE FROM job_events WHERE job_id IN (
+                    SELECT id FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))})
+                      AND updated_at < ?
+                )
+            ''', FINISHED_STATUSES + (threshold,))
+            cursor.execute(f'''
+                DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?
+            ''', FINISHED_STATUSES + (threshold,))
+            return cursor.rowcount
+
+    def shutdown(self, wait: bool = False):
+        """Detiene el pool; los trabajos de este proceso que seguían en cola quedan como fallidos"""
+        if self._executor is None or self._pid != os.getpid():
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        queued = list(self._done)
+        if not queued:
+            return
+        try:
+            with self.pool.transaction() as cursor:
+                cursor.executemany('''
+                    UPDATE jobs SET status = 'failed', error = 'Interrumpido', finished_at = ?, updated_at = ?
+                    WHERE id = ? AND status = 'queued'
+                ''', [(_now(), _now(), job_id) for job_id in queued])
+        except Exception as e:
+            logger.error(f"Error marcando trabajos interrumpidos: {str(e)}")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Motor compartido de clasificación por palabras clave
+Construye un autómata Aho-Corasick una sola vez a partir de tablas de palabras
+clave configurables e insensibles a tildes, y evalúa el texto en una sola pasada
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ruta opcional con tablas que reemplazan o amplían las tablas por defecto.
+# Formato: {"tabla": {"categoría": {"palabra clave": peso, ...}, ...}, ...}
+KEYWORD_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'keyword_tables.json')
+
+DEFAULT_KEYWORD_TABLES: Dict[str, Dict[str, Dict[str, float]]] = {
+    # Resultados de dorking (GoogleDorkingEngine._assess_risk_level)
+    'dork_risk': {
+        'high': {
+            'password': 1.0, 'contraseña': 1.0, 'login': 1.0, 'admin': 1.0, 'database': 1.0,
+            'confidencial': 1.0, 'private': 1.0, 'internal': 1.0, 'backup': 1.0,
+            'error': 1.0, 'warning': 1.0, 'sql': 1.0, 'dump': 1.0
+        }
+    },
+    # Noticias colombianas (ColombiaOSINT._analyze_news_risk)
+    'news_risk': {
+        'risk': {
+            'corrupción': 1.0, 'fraude': 1.0, 'delito': 1.0, 'investigación': 1.0, 'captura': 1.0,
+            'condena': 1.0, 'sanción': 1.0, 'multa': 1.0, 'proceso judicial': 1.0, 'demanda': 1.0,
+            'escándalo': 1.0, 'irregularidad': 1.0, 'malversación': 1.0, 'soborno': 1.0
+        }
+    },
+    # Rutas de archivos relevantes (OSINTFileDownloader.is_important_file)
+    'file_patterns': {
+        'important': {
+            'backup': 1.0, 'dump': 1.0, 'export': 1.0, 'config': 1.0, 'database': 1.0, 'db': 1.0,
+            'admin': 1.0, 'private': 1.0, 'secret': 1.0, 'confidential': 1.0, 'internal': 1.0,
+            'password': 1.0, 'passwd': 1.0, 'credentials': 1.0, 'key': 1.0, 'token': 1.0,
+            'report': 1.0, 'document': 1.0, 'file': 1.0, 'download': 1.0, 'attachment': 1.0
+        }
+    },
+    # Regiones del dashboard (/api/dashboard/stats), en orden de prioridad
+    'regions': {
+        'bogota': {'bogotá': 1.0, 'cundinamarca': 1.0},
+        'medellin': {'medellín': 1.0, 'antioquia': 1.0},
+        'cali': {'cali': 1.0, 'valle': 1.0},
+        'barranquilla': {'barranquilla': 1.0, 'atlántico': 1.0}
+    }
+}
+
+def _combining_class_re() -> 're.Pattern':
+    """Clase de regex con todos los caracteres combinables del plano básico"""
+    ranges = []
+    for code in range(0x10000):
+        if unicodedata.combining(chr(code)):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return re.compile('[' + ''.join(
+        re.escape(chr(start)) + ('-' + re.escape(chr(end)) if end > start else '') for start, end in ranges
+    ) + ']+')
+
+_COMBINING_RE = _combining_class_re()
+
+def fold_text(text: str) -> str:
+    """Normaliza texto para comparación: sin tildes y en minúsculas"""
+    if not text:
+        return ''
+    if text.isascii():
+        return text.casefold()
+    # Camino rápido en C; solo quedan fuera los combinables de planos suplementarios
+    decomposed = _COMBINING_RE.sub('', unicodedata.normalize('NFKD', text))
+    if decomposed.isascii() or len(decomposed.encode('utf-16-le', 'surrogatepass')) == 2 * len(decomposed):
+        return decomposed.casefold()
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+class KeywordAutomaton:
+    """Autómata Aho-Corasick sobre palabras clave ya normalizadas"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        index: Dict[str, int] = {}
+        for keyword in keywords:
+            if keyword and keyword not in index:
+                index[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+                self._add(keyword, index[keyword])
+
+        self._build_failure_links()
+
+    def _add(self, keyword: str, keyword_id: int):
+        node = 0
+        for ch in keyword:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] = self._output[node] + (keyword_id,)
+
+    def _build_failure_links(self):
+        """BFS que calcula enlaces de fallo y hereda las salidas de los sufijos"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, folded_text: str) -> Iterator[Tuple[int, int]]:
+        """Genera (id_palabra, posición_final) para cada aparición en una sola pasada"""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for position, ch in enumerate(folded_text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for keyword_id in output[node]:
+                yield keyword_id, position
+
+class KeywordClassifier:
+    """Clasificador ponderado construido a partir de una tabla {categoría: {palabra: peso}}"""
+
+    def __init__(self, table: Dict[str, Dict[str, float]]):
+        self.categories: List[str] = list(table.keys())
+        entries: Dict[str, List[Tuple[str, float]]] = {}
+        for category, keywords in table.items():
+            for keyword, weight in keywords.items():
+                entries.setdefault(fold_text(keyword), []).append((category, float(weight)))
+
+        self.automaton = KeywordAutomaton(entries.keys())
+        self._targets = [entries[keyword] for keyword in self.automaton.keywords]
+        self._weights = {
+            (category, keyword): weight
+            for keyword, targets in entries.items() for category, weight in targets
+        }
+
+    def scan(self, *texts: str) -> Dict[str, Dict[str, int]]:
+        """Retorna {categoría: {palabra: apariciones}} para todos los textos indicados"""
+        hits: Dict[str, Dict[str, int]] = {}
+        for text in texts:
+            for keyword_id, _ in self.automaton.iter_matches(fold_text(text)):
+                keyword = self.automaton.keywords[keyword_id]
+                for category, _weight in self._targets[keyword_id]:
+                    category_hits = hits.setdefault(category, {})
+                    category_hits[keyword] = category_hits.get(keyword, 0) + 1
+        return hits
+
+    def matched_keywords(self, *texts: str) -> Dict[str, set]:
+        """Retorna {categoría: palabras distintas encontradas}"""
+        return {category: set(keywords) for category, keywords in self.scan(*texts).items()}
+
+    def score(self, *texts: str, distinct: bool = True) -> Dict[str, float]:
+        """Suma de pesos por categoría (cada palabra cuenta una vez si distinct=True)"""
+        scores: Dict[str, float] = {}
+        for category, keywords in self.scan(*texts).items():
+            scores[category] = sum(
+                self._weights[(category, keyword)] * (1 if distinct else count)
+                for keyword, count in keywords.items()
+            )
+        return scores
+
+    def has_match(self, text: str, category: Optional[str] = None) -> bool:
+        """Indica si el texto contiene alguna palabra (de la categoría, si se indica)"""
+        for keyword_id, _ in self.automaton.iter_matches(fold_text(text)):
+            if category is None or any(c == category for c, _ in self._targets[keyword_id]):
+                return True
+        return False
+
+    def first_category(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Primera categoría (según el orden de la tabla) con al menos una coincidencia"""
+        found = self.scan(text)
+        for category in self.categories:
+            if category in found:
+                return category
+        return default
+
+_tables: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None
+_classifiers: Dict[str, KeywordClassifier] = {}
+_classifiers_lock = threading.Lock()
+
+def load_keyword_tables(path: str = KEYWORD_TABLES_PATH) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Carga las tablas por defecto y aplica las del archivo de configuración si existe"""
+    tables = {name: {cat: dict(words) for cat, words in table.items()}
+              for name, table in DEFAULT_KEYWORD_TABLES.items()}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for name, table in json.load(f).items():
+                    tables[name] = table
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error cargando tablas de palabras clave desde {path}: {e}")
+    return tables
+
+def get_classifier(name: str) -> KeywordClassifier:
+    """Obtiene el clasificador compilado de una tabla (se construye una sola vez)"""
+    global _tables
+    classifier = _classifiers.get(name)
+    if classifier is not None:
+        return classifier
+
+    with _classifiers_lock:
+        if name not in _classifiers:
+            if _tables is None:
+                _tables = load_keyword_tables()
+            if name not in _tables:
+                raise KeyError(f"Tabla de palabras clave desconocida: {name}")
+            _classifiers[name] = KeywordClassifier(_tables[name])
+        return _classifiers[name]
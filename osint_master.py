@@ -18,6 +18,7 @@ import time
 # Importar módulos OSINT
 from osint_advanced import AdvancedOSINTToolkit
 from osint_specialized import OSINTSpecializedTools
+from osint_batch import BatchRun, BatchStore, load_batch_settings, read_targets
 
 # Configurar logging
 logging.basicConfig(
@@ -83,7 +84,7 @@ class OSINTMasterSearch:
         for directory in directories:
             Path(directory).mkdir(exist_ok=True)
     
-    def search_target(self, target: str, search_type: str = "comprehensive") -> Dict[str, Any]:
+    def search_target(self, target: str, search_type: str = "comprehensive", save: bool = True) -> Dict[str, Any]:
         """Búsqueda principal de un objetivo"""
         logger.info(f"Iniciando búsqueda de: {target} - Tipo: {search_type}")
         
@@ -125,13 +126,39 @@ class OSINTMasterSearch:
         # Calcular tiempo de ejecución
         results['execution_time'] = time.time() - start_time
         
-        # Guardar resultados
-        self.save_results(results)
+        # Guardar resultados (en modo lote se escriben en el JSONL del lote)
+        if save:
+            self.save_results(results)
         
         logger.info(f"Búsqueda completada en {results['execution_time']:.2f} segundos")
         
         return results
     
+    def search_batch(self, input_path: str, search_type: str = "comprehensive", workers: Optional[int] = None,
+                     rate_limit: Optional[float] = None, directory: Optional[str] = None,
+                     progress=None) -> Dict[str, Any]:
+        """Investiga todos los objetivos de un CSV/JSONL/TXT; si el lote ya existía, lo reanuda"""
+        settings = load_batch_settings()
+        store = BatchStore(directory or settings['directory'])
+        targets = read_targets(input_path, search_type)
+        manifest = store.create(targets, source=input_path, max_targets=settings['max_targets'])
+        logger.info(f"Lote {manifest['batch_id']}: {manifest['total']} objetivos únicos de {input_path}")
+        
+        run = BatchRun(
+            store, manifest['batch_id'],
+            lambda target, target_type: self.search_target(target, target_type or search_type, save=False),
+            workers=workers or settings['workers'],
+            rate_limit=rate_limit or settings['rate_limit'],
+            burst=settings['burst'],
+            max_attempts=settings['max_attempts']
+        )
+        try:
+            return run.run(progress)
+        except KeyboardInterrupt:
+            # Los resultados ya escritos quedan como checkpoint para la próxima ejecución
+            run.stop()
+            raise
+    
     def detect_target_type(self, target: str) -> str:
         """Detecta el tipo de objetivo"""
         import re
@@ -487,7 +514,7 @@ class OSINTMasterSearch:
 def main():
     """Función principal"""
     parser = argparse.ArgumentParser(description='OSINT Search Engine Avanzado')
-    parser.add_argument('target', help='Objetivo a investigar')
+    parser.add_argument('target', nargs='?', help='Objetivo a investigar')
     parser.add_argument('--type', choices=['domain', 'ip', 'email', 'username', 'phone', 'company', 'general'], 
                        help='Tipo de objetivo')
     parser.add_argument('--config', default='osint_config_advanced.json', 
@@ -495,12 +522,30 @@ def main():
     parser.add_argument('--format', choices=['html', 'json', 'pdf'], default='html',
                        help='Formato del reporte')
     parser.add_argument('--output', help='Archivo de salida')
+    parser.add_argument('--batch', metavar='ARCHIVO',
+                       help='CSV/JSONL/TXT de objetivos; si se interrumpe, repetir el comando reanuda el lote')
+    parser.add_argument('--workers', type=int, help='Hilos del lote')
+    parser.add_argument('--rate', type=float, help='Objetivos iniciados por segundo en el lote')
     
     args = parser.parse_args()
+    if not args.target and not args.batch:
+        parser.error('Indique un objetivo o --batch ARCHIVO')
     
     # Crear instancia del buscador
     osint_search = OSINTMasterSearch(args.config)
     
+    if args.batch:
+        summary = osint_search.search_batch(args.batch, args.type or 'comprehensive', args.workers, args.rate)
+        print(f"\n{'='*60}")
+        print(f"LOTE {summary['batch_id']} {summary['status'].upper()}")
+        print(f"{'='*60}")
+        print(f"Objetivos: {summary['total']}")
+        print(f"Completados: {summary['completed']} (omitidos por checkpoint: {summary['run']['skipped']})")
+        print(f"Fallidos: {summary['failed']}")
+        print(f"Resultados: {summary['results_file']}")
+        print(f"\n{'='*60}")
+        return
+    
     # Realizar búsqueda
     results = osint_search.search_target(args.target, args.type or 'comprehensive')
     
@@ -508,7 +553,7 @@ def main():
     report_file = osint_search.generate_report(results, args.format)
     
     print(f"\n{'='*60}")
-    print(f"OSINT SEARCH COMPLETADO")
+    print("OSINT SEARCH COMPLETADO")
     print(f"{'='*60}")
     print(f"Objetivo: {args.target}")
     print(f"Tipo: {results['search_type']}")
@@ -518,12 +563,12 @@ def main():
     print(f"Reporte generado: {report_file}")
     
     if results['summary']['key_findings']:
-        print(f"\nHallazgos clave:")
+        print("\nHallazgos clave:")
         for finding in results['summary']['key_findings']:
             print(f"  • {finding}")
     
     if results['summary']['recommendations']:
-        print(f"\nRecomendaciones:")
+        print("\nRecomendaciones:")
         for rec in results['summary']['recommendations']:
             print(f"  • {rec}")
     
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Paginación por clave (keyset) para el historial y los resultados
+El cursor es la clave de ordenación de la última fila entregada, codificada de
+forma opaca; la página siguiente empieza justo después de esa clave usando el
+índice, así que su coste no depende de cuántas páginas se hayan recorrido
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica la clave de la última fila como cursor opaco para la URL"""
+    payload = json.dumps(list(values), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """Decodifica un cursor con `size` valores (None si no hay cursor). ValueError si es inválido"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Cursor de paginación inválido: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Cursor de paginación inválido")
+    return values
+
+def page_size(value: Any, default: int = 50) -> int:
+    """Tamaño de página acotado a [1, MAX_PAGE_SIZE]"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Ranking de resultados por relevancia con BM25 por campos
+Cada campo de todo el lote se normaliza una sola vez (sin tildes, en minúsculas); esa
+normalización, no la aritmética de BM25, es la que domina el tiempo del ranking
+"""
+
+import codecs
+import math
+import re
+import unicodedata
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from osint_keywords import _COMBINING_RE, fold_text
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Separador entre resultados al unir un campo de todo el lote (no es carácter de palabra)
+SEPARATOR = '\x1f'
+
+# Palabras vacías que no aportan a la relevancia de una consulta
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los', 'o', 'para', 'por',
+    'que', 'se', 'su', 'un', 'una', 'y', 'the', 'of', 'and', 'or', 'in', 'on', 'for', 'to'
+}
+
+DEFAULT_FIELD_WEIGHTS: Dict[str, float] = {'title': 3.0, 'description': 1.0, 'url': 0.5, 'content': 0.5}
+
+def tokenize(text: str) -> List[str]:
+    """Tokens sin tildes y en minúsculas"""
+    return TOKEN_RE.findall(fold_text(text)) if text else []
+
+# Lo que no queda en ASCII (rayas, apóstrofos tipográficos, otros alfabetos) pasa a ser un
+# espacio: separa palabras igual que en fold_text en vez de pegarlas
+codecs.register_error('osint_ascii_space', lambda e: (' ' * (e.end - e.start), e.end))
+
+def _fold_ascii(text: str) -> str:
+    """Como fold_text pero cambiando por espacios los caracteres que no quedan en ASCII"""
+    decomposed = _COMBINING_RE.sub('', unicodedata.normalize('NFKD', text.casefold()))
+    return decomposed.encode('ascii', 'osint_ascii_space').decode('ascii')
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+def _word_positions(text: str, word: str):
+    """Posiciones de `word` como palabra completa (str.find salta directo entre apariciones)"""
+    size = len(word)
+    position = text.find(word)
+    while position != -1:
+        end = position + size
+        if (position == 0 or not _is_word_char(text[position - 1])) and \
+                (end == len(text) or not _is_word_char(text[end])):
+            yield position
+        position = text.find(word, position + 1)
+
+def query_terms(query: str) -> List[str]:
+    """Términos únicos de la consulta, sin palabras vacías (salvo que no quede ninguno)"""
+    tokens = tokenize(query)
+    terms = list(dict.fromkeys(token for token in tokens if token not in STOPWORDS))
+    return terms or list(dict.fromkeys(tokens))
+
+class BM25Ranker:
+    """BM25F: frecuencias ponderadas por campo sobre todo el lote de resultados"""
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2,
+                 b: float = 0.75, phrase_boost: float = 0.5):
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self.k1 = k1
+        self.b = b
+        self.phrase_boost = phrase_boost
+
+    def _field_counts(self, query: List[str], phrase: str, results: Sequence[Dict[str, Any]]):
+        """Apariciones (fila, término, peso), longitudes por campo y filas con la frase completa"""
+        # Cada campo de todo el lote se une en un solo texto: se normaliza y se buscan los
+        # términos una vez por campo, y cada aparición se asigna a su resultado por posición
+        phrase_words = phrase.split()
+        check_phrase = len(query) > 1
+        phrase_re = re.compile(r'\W+'.join(map(re.escape, phrase_words)) + r'\b') if check_phrase else None
+
+        # Con una consulta ASCII basta descomponer y descartar lo que no es ASCII (mucho más rápido)
+        fold = _fold_ascii if all(term.isascii() for term in query) else fold_text
+
+        matches: List[Tuple[int, int, float]] = []
+        field_lengths: List[Tuple[float, List[int]]] = []
+        phrases = set()
+        for field, weight in self.field_weights.items():
+            values = [str(result.get(field) or '') for result in results]
+            parts = fold(SEPARATOR.join(values)).split(SEPARATOR)
+            if len(parts) != len(results):
+                # Algún valor contenía el separador: se limpia (caso excepcional)
+                parts = fold(SEPARATOR.join(value.replace(SEPARATOR, ' ') for value in values)).split(SEPARATOR)
+            text = SEPARATOR.join(parts)
+            starts = list(accumulate(map((1).__add__, map(len, parts[:-1])), initial=0))
+
+            # Longitud en palabras separadas por espacios (aproximación barata del número de tokens)
+            field_lengths.append((weight, list(map(len, map(str.split, parts)))))
+            for column, term in enumerate(query):
+                matches.extend((bisect_right(starts, position) - 1, column, weight)
+                               for position in _word_positions(text, term))
+            if check_phrase and field in ('title', 'description'):
+                phrases.update(bisect_right(starts, position) - 1
+                               for position in _word_positions(text, phrase_words[0])
+                               if phrase_re.match(text, position))
+        return matches, field_lengths, phrases
+
+    def score(self, query: str, results: Sequence[Dict[str, Any]]) -> List[float]:
+        """Puntuación de cada resultado normalizada a [0, 1] dentro del lote"""
+        terms = query_terms(query)
+        if not results or not terms:
+            return [0.0] * len(results)
+
+        counts = self._field_counts(terms, ' '.join(tokenize(query)), results)
+        scores = self._bm25_scores(len(results), len(terms), *counts)
+
+        top = max(scores)
+        return [round(value / top, 4) if top > 0 else 0.0 for value in scores]
+
+    def _bm25_scores(self, n_docs, n_terms, matches, field_lengths, phrases) -> List[float]:
+        """BM25F sin normalizar; solo se recorren los resultados con alguna aparición"""
+        tf: Dict[int, List[float]] = {}
+        for row, column, weight in matches:
+            tf.setdefault(row, [0.0] * n_terms)[column] += weight
+        dl = [0.0] * n_docs
+        for weight, lengths in field_lengths:
+            dl = [total + weight * length for total, length in zip(dl, lengths)]
+
+        df = [sum(1 for row in tf.values() if row[column] > 0) for column in range(n_terms)]
+        idf = [math.log1p((n_docs - count + 0.5) / (count + 0.5)) for count in df]
+        avgdl = (sum(dl) / n_docs) or 1.0
+        scores = [0.0] * n_docs
+        for row, frequencies in tf.items():
+            norm = self.k1 * (1.0 - self.b + self.b * dl[row] / avgdl)
+            value = sum(idf[column] * frequency * (self.k1 + 1.0) / (frequency + norm)
+                        for column, frequency in enumerate(frequencies) if frequency)
+            scores[row] = value * (1.0 + self.phrase_boost * (row in phrases))
+        return scores
+
+    def rank(self, query: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Asigna relevance_score y ordena de mayor a menor (estable ante empates)"""
+        for result, value in zip(results, self.score(query, results)):
+            result['relevance_score'] = value
+        return sorted(results, key=lambda result: result['relevance_score'], reverse=True)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Control de velocidad para motores de búsqueda y fuentes OSINT
+Implementa token buckets por motor para reemplazar las pausas globales fijas
+"""
+
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from osint_engines import engine_rate_limits
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens por segundo con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("La tasa del token bucket debe ser mayor que cero")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Recarga tokens según el tiempo transcurrido (llamar con el lock tomado)"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Intenta consumir tokens sin bloquear"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta obtener los tokens; retorna False si vence el timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            # Dormir fuera del lock para no bloquear a otros hilos
+            time.sleep(wait)
+
+class RateLimiterRegistry:
+    """Registro de token buckets por motor/fuente, creados bajo demanda"""
+
+    def __init__(self, default_rate: float = 0.5, default_capacity: float = 1.0,
+                 rates: Optional[Dict[str, float]] = None,
+                 capacities: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self.rates = dict(rates or {})
+        self.capacities = dict(capacities or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def scale(self, factor: float):
+        """Multiplica todos los ritmos (p. ej. 1/workers para repartir el ritmo de cada motor
+        entre procesos); los buckets ya creados se rehacen con el ritmo nuevo"""
+        with self._lock:
+            self.default_rate *= factor
+            self.rates = {name: rate * factor for name, rate in self.rates.items()}
+            self._buckets.clear()
+
+    def get(self, name: str) -> TokenBucket:
+        """Obtiene (o crea) el bucket de un motor"""
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                bucket = TokenBucket(
+                    self.rates.get(name, self.default_rate),
+                    self.capacities.get(name, self.default_capacity)
+                )
+                self._buckets[name] = bucket
+            return bucket
+
+    def acquire(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Espera un turno para el motor indicado"""
+        return self.get(name).acquire(timeout=timeout)
+
+def build_engine_rate_limiters(config) -> RateLimiterRegistry:
+    """Construye el registro de buckets: ritmos declarados por cada plugin de motor,
+    sobrescritos por los de OSINTConfig"""
+    default_rate = 1.0 / config.rate_limit_delay if config.rate_limit_delay > 0 else 10.0
+    rates, bursts = engine_rate_limits()
+    return RateLimiterRegistry(
+        default_rate=default_rate,
+        default_capacity=getattr(config, 'engine_burst', 1.0),
+        rates={**rates, **getattr(config, 'engine_rate_limits', {})},
+        capacities={**bursts, **getattr(config, 'engine_bursts', {})}
+    )
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Migraciones versionadas del esquema de la base de datos OSINT
+Cada migración se aplica una sola vez, en orden, y queda registrada en la tabla
+schema_version; con el esquema al día el arranque solo lee la versión actual
+"""
+
+import logging
+import sqlite3
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from werkzeug.security import generate_password_hash
+
+from osint_dedup import backfill_fingerprints, index_fingerprints, near_duplicate_matches, simhash_batch
+from osint_sqlite import SQLiteConnectionManager
+from osint_stats import rebuild_user_stats
+from osint_urls import canonicalize_url, document_key
+
+logger = logging.getLogger(__name__)
+
+MigrationStep = Union[str, Callable[[sqlite3.Cursor], None]]
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    steps: Sequence[MigrationStep]
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> dict:
+    """Retorna {columna: tipo declarado} de una tabla (vacío si no existe)"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+
+def _upgrade_searches_user_id(cursor: sqlite3.Cursor):
+    """Convierte searches.user_id a INTEGER conservando ids y usuarios existentes"""
+    columns = _columns(cursor, 'searches')
+    if columns.get('user_id') == 'INTEGER':
+        return
+
+    logger.info("Migrando tabla searches: user_id pasa a INTEGER")
+    cursor.execute('ALTER TABLE searches RENAME TO searches_legacy')
+    cursor.execute('''
+        CREATE TABLE searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER DEFAULT 1,
+            query TEXT NOT NULL,
+            search_type TEXT DEFAULT 'general',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            results_count INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # Los user_id no numéricos del esquema antiguo ('anonymous') pasan al administrador
+    user_expr = ("CASE WHEN CAST(user_id AS INTEGER) > 0 THEN CAST(user_id AS INTEGER) ELSE 1 END"
+                 if 'user_id' in columns else '1')
+    cursor.execute(f'''
+        INSERT INTO searches (id, user_id, query, search_type, timestamp, results_count, status)
+        SELECT id, {user_expr}, query, search_type, timestamp, results_count, status
+        FROM searches_legacy
+    ''')
+    cursor.execute('DROP TABLE searches_legacy')
+
+def _create_results_fts(cursor: sqlite3.Cursor):
+    """Índice FTS5 sincronizado con search_results mediante triggers"""
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_results_fts USING fts5(
+                title, description, content, url,
+                content='search_results', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite sin soporte FTS5, la búsqueda en historial usará LIKE: {e}")
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS search_results_fts_insert AFTER INSERT ON search_results BEGIN
+            INSERT INTO search_results_fts (rowid, title, description, content, url)
+            VALUES (new.id, new.title, new.description, new.content, new.url);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS search_results_fts_delete AFTER DELETE ON search_results BEGIN
+            INSERT INTO search_results_fts (search_results_fts, rowid, title, description, content, url)
+            VALUES ('delete', old.id, old.title, old.description, old.content, old.url);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS search_results_fts_update AFTER UPDATE ON search_results BEGIN
+            INSERT INTO search_results_fts (search_results_fts, rowid, title, description, content, url)
+            VALUES ('delete', old.id, old.title, old.description, old.content, old.url);
+            INSERT INTO search_results_fts (rowid, title, description, content, url)
+            VALUES (new.id, new.title, new.description, new.content, new.url);
+        END
+    ''')
+    # Indexar el historial existente
+    cursor.execute("INSERT INTO search_results_fts (search_results_fts) VALUES ('rebuild')")
+
+def upsert_result_documents(cursor: sqlite3.Cursor, results: Sequence[Dict[str, Any]],
+                            near_duplicate_days: Optional[int] = None) -> List[int]:
+    """Inserta o actualiza los documentos de los resultados y retorna sus ids en el mismo orden.
+    Cada resultado se guarda con su propia URL; con near_duplicate_days, un documento nuevo casi
+    duplicado de otro reciente lo anota en near_duplicate_of. Un documento ya guardado solo
+    completa los campos que tenía vacíos: guardar una búsqueda no reescribe lo que vio otra"""
+    canonicals = [canonicalize_url(result.get('url', '')) for result in results]
+    keys = [document_key(result, canonical) for result, canonical in zip(results, canonicals)]
+    fingerprints: List[Optional[int]] = []
+    matches: List[Optional[str]] = []
+    if near_duplicate_days:
+        # Huella ya calculada al procesar la búsqueda, o se calcula aquí
+        fingerprints = [result.get('simhash') for result in results]
+        missing = [i for i, fingerprint in enumerate(fingerprints) if fingerprint is None]
+        if missing:
+            computed = simhash_batch([results[i] for i in missing], [canonicals[i] for i in missing])
+            for i, fingerprint in zip(missing, computed):
+                fingerprints[i] = fingerprint
+        matches = near_duplicate_matches(cursor, keys, fingerprints, near_duplicate_days)
+    cursor.executemany('''
+        INSERT INTO result_documents
+        (url_hash, canonical_url, url, source, result_type, title, description, content)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (url_hash) DO UPDATE SET
+            last_seen = CURRENT_TIMESTAMP,
+            seen_count = seen_count + 1,
+            title = CASE WHEN title = '' THEN excluded.title ELSE title END,
+            description = CASE WHEN description = '' THEN excluded.description ELSE description END,
+            content = CASE WHEN content = '' THEN excluded.content ELSE content END
+    ''', [
+        (
+            key,
+            canonical,
+            result.get('url', '') or '',
+            result.get('source', '') or '',
+            result.get('result_type', 'web') or 'web',
+            result.get('title', '') or '',
+            result.get('description', '') or '',
+            result.get('content', '') or ''
+        )
+        for key, canonical, result in zip(keys, canonicals, results)
+    ])
+
+    ids: Dict[str, int] = {}
+    # Ids de los documentos del lote y de los casi duplicados del historial a los que apuntan
+    unique_keys = list(dict.fromkeys(keys + [match for match in matches if match is not None]))
+    for start in range(0, len(unique_keys), 500):
+        chunk = unique_keys[start:start + 500]
+        cursor.execute(
+            f"SELECT url_hash, id FROM result_documents WHERE url_hash IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        ids.update(cursor.fetchall())
+    document_ids = [ids[key] for key in keys]
+    if fingerprints:
+        index_fingerprints(cursor, document_ids, fingerprints)
+    links = {(ids[key], ids[match]) for key, match in zip(keys, matches) if match is not None}
+    if links:
+        cursor.executemany(
+            'UPDATE result_documents SET near_duplicate_of = ? WHERE id = ? AND near_duplicate_of IS NULL',
+            [(original, document_id) for document_id, original in links]
+        )
+    return document_ids
+
+def _create_documents_fts(cursor: sqlite3.Cursor):
+    """Índice FTS5 sobre result_documents (reemplaza al índice sobre search_results)"""
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS result_documents_fts USING fts5(
+                title, description, content, url,
+                content='result_documents', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite sin soporte FTS5, la búsqueda en historial usará LIKE: {e}")
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS result_documents_fts_insert AFTER INSERT ON result_documents BEGIN
+            INSERT INTO result_documents_fts (rowid, title, description, content, url)
+            VALUES (new.id, new.title, new.description, new.content, new.url);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS result_documents_fts_delete AFTER DELETE ON result_documents BEGIN
+            INSERT INTO result_documents_fts (result_documents_fts, rowid, title, description, content, url)
+            VALUES ('delete', old.id, old.title, old.description, old.content, old.url);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS result_documents_fts_update
+        AFTER UPDATE OF title, description, content, url ON result_documents BEGIN
+            INSERT INTO result_documents_fts (result_documents_fts, rowid, title, description, content, url)
+            VALUES ('delete', old.id, old.title, old.description, old.content, old.url);
+            INSERT INTO result_documents_fts (rowid, title, description, content, url)
+            VALUES (new.id, new.title, new.description, new.content, new.url);
+        END
+    ''')
+    cursor.execute("INSERT INTO result_documents_fts (result_documents_fts) VALUES ('rebuild')")
+
+def recount_search_results(cursor: sqlite3.Cursor):
+    """results_count = enlaces distintos de cada búsqueda (INSERT OR IGNORE colapsa los repetidos)"""
+    cursor.execute('''
+        UPDATE searches SET results_count = (
+            SELECT COUNT(*) FROM search_result_links l WHERE l.search_id = searches.id
+        )
+        WHERE id IN (SELECT search_id FROM search_result_links)
+    ''')
+
+def _migrate_results_to_documents(cursor: sqlite3.Cursor):
+    """Mueve search_results a documentos + enlaces y deja search_results como vista"""
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = 'search_results'")
+    row = cursor.fetchone()
+    if row and row[0] == 'table':
+        logger.info("Migrando search_results a almacenamiento por documento")
+        reader = cursor.connection.cursor()
+        reader.execute('''
+            SELECT id, search_id, source, result_type, title, url, description, content,
+                   timestamp, relevance_score, risk_level
+            FROM search_results ORDER BY id
+        ''')
+        columns = [col[0] for col in reader.description]
+        while True:
+            rows = [dict(zip(columns, values)) for values in reader.fetchmany(5000)]
+            if not rows:
+                break
+            document_ids = upsert_result_documents(cursor, rows)
+            # Se conserva el id del resultado como id del enlace
+            cursor.executemany('''
+                INSERT OR IGNORE INTO search_result_links
+                (id, search_id, document_id, source, relevance_score, risk_level, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (r['id'], r['search_id'], doc_id, r['source'], r['relevance_score'] or 0.0,
+                 r['risk_level'] or 'low', r['timestamp'])
+                for r, doc_id in zip(rows, document_ids)
+            ])
+        reader.close()
+        recount_search_results(cursor)
+
+        for trigger in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS search_results_fts_{trigger}')
+        cursor.execute('DROP TABLE IF EXISTS search_results_fts')
+        cursor.execute('DROP TABLE search_results')
+
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS search_results AS
+        SELECT l.id, l.search_id, l.source, d.result_type, d.title, d.url, d.description,
+               d.content, l.timestamp, l.relevance_score, l.risk_level, l.document_id
+        FROM search_result_links l
+        JOIN result_documents d ON d.id = l.document_id
+    ''')
+    _create_documents_fts(cursor)
+
+def analyze_tables(cursor: sqlite3.Cursor):
+    """ANALYZE sin estadísticas de las tablas internas de FTS5"""
+    cursor.execute('ANALYZE')
+    # Con sqlite_stat1 sobre las tablas sombra de FTS5 (tomadas vacías) los triggers
+    # usan malos planes y cada inserción cuesta más cuanto mayor es el índice
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%fts5%'")
+    for (name,) in cursor.fetchall():
+        cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl LIKE ? ESCAPE '\\'",
+                       (name.replace('_', '\\_') + '\\_%',))
+
+def _seed_admin_user(cursor: sqlite3.Cursor):
+    """Crea el usuario administrador por defecto si no existe"""
+    cursor.execute('SELECT COUNT(*) FROM users WHERE username = ?', ('admin',))
+    if cursor.fetchone()[0] == 0:
+        admin_password_hash = generate_password_hash('admin123')
+        cursor.execute('''
+            INSERT INTO users (username, email, password_hash, full_name, role, is_active, email_verified)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ('admin', 'admin@osint.local', admin_password_hash, 'Administrador', 'admin', 1, 1))
+
+OSINT_MIGRATIONS: List[Migration] = [
+    Migration(1, 'Esquema base', [
+        '''
+        CREATE TABLE IF NOT EXISTS searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER DEFAULT 1,
+            query TEXT NOT NULL,
+            search_type TEXT DEFAULT 'general',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            results_count INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS search_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_id INTEGER,
+            source TEXT,
+            result_type TEXT DEFAULT 'web',
+            title TEXT,
+            url TEXT,
+            description TEXT,
+            content TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            relevance_score REAL DEFAULT 0.0,
+            risk_level TEXT DEFAULT 'low',
+            FOREIGN KEY (search_id) REFERENCES searches (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_type TEXT DEFAULT 'daily',
+            date DATE,
+            title TEXT,
+            content TEXT,
+            format TEXT DEFAULT 'html',
+            file_path TEXT,
+            sent_at DATETIME,
+            status TEXT DEFAULT 'pending'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT,
+            role TEXT DEFAULT 'user',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_login DATETIME,
+            is_active BOOLEAN DEFAULT 1,
+            email_verified BOOLEAN DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            setting_name TEXT NOT NULL,
+            setting_value TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            UNIQUE(user_id, setting_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_report_configs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            report_name TEXT NOT NULL,
+            report_type TEXT DEFAULT 'daily',
+            frequency TEXT DEFAULT 'daily',
+            email_delivery BOOLEAN DEFAULT 1,
+            format TEXT DEFAULT 'html',
+            search_queries TEXT,
+            search_types TEXT,
+            enable_dorking BOOLEAN DEFAULT 0,
+            is_active BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            config_id INTEGER NOT NULL,
+            report_title TEXT,
+            report_content TEXT,
+            report_format TEXT,
+            file_path TEXT,
+            generated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME,
+            status TEXT DEFAULT 'pending',
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (config_id) REFERENCES user_report_configs (id)
+        )
+        '''
+    ]),
+    # Bases creadas con el esquema original (user_id TEXT 'anonymous')
+    Migration(2, 'searches.user_id como INTEGER', [_upgrade_searches_user_id]),
+    Migration(3, 'Usuario administrador por defecto', [_seed_admin_user]),
+    Migration(4, 'Índices de resultados, historial y dashboard', [
+        # Resultados de una búsqueda ya ordenados por relevancia (get_recent_results)
+        'CREATE INDEX IF NOT EXISTS idx_search_results_search_score '
+        'ON search_results (search_id, relevance_score DESC)',
+        # Historial por usuario: índice de cobertura para get_user_searches y el dashboard
+        'CREATE INDEX IF NOT EXISTS idx_searches_user_timestamp '
+        'ON searches (user_id, timestamp DESC, query, search_type, results_count, status)',
+        # Ventana temporal de get_recent_results
+        'CREATE INDEX IF NOT EXISTS idx_searches_timestamp ON searches (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_user_report_configs_user '
+        'ON user_report_configs (user_id, created_at DESC)',
+        'ANALYZE'
+    ]),
+    Migration(5, 'Índice de texto completo de resultados', [_create_results_fts]),
+    Migration(6, 'Resultados por documento con URL canónica', [
+        '''
+        CREATE TABLE IF NOT EXISTS result_documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url_hash TEXT NOT NULL UNIQUE,
+            canonical_url TEXT,
+            url TEXT,
+            source TEXT,
+            result_type TEXT DEFAULT 'web',
+            title TEXT,
+            description TEXT,
+            content TEXT,
+            first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            seen_count INTEGER DEFAULT 1
+        )
+        ''',
+        # Atributos que dependen de la búsqueda (relevancia, riesgo, motor)
+        '''
+        CREATE TABLE IF NOT EXISTS search_result_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_id INTEGER NOT NULL,
+            document_id INTEGER NOT NULL,
+            source TEXT,
+            relevance_score REAL DEFAULT 0.0,
+            risk_level TEXT DEFAULT 'low',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (search_id) REFERENCES searches (id),
+            FOREIGN KEY (document_id) REFERENCES result_documents (id)
+        )
+        ''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_search_result_links_search_document '
+        'ON search_result_links (search_id, document_id)',
+        'CREATE INDEX IF NOT EXISTS idx_search_result_links_search_score '
+        'ON search_result_links (search_id, relevance_score DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_search_result_links_document '
+        'ON search_result_links (document_id, search_id)',
+        _migrate_results_to_documents,
+        analyze_tables
+    ]),
+    Migration(7, 'Sin estadísticas del planificador en tablas FTS5', [analyze_tables]),
+    Migration(8, 'Estadísticas agregadas por usuario', [
+        '''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, metric, bucket)
+        ) WITHOUT ROWID
+        ''',
+        rebuild_user_stats
+    ]),
+    # Paginación por clave: el id desempata las filas con la misma clave de orden
+    Migration(9, 'Índices de paginación del historial y de resultados', [
+        'DROP INDEX IF EXISTS idx_searches_user_timestamp',
+        'CREATE INDEX IF NOT EXISTS idx_searches_user_timestamp_id '
+        'ON searches (user_id, timestamp DESC, id DESC, query, search_type, results_count, status)',
+        'DROP INDEX IF EXISTS idx_search_result_links_search_score',
+        'CREATE INDEX IF NOT EXISTS idx_search_result_links_search_score_id '
+        'ON search_result_links (search_id, relevance_score DESC, id DESC)',
+        # Filtro por nivel de riesgo ordenado por relevancia
+        'CREATE INDEX IF NOT EXISTS idx_search_result_links_search_risk '
+        'ON search_result_links (search_id, risk_level, relevance_score DESC, id DESC)',
+        analyze_tables
+    ]),
+    # Huellas SimHash de documentos y sus bandas LSH para detectar casi duplicados
+    Migration(10, 'Huellas de casi duplicados de documentos', [
+        '''
+        CREATE TABLE IF NOT EXISTS document_fingerprints (
+            document_id INTEGER PRIMARY KEY,
+            simhash INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS document_simhash_bands (
+            bucket INTEGER NOT NULL,
+            document_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, document_id)
+        ) WITHOUT ROWID
+        ''',
+        # Sin índice por document_id: las bandas del documento se recalculan desde su huella
+        '''
+        CREATE TRIGGER IF NOT EXISTS result_documents_fingerprint_delete AFTER DELETE ON result_documents BEGIN
+            DELETE FROM document_simhash_bands WHERE document_id = old.id AND bucket IN (
+                SELECT simhash & 65535 FROM document_fingerprints WHERE document_id = old.id
+                UNION ALL SELECT 65536 | ((simhash >> 16) & 65535) FROM document_fingerprints WHERE document_id = old.id
+                UNION ALL SELECT 131072 | ((simhash >> 32) & 65535) FROM document_fingerprints WHERE document_id = old.id
+                UNION ALL SELECT 196608 | ((simhash >> 48) & 65535) FROM document_fingerprints WHERE document_id = old.id
+            );
+            DELETE FROM document_fingerprints WHERE document_id = old.id;
+        END
+        ''',
+        backfill_fingerprints,
+        analyze_tables
+    ]),
+    # Trabajos en segundo plano: estado y progreso visibles desde cualquier proceso
+    Migration(11, 'Cola de trabajos de investigación', [
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            params TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            step TEXT,
+            progress_done INTEGER DEFAULT 0,
+            progress_total INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs (user_id, created_at DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at)',
+        # Resultados parciales en el orden en que terminó cada módulo
+        '''
+        CREATE TABLE IF NOT EXISTS job_events (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            step TEXT,
+            results TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, seq)
+        ) WITHOUT ROWID
+        '''
+    ]),
+    # Bases ya migradas a documentos con contadores que incluían resultados repetidos
+    Migration(12, 'Contador de resultados por enlaces distintos', [
+        recount_search_results,
+        rebuild_user_stats
+    ]),
+    # Los casi duplicados del historial se enlazan en vez de guardarse bajo el documento anterior
+    Migration(13, 'Enlace a casi duplicados anteriores', [
+        'ALTER TABLE result_documents ADD COLUMN near_duplicate_of INTEGER REFERENCES result_documents (id)',
+        'CREATE INDEX IF NOT EXISTS idx_result_documents_near_duplicate '
+        'ON result_documents (near_duplicate_of) WHERE near_duplicate_of IS NOT NULL',
+        '''
+        CREATE TRIGGER IF NOT EXISTS result_documents_near_duplicate_delete AFTER DELETE ON result_documents BEGIN
+            UPDATE result_documents SET near_duplicate_of = NULL WHERE near_duplicate_of = old.id;
+        END
+        '''
+    ]),
+    # Pausas por bloqueo de cada motor, compartidas por todos los procesos del servidor
+    Migration(14, 'Pausas compartidas de motores bloqueados', [
+        '''
+        CREATE TABLE IF NOT EXISTS engine_blocks (
+            engine TEXT PRIMARY KEY,
+            blocked_until REAL NOT NULL
+        )
+        '''
+    ]),
+]
+
+def _ensure_version_table(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def current_version(pool: SQLiteConnectionManager) -> int:
+    """Versión de esquema aplicada (0 si la base no tiene migraciones)"""
+    rows = pool.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+    if not rows:
+        return 0
+    return pool.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')[0][0]
+
+def apply_migrations(pool: SQLiteConnectionManager,
+                     migrations: Sequence[Migration] = OSINT_MIGRATIONS) -> int:
+    """Aplica en orden las migraciones pendientes. Retorna cuántas se aplicaron"""
+    target = max((m.version for m in migrations), default=0)
+    if current_version(pool) >= target:
+        return 0
+
+    applied = 0
+    for migration in sorted(migrations, key=lambda m: m.version):
+        # Cada migración en su propia transacción; se vuelve a comprobar la versión
+        # dentro del lock de escritura por si otro proceso la aplicó en paralelo
+        with pool.transaction() as cursor:
+            _ensure_version_table(cursor)
+            cursor.execute('SELECT 1 FROM schema_version WHERE version = ?', (migration.version,))
+            if cursor.fetchone():
+                continue
+
+            logger.info(f"Aplicando migración {migration.version}: {migration.description}")
+            for step in migration.steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (migration.version, migration.description)
+            )
+            applied += 1
+
+    return applied
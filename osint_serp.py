@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Extractores de páginas de resultados (SERP) por motor de búsqueda
+Usa lxml restringido a los contenedores de resultados cuando está disponible y
+BeautifulSoup con SoupStrainer como alternativa
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Type
+from urllib.parse import parse_qs, urlparse
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    lxml = None
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+def _clean(text: Optional[str]) -> str:
+    return _WHITESPACE.sub(' ', text or '').strip()
+
+def _xpath_class(name: str) -> str:
+    """Condición XPath equivalente al selector CSS .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _has_class(tag: Tag, name: str) -> bool:
+    classes = tag.get('class') or []
+    return name in classes
+
+def _class_filter(*names: str):
+    """Filtro de clase para SoupStrainer/find_all que acepta atributos multivalor"""
+    return lambda value: bool(value) and any(name in value.split() for name in names)
+
+def unwrap_redirect(href: str) -> str:
+    """Extrae la URL real de los enlaces de redirección de Google y DuckDuckGo"""
+    if not href:
+        return ''
+    if href.startswith('//'):
+        href = 'https:' + href
+    parsed = urlparse(href)
+    if parsed.path in ('/url', '/l/') or parsed.path.endswith('/l/'):
+        params = parse_qs(parsed.query)
+        for param in ('q', 'url', 'uddg'):
+            if params.get(param) and params[param][0].startswith('http'):
+                return params[param][0]
+    return href
+
+class SERPExtractor:
+    """Extractor base: obtiene título, URL y snippet de cada resultado orgánico"""
+
+    engine = ''
+
+    def __init__(self, backend: Optional[str] = None):
+        if backend is None:
+            backend = 'lxml' if LXML_AVAILABLE else 'soup'
+        if backend == 'lxml' and not LXML_AVAILABLE:
+            raise ValueError("El backend 'lxml' no está disponible")
+        self.backend = backend
+
+    def extract(self, html: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Extrae resultados [{'title', 'url', 'description'}] de una página"""
+        if not html:
+            return []
+        try:
+            if self.backend == 'lxml':
+                raw = self._extract_lxml(html)
+            else:
+                raw = self._extract_soup(html)
+        except Exception as e:
+            logger.error(f"Error parseando resultados de {self.engine}: {e}")
+            return []
+
+        results = []
+        seen = set()
+        for item in raw:
+            url = unwrap_redirect(item.get('url', ''))
+            if not url.startswith('http') or url in seen:
+                continue
+            seen.add(url)
+            results.append({
+                'title': _clean(item.get('title')),
+                'url': url,
+                'description': _clean(item.get('description'))
+            })
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def _extract_lxml(self, html: str) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def _extract_soup(self, html: str) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+class GoogleExtractor(SERPExtractor):
+    """Resultados orgánicos de Google (div.g / div.tF2Cxc)"""
+
+    engine = 'google'
+    container_classes = ('g', 'tF2Cxc')
+    snippet_classes = ('VwiC3b', 'IsZvec', 'aCOpRe', 'st')
+
+    def _extract_lxml(self, html: str) -> List[Dict[str, str]]:
+        tree = lxml.html.fromstring(html)
+        containers = []
+        for name in self.container_classes:
+            # Solo contenedores de primer nivel para no duplicar resultados anidados
+            containers = tree.xpath(f"//div[{_xpath_class(name)}][not(ancestor::div[{_xpath_class(name)}])]")
+            if containers:
+                break
+
+        snippet_xpath = './/*[' + ' or '.join(_xpath_class(name) for name in self.snippet_classes) + ']'
+        items = []
+        for container in containers:
+            title = container.xpath('.//h3')
+            links = container.xpath('.//a[@href]')
+            if not title or not links:
+                continue
+            snippet = container.xpath(snippet_xpath)
+            items.append({
+                'title': title[0].text_content(),
+                'url': links[0].get('href', ''),
+                'description': snippet[0].text_content() if snippet else ''
+            })
+        return items
+
+    def _extract_soup(self, html: str) -> List[Dict[str, str]]:
+        strainer = SoupStrainer('div', class_=_class_filter(*self.container_classes))
+        soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+
+        containers = []
+        for name in self.container_classes:
+            containers = [div for div in soup.find_all('div', class_=name)
+                          if not any(_has_class(parent, name) for parent in div.find_parents('div'))]
+            if containers:
+                break
+
+        items = []
+        for container in containers:
+            title = container.find('h3')
+            link = container.find('a', href=True)
+            if not title or not link:
+                continue
+            snippet = container.find(class_=_class_filter(*self.snippet_classes))
+            items.append({
+                'title': title.get_text(),
+                'url': str(link.get('href', '')),
+                'description': snippet.get_text() if snippet else ''
+            })
+        return items
+
+class BingExtractor(SERPExtractor):
+    """Resultados orgánicos de Bing (li.b_algo)"""
+
+    engine = 'bing'
+
+    def _extract_lxml(self, html: str) -> List[Dict[str, str]]:
+        tree = lxml.html.fromstring(html)
+        items = []
+        for container in tree.xpath(f"//li[{_xpath_class('b_algo')}]"):
+            links = container.xpath('.//h2//a[@href]')
+            if not links:
+                continue
+            snippet = container.xpath(f".//*[{_xpath_class('b_caption')}]//p") or container.xpath('.//p')
+            items.append({
+                'title': links[0].text_content(),
+                'url': links[0].get('href', ''),
+                'description': snippet[0].text_content() if snippet else ''
+            })
+        return items
+
+    def _extract_soup(self, html: str) -> List[Dict[str, str]]:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('li', class_=_class_filter('b_algo')))
+        items = []
+        for container in soup.find_all('li', class_='b_algo'):
+            heading = container.find('h2')
+            link = heading.find('a', href=True) if heading else None
+            if not link:
+                continue
+            caption = container.find(class_='b_caption')
+            snippet = (caption.find('p') if caption else None) or container.find('p')
+            items.append({
+                'title': link.get_text(),
+                'url': str(link.get('href', '')),
+                'description': snippet.get_text() if snippet else ''
+            })
+        return items
+
+class DuckDuckGoExtractor(SERPExtractor):
+    """Resultados de la versión HTML de DuckDuckGo (div.result)"""
+
+    engine = 'duckduckgo'
+
+    def _extract_lxml(self, html: str) -> List[Dict[str, str]]:
+        tree = lxml.html.fromstring(html)
+        items = []
+        for container in tree.xpath(f"//div[{_xpath_class('result')}]"):
+            links = container.xpath(f".//a[{_xpath_class('result__a')}]")
+            if not links:
+                continue
+            snippet = container.xpath(f".//*[{_xpath_class('result__snippet')}]")
+            items.append({
+                'title': links[0].text_content(),
+                'url': links[0].get('href', ''),
+                'description': snippet[0].text_content() if snippet else ''
+            })
+        return items
+
+    def _extract_soup(self, html: str) -> List[Dict[str, str]]:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_=_class_filter('result')))
+        items = []
+        for container in soup.find_all('div', class_='result'):
+            link = container.find('a', class_='result__a')
+            if not link:
+                continue
+            snippet = container.find(class_='result__snippet')
+            items.append({
+                'title': link.get_text(),
+                'url': str(link.get('href', '')),
+                'description': snippet.get_text() if snippet else ''
+            })
+        return items
+
+_EXTRACTORS: Dict[str, Type[SERPExtractor]] = {}
+_instances: Dict[tuple, SERPExtractor] = {}
+
+def register_extractor(engine: str, extractor_cls: Type[SERPExtractor]):
+    """Registra (o reemplaza) el extractor de un motor"""
+    _EXTRACTORS[engine] = extractor_cls
+    for key in [key for key in _instances if key[0] == engine]:
+        _instances.pop(key, None)
+
+def get_extractor(engine: str, backend: Optional[str] = None) -> SERPExtractor:
+    """Obtiene la instancia compartida del extractor de un motor"""
+    key = (engine, backend)
+    extractor = _instances.get(key)
+    if extractor is None:
+        if engine not in _EXTRACTORS:
+            raise KeyError(f"No hay extractor registrado para el motor: {engine}")
+        extractor = _EXTRACTORS[engine](backend)
+        _instances[key] = extractor
+    return extractor
+
+def available_extractors() -> List[str]:
+    return list(_EXTRACTORS.keys())
+
+register_extractor('google', GoogleExtractor)
+register_extractor('bing', BingExtractor)
+register_extractor('duckduckgo', DuckDuckGoExtractor)
@@ -3,7 +3,6 @@
 Herramientas OSINT especializadas para casos específicos
 """
 
-import requests
 import json
 import hashlib
 import base64
@@ -18,16 +17,19 @@ import os
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 
+from osint_serp import get_extractor
+from osint_http import http_session
+from osint_dns import gethostbyname, resolve
+
 logger = logging.getLogger(__name__)
 
 class LeakChecker:
     """Verificador de filtraciones de datos"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='leaks')
     
     def check_email_breaches(self, email: str) -> Dict[str, Any]:
         """Verifica si un email aparece en filtraciones conocidas"""
@@ -96,10 +98,9 @@ class PastebinSearcher:
     """Buscador en sitios de pastebin"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='pastebin')
         
         # Sitios de pastebin conocidos
         self.pastebin_sites = [
@@ -147,31 +148,14 @@ class PastebinSearcher:
             }
             
             response = self.session.get(url, params=params, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extraer resultados usando parsing de texto
-            import re
-            
-            # Buscar patrones de títulos y enlaces
-            title_pattern = r'<h3[^>]*>([^<]+)</h3>'
-            link_pattern = r'<a[^>]+href="([^"]+)"'
             
-            titles = re.findall(title_pattern, response.text, re.IGNORECASE)
-            links = re.findall(link_pattern, response.text, re.IGNORECASE)
-            
-            # Combinar títulos y enlaces
-            for i, title in enumerate(titles[:10]):
-                title_clean = re.sub(r'<[^>]+>', '', title).strip()
-                link = links[i] if i < len(links) else ''
-                
-                # Limpiar enlace de Google
-                if '/url?q=' in link:
-                    link = link.split('/url?q=')[1].split('&')[0]
-                
-                if title_clean and len(title_clean) > 5:
+            # Título, enlace y snippet salen del mismo contenedor de resultado
+            for item in get_extractor('google').extract(response.text, limit=10):
+                if item['title'] and len(item['title']) > 5:
                     results.append({
-                        'title': title_clean,
-                        'url': link,
+                        'title': item['title'],
+                        'url': item['url'],
+                        'description': item['description'],
                         'source': 'google_search',
                         'query': query
                     })
@@ -185,10 +169,9 @@ class GitHubInvestigator:
     """Investigador de GitHub"""
     
     def __init__(self, github_token: Optional[str] = None):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, namespace='github')
         
         if github_token:
             self.session.headers['Authorization'] = f'token {github_token}'
@@ -334,7 +317,7 @@ class CertificateAnalyzer:
     """Analizador de certificados SSL/TLS"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_session(namespace='certificates')
     
     def analyze_certificate(self, domain: str) -> Dict[str, Any]:
         """Analiza el certificado SSL de un dominio"""
@@ -352,7 +335,7 @@ class CertificateAnalyzer:
             import socket
             
             context = ssl.create_default_context()
-            with socket.create_connection((domain, 443), timeout=10) as sock:
+            with socket.create_connection((gethostbyname(domain), 443), timeout=10) as sock:
                 with context.wrap_socket(sock, server_hostname=domain) as ssock:
                     cert = ssock.getpeercert()
                     
@@ -411,7 +394,7 @@ class DNSAnalyzer:
     """Analizador avanzado de DNS"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_session(namespace='dns')
     
     def comprehensive_dns_analysis(self, domain: str) -> Dict[str, Any]:
         """Análisis completo de DNS"""
@@ -453,14 +436,12 @@ class DNSAnalyzer:
     
     def _get_basic_records(self, domain: str) -> Dict[str, Any]:
         """Obtiene registros DNS básicos"""
-        import dns.resolver
-        
         records = {}
         record_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME', 'SOA', 'PTR']
         
         for record_type in record_types:
             try:
-                answers = dns.resolver.resolve(domain, record_type)
+                answers = resolve(domain, record_type)
                 records[record_type] = [str(rdata) for rdata in answers]
             except:
                 records[record_type] = []
@@ -469,8 +450,6 @@ class DNSAnalyzer:
     
     def _analyze_mx_records(self, domain: str) -> Dict[str, Any]:
         """Analiza registros MX"""
-        import dns.resolver
-        
         mx_info = {
             'records': [],
             'providers': [],
@@ -478,7 +457,7 @@ class DNSAnalyzer:
         }
         
         try:
-            answers = dns.resolver.resolve(domain, 'MX')
+            answers = resolve(domain, 'MX')
             for mx in answers:
                 # mx.to_text() returns something like '10 mail.example.com.'
                 parts = mx.to_text().split()
@@ -504,8 +483,6 @@ class DNSAnalyzer:
     
     def _analyze_ns_records(self, domain: str) -> Dict[str, Any]:
         """Analiza registros NS"""
-        import dns.resolver
-        
         ns_info = {
             'records': [],
             'providers': [],
@@ -513,7 +490,7 @@ class DNSAnalyzer:
         }
         
         try:
-            answers = dns.resolver.resolve(domain, 'NS')
+            answers = resolve(domain, 'NS')
             for ns in answers:
                 ns_server = str(ns).lower()
                 ns_info['records'].append(ns_server)
@@ -532,8 +509,6 @@ class DNSAnalyzer:
     
     def _analyze_txt_records(self, domain: str) -> Dict[str, Any]:
         """Analiza registros TXT"""
-        import dns.resolver
-        
         txt_info = {
             'records': [],
             'spf': [],
@@ -543,7 +518,7 @@ class DNSAnalyzer:
         }
         
         try:
-            answers = dns.resolver.resolve(domain, 'TXT')
+            answers = resolve(domain, 'TXT')
             for txt in answers:
                 txt_value = str(txt).strip('"')
                 txt_info['records'].append(txt_value)
@@ -566,7 +541,7 @@ class ExifAnalyzer:
     """Analizador de metadatos EXIF"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = http_session(namespace='exif')
     
     def analyze_image_url(self, image_url: str) -> Dict[str, Any]:
         """Analiza metadatos EXIF de una imagen desde URL"""
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Capa de acceso a SQLite compartida por la base de datos OSINT y las cachés
+Mantiene una conexión persistente por hilo con WAL y pragmas ajustados, y
+expone una API de transacciones basada en context managers
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS: Dict[str, Union[int, str]] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,        # ~20 MB de caché de páginas por conexión
+    'mmap_size': 268435456,      # 256 MB
+    'wal_autocheckpoint': 1000
+}
+
+class _PooledConnection(sqlite3.Connection):
+    """Subclase que admite weakrefs: la conexión se cierra al terminar su hilo"""
+
+class SQLiteConnectionManager:
+    """Conexiones SQLite persistentes por hilo (y por proceso) con WAL y busy timeout"""
+
+    def __init__(self, db_path: str, timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Union[int, str]]] = None,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None: las transacciones se controlan explícitamente con BEGIN
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=_PooledConnection
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.timeout * 1000)}')
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f'PRAGMA {name} = {value}')
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"No se pudo aplicar PRAGMA {name} en {self.db_path}: {e}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexión persistente del hilo actual (se reabre tras un fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid() or self._local.generation != self._generation:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.generation = self._generation
+            self._local.depth = 0
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Cursor]:
+        """Transacción con commit/rollback automático; las anidadas usan SAVEPOINT"""
+        conn = self.connection()
+        cursor = conn.cursor()
+        depth = self._local.depth
+
+        if depth == 0:
+            cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        else:
+            cursor.execute(f'SAVEPOINT sp_{depth}')
+        self._local.depth = depth + 1
+
+        try:
+            yield cursor
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+            else:
+                cursor.execute(f'ROLLBACK TO sp_{depth}')
+                cursor.execute(f'RELEASE sp_{depth}')
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+            else:
+                cursor.execute(f'RELEASE sp_{depth}')
+        finally:
+            self._local.depth = depth
+            cursor.close()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        """Cursor de lectura sobre la conexión del hilo (sin abrir transacción de escritura)"""
+        cursor = self.connection().cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Ejecuta una consulta de lectura y retorna todas las filas"""
+        with self.read() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def close_all(self):
+        """Cierra todas las conexiones abiertas por este gestor en el proceso actual"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+            # Los hilos que aún guardan una conexión cerrada abrirán una nueva
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Estadísticas agregadas por usuario para el dashboard y el panel de administración
+Los contadores viven en la tabla user_stats (usuario, métrica, categoría) y se
+actualizan en la misma transacción que guarda búsquedas y resultados, de modo que
+leerlos es una consulta por clave primaria sobre todo el historial del usuario
+"""
+
+import sqlite3
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from osint_keywords import get_classifier
+
+# Contadores globales (usuarios, búsquedas, reportes) bajo un usuario reservado
+SYSTEM_USER_ID = 0
+
+# Nivel de riesgo asignado a cada tipo de búsqueda en el dashboard
+HIGH_RISK_SEARCH_TYPES = {'advanced', 'government', 'judicial'}
+MEDIUM_RISK_SEARCH_TYPES = {'business', 'news', 'academic'}
+
+OTHER_REGION = 'otros'
+
+# De mayor a menor riesgo
+RISK_LEVELS = ('high', 'medium', 'low')
+
+StatDelta = Tuple[int, str, str, int]
+
+def search_risk(search_type: Optional[str]) -> str:
+    if search_type in HIGH_RISK_SEARCH_TYPES:
+        return 'high'
+    if search_type in MEDIUM_RISK_SEARCH_TYPES:
+        return 'medium'
+    return 'low'
+
+def region_buckets() -> List[str]:
+    """Regiones del dashboard, en el orden de la tabla de palabras clave"""
+    return list(get_classifier('regions').categories) + [OTHER_REGION]
+
+def search_deltas(user_id: int, query: str, search_type: Optional[str],
+                  timestamp: Optional[datetime] = None) -> List[StatDelta]:
+    """Incrementos que produce una búsqueda en las estadísticas de su usuario"""
+    # searches.timestamp usa CURRENT_TIMESTAMP (UTC); lunes = 0
+    weekday = (timestamp or datetime.now(timezone.utc)).weekday()
+    return [
+        (user_id, 'searches', 'total', 1),
+        (user_id, 'risk', search_risk(search_type), 1),
+        (user_id, 'search_type', search_type or 'general', 1),
+        (user_id, 'weekday', str(weekday), 1),
+        (user_id, 'region', get_classifier('regions').first_category(query or '', OTHER_REGION), 1),
+        (SYSTEM_USER_ID, 'system', 'searches', 1),
+    ]
+
+def increment_stats(cursor: sqlite3.Cursor, deltas: Iterable[StatDelta]):
+    """Suma los incrementos a user_stats (usar dentro de la transacción que los origina)"""
+    merged = Counter()
+    for user_id, metric, bucket, value in deltas:
+        merged[(user_id, metric, bucket)] += value
+    cursor.executemany('''
+        INSERT INTO user_stats (user_id, metric, bucket, value) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, metric, bucket) DO UPDATE SET value = value + excluded.value
+    ''', [(user_id, metric, bucket, value) for (user_id, metric, bucket), value in merged.items() if value])
+
+def rebuild_user_stats(cursor: sqlite3.Cursor, batch_size: int = 5000):
+    """Recalcula user_stats desde cero a partir de las tablas de origen"""
+    cursor.execute('DELETE FROM user_stats')
+
+    totals = Counter()
+    cursor.execute('SELECT user_id, query, search_type, timestamp, results_count FROM searches')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for user_id, query, search_type, timestamp, results_count in rows:
+            try:
+                when = datetime.fromisoformat(str(timestamp)[:19]) if timestamp else None
+            except ValueError:
+                when = None
+            for key_user, metric, bucket, value in search_deltas(user_id, query, search_type, when):
+                totals[(key_user, metric, bucket)] += value
+            totals[(user_id, 'results', 'total')] += results_count or 0
+
+    for table, bucket in (('users', 'users'), ('user_report_configs', 'reports')):
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        totals[(SYSTEM_USER_ID, 'system', bucket)] = cursor.fetchone()[0]
+
+    increment_stats(cursor, ((user_id, metric, bucket, value)
+                             for (user_id, metric, bucket), value in totals.items()))
+
+def read_user_stats(cursor: sqlite3.Cursor, user_id: int) -> Dict[str, Dict[str, int]]:
+    """Contadores de un usuario: {métrica: {categoría: valor}}"""
+    cursor.execute('SELECT metric, bucket, value FROM user_stats WHERE user_id = ?', (user_id,))
+    stats: Dict[str, Dict[str, int]] = {}
+    for metric, bucket, value in cursor.fetchall():
+        stats.setdefault(metric, {})[bucket] = value
+    return stats
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Canonicalización de URLs y claves de contenido para deduplicar resultados
+Dos variantes de la misma página (http/https, parámetros de seguimiento, barra
+final, enlaces envueltos por /url?q=) producen la misma URL canónica y el mismo hash
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from osint_serp import unwrap_redirect
+
+# Parámetros de seguimiento/campaña que no cambian el contenido de la página. `ref` no
+# está: en muchos sitios elige contenido (p. ej. la rama en la API de GitHub)
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src', 'spm', 'srsltid'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+# Parámetros de sesión de los propios motores; fuera de sus dominios pueden significar otra cosa
+SEARCH_ENGINE_PARAMS = {'ved', 'usg', 'ei', 'sa'}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def _is_search_engine_host(host: str) -> bool:
+    """google.<tld> (incluido google.com.co) y bing.com, con cualquier subdominio"""
+    labels = host.lower().split('.')
+    return 'google' in labels[:-1] or host.lower() == 'bing.com' or host.lower().endswith('.bing.com')
+
+def _is_tracking_param(name: str, search_engine: bool = False) -> bool:
+    name = name.lower()
+    return (name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+            or (search_engine and name in SEARCH_ENGINE_PARAMS))
+
+def canonicalize_url(url: str) -> str:
+    """Retorna la forma canónica de una URL (cadena vacía si no es http/https)"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if url.startswith('//') or '/url?' in url or '/l/?' in url:
+        url = unwrap_redirect(url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return ''
+
+    host = (parts.hostname or '').rstrip('.')
+    if not host:
+        return ''
+    if ':' in host:
+        host = f'[{host}]'
+    try:
+        port = parts.port
+    except ValueError:
+        return ''
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+
+    path = parts.path or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    search_engine = _is_search_engine_host(host)
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name, search_engine)
+    ))
+
+    # http y https se consideran el mismo documento; se conserva https
+    return urlunsplit(('https', netloc, path, query, ''))
+
+def url_hash(canonical_url: str) -> str:
+    return hashlib.sha256(canonical_url.encode('utf-8')).hexdigest()
+
+def document_key(result: Dict[str, Any], canonical: Optional[str] = None) -> str:
+    """Clave de contenido de un resultado: hash de su URL canónica, o de su texto si no tiene URL"""
+    if canonical is None:
+        canonical = canonicalize_url(result.get('url', ''))
+    if canonical:
+        return url_hash(canonical)
+    text = '\x1f'.join(str(result.get(field) or '') for field in ('source', 'title', 'description', 'content'))
+    return url_hash('content:' + text)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Cola de escritura diferida (write-behind) para resultados de búsqueda
+Agrupa las inserciones de muchas búsquedas concurrentes y las escribe en lotes,
+en una sola transacción, cuando se alcanza un tamaño o un intervalo de tiempo
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ResultBatch = List[Tuple[int, List[Dict[str, Any]]]]
+
+class ResultWriteQueue:
+    """Cola en proceso que escribe lotes de (search_id, resultados) con un único hilo.
+    Si un lote falla se reintenta cada búsqueda por separado; las que vuelven a fallar
+    se entregan a mark_failed"""
+
+    def __init__(self, write_batch: Callable[[ResultBatch], None], max_batch_rows: int = 500,
+                 flush_interval: float = 0.5, max_pending: int = 10000,
+                 mark_failed: Optional[Callable[[List[int]], None]] = None):
+        self.write_batch = write_batch
+        self.mark_failed = mark_failed
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'batches': 0, 'rows': 0, 'searches': 0, 'errors': 0, 'failed': 0}
+
+        atexit.register(self.close)
+
+    def _ensure_worker(self) -> queue.Queue:
+        """Arranca el hilo escritor de forma perezosa (y de nuevo tras un fork)"""
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=self.max_pending)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def submit(self, search_id: int, results: List[Dict[str, Any]]):
+        """Encola los resultados de una búsqueda (bloquea si la cola está llena)"""
+        if self._closed:
+            self.write_batch([(search_id, results)])
+            return
+        self._ensure_worker().put((search_id, results))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se escriba todo lo encolado hasta ahora"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 30.0):
+        """Vacía la cola y detiene el hilo escritor"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        pending: ResultBatch = []
+        pending_rows = 0
+        deadline = None
+        waiters: List[threading.Event] = []
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # venció el intervalo de escritura
+
+            stop = item is None
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item:
+                pending.append(item)
+                pending_rows += len(item[1])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (stop or waiters or item is False or pending_rows >= self.max_batch_rows):
+                self._write(pending, pending_rows)
+                pending, pending_rows, deadline = [], 0, None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+            if stop:
+                return
+
+    def _write(self, batch: ResultBatch, rows: int):
+        try:
+            self.write_batch(batch)
+            self.stats['batches'] += 1
+            self.stats['rows'] += rows
+            self.stats['searches'] += len(batch)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error escribiendo lote de {len(batch)} búsquedas ({rows} resultados): {e}")
+            failed = [batch[0][0]] if len(batch) == 1 else self._write_each(batch)
+            if failed:
+                self._mark_failed(failed)
+
+    def _write_each(self, batch: ResultBatch) -> List[int]:
+        """Reintenta búsqueda a búsqueda: una fila problemática no arrastra al resto del lote"""
+        failed = []
+        for search_id, results in batch:
+            try:
+                self.write_batch([(search_id, results)])
+                self.stats['rows'] += len(results)
+                self.stats['searches'] += 1
+            except Exception as e:
+                logger.error(f"Error escribiendo los resultados de la búsqueda {search_id}: {e}")
+                failed.append(search_id)
+        return failed
+
+    def _mark_failed(self, search_ids: List[int]):
+        self.stats['failed'] += len(search_ids)
+        if self.mark_failed is None:
+            return
+        try:
+            self.mark_failed(search_ids)
+        except Exception as e:
+            logger.error(f"Error marcando como fallidas las búsquedas {search_ids}: {e}")
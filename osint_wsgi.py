@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Servidor de producción de la interfaz web
+Ejecuta FlaskWebInterface.app con gunicorn (varios procesos, cada uno con varios
+hilos). La aplicación se construye una sola vez en el proceso maestro antes de
+crear los workers, que comparten por copy-on-write plantillas, configuración y
+modelos cargados; conexiones SQLite, pools de hilos y sockets se reabren en
+cada worker. El maestro no ejecuta hilos: la retención programada corre en un
+proceso de mantenimiento aparte; max_concurrent_searches y el ritmo de cada motor
+se reparten entre los workers, y las pausas por bloqueo se comparten en SQLite.
+Sin gunicorn (p. ej. en Windows) se usa waitress con un proceso
+
+Uso: python osint_wsgi.py [--config osint_config.json] [--bind 0.0.0.0:5000] [--workers 4] [--threads 8]
+
+Recarga sin cortar conexiones: kill -HUP $(cat logs/osint_wsgi.pid) reemplaza los workers
+uno a uno; con la app precargada, los cambios de código requieren reiniciar el maestro
+"""
+
+import argparse
+import configparser
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from MCP import (EnhancedOSINTSearcher, create_config_from_json, create_web_interface, ensure_config_file,
+                 start_maintenance_scheduler)
+from osint_archive import PLATFORM_CONF_PATH
+
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    BaseApplication = object
+    GUNICORN_AVAILABLE = False
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de la sección [server] de config/osint_platform.conf
+DEFAULT_SERVER_SETTINGS: Dict[str, Any] = {
+    'server': 'auto',
+    'bind': '',
+    'workers': 0,
+    'threads': 8,
+    'timeout': 120,
+    'graceful_timeout': 30,
+    'keepalive': 5,
+    'max_requests': 1000,
+    'max_requests_jitter': 100,
+    'backlog': 2048,
+    'preload': True,
+    'pidfile': 'logs/osint_wsgi.pid',
+    'accesslog': '',
+}
+
+def load_server_settings(path: str = PLATFORM_CONF_PATH) -> Dict[str, Any]:
+    """Lee la sección [server] de la configuración de la plataforma"""
+    settings = dict(DEFAULT_SERVER_SETTINGS)
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding='utf-8')
+        for key, default in DEFAULT_SERVER_SETTINGS.items():
+            if isinstance(default, bool):
+                settings[key] = parser.getboolean('server', key, fallback=default)
+            elif isinstance(default, int):
+                settings[key] = parser.getint('server', key, fallback=default)
+            else:
+                settings[key] = parser.get('server', key, fallback=default)
+    except (configparser.Error, ValueError) as e:
+        logger.error(f"Error leyendo la sección [server] desde {path}: {e}")
+    return settings
+
+def default_workers() -> int:
+    """Las búsquedas esperan sobre todo red: 2 procesos por CPU más uno, hasta 8
+    (SQLite admite un solo escritor a la vez, más procesos solo compiten por el lock)"""
+    return min(multiprocessing.cpu_count() * 2 + 1, 8)
+
+def create_app(config_path: str = "osint_config.json", start_scheduler: bool = True):
+    """Aplicación WSGI de la interfaz web"""
+    return create_web_interface(config_path, start_scheduler).app
+
+def share_worker_limits(app, workers: int):
+    """Reparte entre los workers los límites configurados para el servidor entero: trabajos
+    simultáneos y ritmo de cada motor. Cada worker conserva al menos un trabajo, así que con
+    más workers que trabajos el total real es el número de workers"""
+    interface = app.extensions.get('osint_web_interface')
+    if interface is None or workers <= 1:
+        return
+    jobs = interface.jobs
+    total = jobs.max_workers
+    jobs.max_workers = max(1, total // workers)
+    if total < workers:
+        logger.warning(f"max_concurrent_searches={total} con {workers} workers: se admiten {workers} "
+                       f"trabajos simultáneos (uno por worker)")
+    interface.osint_searcher.rate_limiters.scale(1.0 / workers)
+    logger.info(f"Por worker: {jobs.max_workers} trabajos simultáneos y 1/{workers} del ritmo de cada motor")
+
+def run_maintenance(config_path: str):
+    """Proceso de mantenimiento: la retención diaria fuera del maestro de gunicorn, que
+    no debe tener hilos propios al hacer fork de los workers"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = create_config_from_json(config_path)
+    thread = start_maintenance_scheduler(EnhancedOSINTSearcher(config), config)
+    if thread is not None:
+        thread.join()
+
+def start_maintenance_process(config_path: str) -> Optional[multiprocessing.Process]:
+    """Arranca run_maintenance en un intérprete nuevo (spawn: no hereda nada del maestro)"""
+    if not create_config_from_json(config_path).retention_enabled:
+        return None
+    process = multiprocessing.get_context('spawn').Process(
+        target=run_maintenance, args=(config_path,), name='osint-maintenance', daemon=True
+    )
+    process.start()
+    return process
+
+def prepare_for_fork(app):
+    """Cierra en el maestro lo que no debe heredarse abierto: las conexiones SQLite.
+    Los workers abren las suyas; pools de hilos, cliente HTTP y resolver DNS ya se
+    recrean solos al detectar otro pid"""
+    interface = app.extensions.get('osint_web_interface')
+    if interface is None:
+        return
+    searcher = interface.osint_searcher
+    if searcher.result_writer:
+        searcher.result_writer.flush()
+    for cache in (searcher.serp_cache, searcher.search_cache):
+        if cache is not None:
+            cache.pool.close_all()
+    searcher.db.pool.close_all()
+
+class OSINTGunicornApplication(BaseApplication):
+    """gunicorn embebido: mismas opciones que su CLI, aplicación ya construida"""
+
+    def __init__(self, app, options: Dict[str, Any]):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+def gunicorn_options(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Opciones de gunicorn a partir de la sección [server]"""
+    workers = settings['workers'] or default_workers()
+    options = {
+        'bind': settings['bind'],
+        'workers': workers,
+        'threads': settings['threads'],
+        'worker_class': 'gthread',
+        'timeout': settings['timeout'],
+        'graceful_timeout': settings['graceful_timeout'],
+        'keepalive': settings['keepalive'],
+        'max_requests': settings['max_requests'],
+        'max_requests_jitter': settings['max_requests_jitter'],
+        'backlog': settings['backlog'],
+        'preload_app': settings['preload'],
+        'pidfile': settings['pidfile'] or None,
+        'accesslog': settings['accesslog'] or None,
+    }
+    if settings['preload']:
+        options['pre_fork'] = lambda server, worker: prepare_for_fork(server.app.application)
+    return options
+
+def serve(settings: Dict[str, Any], config_path: str = "osint_config.json") -> int:
+    """Arranca el servidor elegido ('auto' prefiere gunicorn y luego waitress)"""
+    server = settings['server']
+    if server == 'auto':
+        server = 'gunicorn' if GUNICORN_AVAILABLE else 'waitress' if WAITRESS_AVAILABLE else 'dev'
+    if server == 'gunicorn' and not GUNICORN_AVAILABLE:
+        logger.error("gunicorn no está instalado (pip install gunicorn)")
+        return 1
+    if server == 'waitress' and not WAITRESS_AVAILABLE:
+        logger.error("waitress no está instalado (pip install waitress)")
+        return 1
+
+    ensure_config_file(config_path)
+    if server == 'gunicorn':
+        workers = settings['workers'] or default_workers()
+        # Ni el maestro ni los workers programan la retención: la ejecuta un único proceso aparte
+        start_maintenance_process(config_path)
+        if settings['preload']:
+            app = create_app(config_path, start_scheduler=False)
+            share_worker_limits(app, workers)
+        else:
+            # Cada worker construye su propia aplicación
+            app = _LazyApplication(config_path, workers)
+    else:
+        # Un solo proceso: la aplicación y el programador de mantenimiento conviven en él
+        app = create_app(config_path)
+
+    if not settings['bind']:
+        config = create_config_from_json(config_path)
+        settings['bind'] = f"{config.web_host}:{config.web_port}"
+    host, _, port = settings['bind'].rpartition(':')
+
+    if server == 'gunicorn':
+        options = gunicorn_options(settings)
+        logger.info(f"🚀 gunicorn en http://{settings['bind']}: {options['workers']} workers x "
+                    f"{options['threads']} hilos (preload={settings['preload']})")
+        OSINTGunicornApplication(app, options).run()
+    elif server == 'waitress':
+        logger.info(f"🚀 waitress en http://{settings['bind']}: 1 proceso x {settings['threads']} hilos")
+        waitress.serve(app, host=host or '0.0.0.0', port=int(port), threads=settings['threads'],
+                       backlog=settings['backlog'], channel_timeout=settings['timeout'])
+    else:
+        logger.warning("Sin gunicorn ni waitress: se usa el servidor de desarrollo con hilos")
+        app.run(host=host or '0.0.0.0', port=int(port), debug=False, threaded=True)
+    return 0
+
+class _LazyApplication:
+    """Aplicación construida en el primer request de cada worker (modo sin preload)"""
+
+    def __init__(self, config_path: str, workers: int = 1):
+        self.config_path = config_path
+        self.workers = workers
+        self._app = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if self._app is None or self._pid != os.getpid():
+            with self._lock:
+                if self._app is None or self._pid != os.getpid():
+                    self._app = create_app(self.config_path, start_scheduler=False)
+                    share_worker_limits(self._app, self.workers)
+                    self._pid = os.getpid()
+        return self._app(environ, start_response)
+
+def main():
+    settings = load_server_settings()
+    parser = argparse.ArgumentParser(description='Servidor de producción de la plataforma OSINT')
+    parser.add_argument('--config', default='osint_config.json', help='Archivo de configuración')
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress', 'dev'], default=settings['server'],
+                        help='Servidor WSGI')
+    parser.add_argument('--bind', default=settings['bind'], help='host:puerto (por defecto web_host:web_port)')
+    parser.add_argument('--workers', type=int, default=settings['workers'], help='Procesos (0 = según CPUs)')
+    parser.add_argument('--threads', type=int, default=settings['threads'], help='Hilos por proceso')
+    parser.add_argument('--no-preload', action='store_true', help='Cada worker construye su propia aplicación')
+    args = parser.parse_args()
+
+    settings.update(server=args.server, bind=args.bind, workers=args.workers, threads=args.threads)
+    if args.no_preload:
+        settings['preload'] = False
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return serve(settings, args.config)
+
+if __name__ == '__main__':
+    sys.exit(main())
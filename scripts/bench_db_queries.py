@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de las consultas de OSINTDatabase
+Ejecuta cada consulta de lectura repetidamente sobre una base existente (por
+ejemplo la generada con generate_synthetic_db.py) y reporta p50/p99 en ms: historial
+reciente, páginas por clave del historial y de los resultados, detalle de una búsqueda
+y búsqueda de texto completo
+
+Uso: python scripts/bench_db_queries.py --db synthetic_osint.db [--iterations 200]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MCP import OSINTDatabase  # noqa: E402
+from generate_synthetic_db import WORDS  # noqa: E402
+
+def percentile(samples: List[float], pct: float) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[int(pct) - 1]
+
+def deep_cursor(db: OSINTDatabase, user_id: int, pages: int) -> Optional[str]:
+    """Cursor de la página `pages` del historial (o de la última que exista)"""
+    cursor = None
+    for _ in range(pages):
+        page = db.get_user_searches_page(user_id, 50, cursor)
+        if not page['next_cursor']:
+            break
+        cursor = page['next_cursor']
+    return cursor
+
+def query_cases(db: OSINTDatabase, user_ids: List[int], search_ids: List[int],
+                rng: random.Random) -> Dict[str, Callable[[], object]]:
+    # Cursores a 10 páginas de profundidad para algunos usuarios: la paginación por clave
+    # debe costar lo mismo al principio que al final del historial
+    deep = [{'user_id': user_id, 'cursor': deep_cursor(db, user_id, 10)}
+            for user_id in rng.sample(user_ids, min(len(user_ids), 20))]
+    return {
+        'get_recent_results(days=1)': lambda: db.get_recent_results(days=1),
+        'get_user_searches(limit=50)': lambda: db.get_user_searches(rng.choice(user_ids), 50),
+        'get_user_searches(limit=100)': lambda: db.get_user_searches(rng.choice(user_ids), 100),
+        'get_user_searches_page': lambda: db.get_user_searches_page(rng.choice(user_ids), 50),
+        'get_user_searches_page(p10)': lambda: db.get_user_searches_page(**rng.choice(deep)),
+        'get_search': lambda: db.get_search(rng.choice(search_ids)),
+        'get_search_results_page': lambda: db.get_search_results_page(rng.choice(search_ids), 50),
+        'get_search_results_page(risk)':
+            lambda: db.get_search_results_page(rng.choice(search_ids), 50, sort='risk'),
+        'search_results_fulltext': lambda: db.search_results_fulltext(rng.choice(WORDS)),
+        'search_results_fulltext(user)':
+            lambda: db.search_results_fulltext(' '.join(rng.sample(WORDS, 2)), rng.choice(user_ids)),
+        'get_user_report_configs': lambda: db.get_user_report_configs(rng.choice(user_ids)),
+        'get_system_counts': lambda: db.get_system_counts(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia p50/p99 de las consultas de OSINTDatabase')
+    parser.add_argument('--db', required=True, help='Base de datos a consultar')
+    parser.add_argument('--iterations', type=int, default=200, help='Ejecuciones por consulta')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f"No existe la base de datos {args.db}")
+
+    rng = random.Random(args.seed)
+    db = OSINTDatabase(args.db)
+    user_ids = [row[0] for row in db.pool.execute('SELECT id FROM users')] or [1]
+    search_ids = [row[0] for row in db.pool.execute('SELECT id FROM searches')] or [1]
+    total_results = db.pool.execute('SELECT COUNT(*) FROM search_results')[0][0]
+    print(f"{args.db}: {total_results} resultados, {len(user_ids)} usuarios, {args.iterations} iteraciones")
+    print(f"{'consulta':<30} {'p50 ms':>10} {'p99 ms':>10} {'máx ms':>10}")
+
+    for name, call in query_cases(db, user_ids, search_ids, rng).items():
+        call()  # calentamiento de caché de páginas
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<30} {percentile(samples, 50):>10.2f} {percentile(samples, 99):>10.2f} {max(samples):>10.2f}")
+
+    db.pool.close_all()
+
+if __name__ == '__main__':
+    main()
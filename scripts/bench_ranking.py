@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark del ranking BM25 de resultados
+Genera lotes sintéticos con una fracción de resultados relevantes para la consulta
+y mide el tiempo de BM25Ranker frente a la puntuación anterior,
+junto con cuántos resultados relevantes quedan entre los primeros 10
+
+Uso: python scripts/bench_ranking.py [--results 5000] [--query "contrato alcaldía medellín"]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from osint_ranking import BM25Ranker  # noqa: E402
+
+WORDS = ['bogotá', 'empresa', 'registro', 'correo', 'dominio', 'informe', 'licitación', 'proveedor',
+         'ministerio', 'noticia', 'perfil', 'documento', 'sociedad', 'pública', 'datos', 'portal']
+
+def legacy_rank(query, results):
+    """Puntuación anterior: consulta completa contenida en título (0.5) o descripción (0.3)"""
+    query_lower = query.lower()
+    for result in results:
+        relevance = 0.0
+        if query_lower in result['title'].lower():
+            relevance += 0.5
+        if query_lower in result['description'].lower():
+            relevance += 0.3
+        result['relevance_score'] = relevance
+    return sorted(results, key=lambda x: x['relevance_score'], reverse=True)
+
+def synthetic_results(query, count, relevant_ratio, rng):
+    terms = query.split()
+    results = []
+    for i in range(count):
+        relevant = rng.random() < relevant_ratio
+        title = rng.sample(WORDS, 4)
+        description = rng.sample(WORDS, 10)
+        if relevant:
+            # Términos de la consulta en otro orden y sin tildes, como en páginas reales
+            title[1:1] = rng.sample([term.replace('í', 'i') for term in terms], len(terms))
+            description.insert(3, rng.choice(terms))
+        results.append({
+            'title': ' '.join(title).title(), 'description': ' '.join(description),
+            'url': f'https://example.com/{i}', 'content': '', 'relevant': relevant
+        })
+    return results
+
+def bench(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        ranked = fn()
+    return (time.perf_counter() - start) * 1000 / iterations, ranked
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del ranking de resultados')
+    parser.add_argument('--results', type=int, default=5000, help='Resultados por lote')
+    parser.add_argument('--query', default='contrato alcaldía medellín')
+    parser.add_argument('--relevant-ratio', type=float, default=0.02)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    results = synthetic_results(args.query, args.results, args.relevant_ratio, random.Random(args.seed))
+    ranker = BM25Ranker()
+
+    cases = [('legacy', lambda: legacy_rank(args.query, list(results))),
+             ('bm25', lambda: ranker.rank(args.query, list(results)))]
+
+    print(f"{args.results} resultados, consulta '{args.query}'")
+    print(f"{'método':<12} {'ms/lote':>10} {'relevantes en top 10':>22}")
+    for name, fn in cases:
+        elapsed, ranked = bench(fn, args.iterations)
+        top = sum(1 for result in ranked[:10] if result['relevant'])
+        print(f"{name:<12} {elapsed:>10.2f} {top:>22}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark de parseo de páginas de resultados (SERP)
+Mide páginas por segundo por motor y backend sobre las páginas guardadas en
+scripts/fixtures/serp/<motor>.html
+
+Uso: python scripts/bench_serp_parsing.py [--iterations 200] [--fixtures DIR]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from osint_serp import LXML_AVAILABLE, available_extractors, get_extractor  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'serp'
+
+def legacy_parse(engine: str, html: str) -> int:
+    """Parser anterior: árbol completo con html.parser y find_all sobre los contenedores"""
+    soup = BeautifulSoup(html, 'html.parser')
+    if engine == 'google':
+        containers = soup.find_all('div', class_='g') or soup.find_all('div', class_='tF2Cxc')
+    elif engine == 'bing':
+        containers = soup.find_all('li', class_='b_algo')
+    else:
+        containers = soup.find_all('div', class_='result')
+    return len(containers)
+
+def bench(fn, iterations: int) -> float:
+    """Retorna páginas por segundo"""
+    fn()  # calentamiento
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float('inf')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de extractores SERP')
+    parser.add_argument('--iterations', type=int, default=200, help='Páginas parseadas por caso')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='Directorio con <motor>.html')
+    args = parser.parse_args()
+
+    backends = ['soup'] + (['lxml'] if LXML_AVAILABLE else [])
+    print(f"{'motor':<12} {'backend':<8} {'resultados':>10} {'páginas/s':>12} {'vs legacy':>10}")
+
+    for engine in available_extractors():
+        fixture = Path(args.fixtures) / f'{engine}.html'
+        if not fixture.exists():
+            print(f"{engine:<12} (sin fixture en {fixture})")
+            continue
+        html = fixture.read_text(encoding='utf-8')
+
+        legacy_rate = bench(lambda: legacy_parse(engine, html), args.iterations)
+        print(f"{engine:<12} {'legacy':<8} {legacy_parse(engine, html):>10} {legacy_rate:>12.1f} {'1.0x':>10}")
+
+        for backend in backends:
+            extractor = get_extractor(engine, backend)
+            count = len(extractor.extract(html))
+            rate = bench(lambda: extractor.extract(html), args.iterations)
+            print(f"{engine:<12} {backend:<8} {count:>10} {rate:>12.1f} {rate / legacy_rate:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia de la base de datos SQLite
+Compara el acceso anterior (una conexión nueva por llamada, journal por defecto)
+con SQLiteConnectionManager (conexión persistente por hilo, WAL y busy timeout)
+usando N escritores y M lectores en paralelo
+
+Uso: python scripts/bench_sqlite_concurrency.py [--writers 32] [--readers 8] [--ops 200]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from osint_sqlite import SQLiteConnectionManager  # noqa: E402
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS search_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        search_id INTEGER,
+        source TEXT,
+        title TEXT,
+        url TEXT,
+        relevance_score REAL
+    )
+'''
+INSERT = 'INSERT INTO search_results (search_id, source, title, url, relevance_score) VALUES (?, ?, ?, ?, ?)'
+SELECT = 'SELECT title, url FROM search_results WHERE search_id = ? ORDER BY relevance_score DESC LIMIT 20'
+
+class LegacyAccess:
+    """Patrón anterior de OSINTDatabase: connect/commit/close en cada llamada"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def write(self, params: tuple):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(INSERT, params)
+        conn.commit()
+        conn.close()
+
+    def read(self, search_id: int):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(SELECT, (search_id,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+class PooledAccess:
+    """Acceso a través de SQLiteConnectionManager"""
+
+    def __init__(self, db_path: str):
+        self.pool = SQLiteConnectionManager(db_path)
+
+    def write(self, params: tuple):
+        with self.pool.transaction() as cursor:
+            cursor.execute(INSERT, params)
+
+    def read(self, search_id: int):
+        return self.pool.execute(SELECT, (search_id,))
+
+def run(access, writers: int, readers: int, ops: int) -> dict:
+    stats = {'writes': 0, 'reads': 0, 'locked': 0}
+    stats_lock = threading.Lock()
+    barrier = threading.Barrier(writers + readers)
+    stop_readers = threading.Event()
+
+    def record(key: str, count: int = 1):
+        with stats_lock:
+            stats[key] += count
+
+    def writer(worker_id: int):
+        barrier.wait()
+        for i in range(ops):
+            try:
+                access.write((worker_id, 'bench', f'Resultado {worker_id}-{i}',
+                              f'https://example.com/{worker_id}/{i}', i / ops))
+                record('writes')
+            except sqlite3.OperationalError:
+                record('locked')
+
+    def reader(worker_id: int):
+        barrier.wait()
+        while not stop_readers.is_set():
+            try:
+                access.read(worker_id % max(writers, 1))
+                record('reads')
+            except sqlite3.OperationalError:
+                record('locked')
+
+    writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+
+    start = time.perf_counter()
+    for thread in writer_threads + reader_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    stop_readers.set()
+    for thread in reader_threads:
+        thread.join()
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia SQLite')
+    parser.add_argument('--writers', type=int, default=32, help='Hilos escritores')
+    parser.add_argument('--readers', type=int, default=8, help='Hilos lectores')
+    parser.add_argument('--ops', type=int, default=200, help='Escrituras por escritor')
+    args = parser.parse_args()
+
+    print(f"{args.writers} escritores x {args.ops} inserciones, {args.readers} lectores concurrentes")
+    print(f"{'modo':<8} {'escrituras/s':>13} {'lecturas/s':>12} {'bloqueos':>9} {'segundos':>9}")
+
+    for name, access_cls in (('legacy', LegacyAccess), ('pooled', PooledAccess)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute(SCHEMA)
+            conn.commit()
+            conn.close()
+
+            access = access_cls(db_path)
+            stats = run(access, args.writers, args.readers, args.ops)
+            if isinstance(access, PooledAccess):
+                access.pool.close_all()
+
+            elapsed = stats['elapsed']
+            print(f"{name:<8} {stats['writes'] / elapsed:>13.1f} {stats['reads'] / elapsed:>12.1f} "
+                  f"{stats['locked']:>9} {elapsed:>9.2f}")
+
+if __name__ == '__main__':
+    main()
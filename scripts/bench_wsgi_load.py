@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la interfaz web: servidor de desarrollo frente a osint_wsgi
+Levanta la aplicación en un directorio temporal con los motores de búsqueda
+reemplazados por una fuente local que responde tras --latency segundos, inicia
+sesión con N clientes concurrentes y mide peticiones por segundo y latencias de
+/dashboard y /api/search con cada servidor
+
+Uso: python scripts/bench_wsgi_load.py [--servers dev,gunicorn,waitress] [--clients 32] [--duration 10]
+                                       [--workers 4] [--threads 8] [--latency 0.2]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import osint_wsgi  # noqa: E402
+
+USERNAME, PASSWORD = 'bench', 'bench-password'
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def build_app(workdir: str, latency: float):
+    """Aplicación real con la fuente de búsqueda sustituida por una local"""
+    os.chdir(workdir)
+    (Path(workdir) / 'logs').mkdir(exist_ok=True)
+    with open('osint_config.json', 'w', encoding='utf-8') as f:
+        json.dump({'web_auth_enabled': True, 'web_host': '127.0.0.1'}, f)
+
+    app = osint_wsgi.create_app('osint_config.json', start_scheduler=False)
+    searcher = app.extensions['osint_web_interface'].osint_searcher
+    searcher.db.register_user(USERNAME, 'bench@example.com', PASSWORD, 'Benchmark')
+
+    def standin_sources(query: str, search_type: str, enable_dorking: bool):
+        def standin() -> List[Dict[str, Any]]:
+            # Simula la espera de red de un motor real
+            time.sleep(latency)
+            return [{'title': f'{query} resultado {i}', 'url': f'https://ejemplo.co/{uuid.uuid4().hex}/{i}',
+                     'description': f'Descripción {i} de {query} en Bogotá', 'source': 'standin'}
+                    for i in range(10)]
+        return [('standin', standin)]
+
+    searcher._plan_sources = standin_sources
+    return app
+
+def run_server(server: str, port: int, workdir: str, latency: float, workers: int, threads: int):
+    """Proceso hijo: construye la aplicación (antes del fork de gunicorn) y la sirve"""
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+    app = build_app(workdir, latency)
+    settings = dict(osint_wsgi.DEFAULT_SERVER_SETTINGS, bind=f'127.0.0.1:{port}', workers=workers,
+                    threads=threads, pidfile='', max_requests=0)
+    if server == 'dev':
+        # Lo mismo que MCP.main: app.run(host, port, debug=False)
+        app.run(host='127.0.0.1', port=port, debug=False)
+    elif server == 'waitress':
+        osint_wsgi.waitress.serve(app, host='127.0.0.1', port=port, threads=threads, _quiet=True)
+    else:
+        osint_wsgi.OSINTGunicornApplication(app, dict(osint_wsgi.gunicorn_options(settings), loglevel='warning')).run()
+
+def wait_ready(base_url: str, timeout: float = 60.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/login', timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    return False
+
+def login(base_url: str) -> requests.Session:
+    session = requests.Session()
+    session.post(f'{base_url}/login', data={'username': USERNAME, 'password': PASSWORD}, timeout=30)
+    return session
+
+def measure(sessions: List[requests.Session], duration: float, call) -> Dict[str, Any]:
+    """Cada cliente repite la llamada durante `duration` segundos"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(session: requests.Session):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = call(session)
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        list(executor.map(client, sessions))
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'rps': count / elapsed,
+        'p50_ms': latencies[count // 2] * 1000 if count else 0.0,
+        'p95_ms': latencies[int(count * 0.95)] * 1000 if count else 0.0
+    }
+
+def bench_server(server: str, args) -> Dict[str, Dict[str, Any]]:
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    with tempfile.TemporaryDirectory(prefix=f'bench_{server}_') as workdir:
+        process = multiprocessing.get_context('fork').Process(
+            target=run_server, args=(server, port, workdir, args.latency, args.workers, args.threads), daemon=True
+        )
+        process.start()
+        try:
+            if not wait_ready(base_url):
+                raise RuntimeError(f"El servidor {server} no respondió")
+            sessions = [login(base_url) for _ in range(args.clients)]
+
+            def dashboard(session: requests.Session) -> bool:
+                response = session.get(f'{base_url}/dashboard', allow_redirects=False, timeout=60)
+                return response.status_code == 200
+
+            def search(session: requests.Session) -> bool:
+                # Consultas distintas: ninguna se sirve desde la caché de búsquedas
+                response = session.post(f'{base_url}/api/search', timeout=120, json={
+                    'query': f'empresa {uuid.uuid4().hex[:8]}', 'search_type': 'general'
+                })
+                return response.status_code == 200
+
+            return {
+                '/dashboard': measure(sessions, args.duration, dashboard),
+                '/api/search': measure(sessions, args.duration, search)
+            }
+        finally:
+            process.terminate()
+            process.join(30)
+
+def main():
+    available = ['dev'] + [name for name, ok in (('gunicorn', osint_wsgi.GUNICORN_AVAILABLE),
+                                                 ('waitress', osint_wsgi.WAITRESS_AVAILABLE)) if ok]
+    parser = argparse.ArgumentParser(description='Prueba de carga de la interfaz web')
+    parser.add_argument('--servers', default=','.join(available), help='Servidores a comparar')
+    parser.add_argument('--clients', type=int, default=32, help='Clientes concurrentes')
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos por endpoint')
+    parser.add_argument('--workers', type=int, default=4, help='Procesos de gunicorn')
+    parser.add_argument('--threads', type=int, default=8, help='Hilos por proceso')
+    parser.add_argument('--latency', type=float, default=0.2, help='Latencia simulada de la fuente de búsqueda')
+    args = parser.parse_args()
+
+    results: List[Tuple[str, str, Dict[str, Any]]] = []
+    for server in [name.strip() for name in args.servers.split(',') if name.strip()]:
+        if server not in available:
+            print(f"[omitido] {server} no está instalado")
+            continue
+        print(f"Midiendo {server}...", flush=True)
+        for endpoint, stats in bench_server(server, args).items():
+            results.append((server, endpoint, stats))
+
+    print(f"\n{args.clients} clientes, {args.duration:.0f}s por endpoint, latencia de búsqueda {args.latency}s")
+    print(f"{'servidor':<10} {'endpoint':<13} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'ok':>7} {'errores':>8}")
+    for server, endpoint, stats in results:
+        print(f"{server:<10} {endpoint:<13} {stats['rps']:>8.1f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['requests']:>7} {stats['errors']:>8}")
+    return 1 if any(stats['errors'] for _, _, stats in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
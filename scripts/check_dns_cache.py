@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Comprobación del resolver DNS con caché (osint_dns) contra un servidor DNS local
+Levanta un servidor UDP de prueba con una zona fija, resuelve los registros que
+pide un análisis de dominio repetidas veces y verifica cuántas consultas llegan
+al servidor: caché positiva, caché negativa (NXDOMAIN con SOA) y coalescencia
+de consultas concurrentes
+
+Uso: python scripts/check_dns_cache.py [--verbose]
+"""
+
+import argparse
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from osint_dns import CachingResolver  # noqa: E402
+
+ZONE = {
+    ('ejemplo.co.', 'A'): ['192.0.2.10'],
+    ('ejemplo.co.', 'MX'): ['10 mail.ejemplo.co.'],
+    ('ejemplo.co.', 'NS'): ['ns1.ejemplo.co.', 'ns2.ejemplo.co.'],
+    ('ejemplo.co.', 'TXT'): ['"v=spf1 include:_spf.google.com ~all"'],
+    ('www.ejemplo.co.', 'A'): ['192.0.2.11'],
+}
+SOA = 'ns1.ejemplo.co. admin.ejemplo.co. 1 3600 600 86400 60'
+
+class StubDNSServer:
+    """Servidor DNS UDP mínimo que cuenta las consultas recibidas"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.queries = Counter()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                wire, address = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            threading.Thread(target=self._answer, args=(wire, address), daemon=True).start()
+
+    def _answer(self, wire: bytes, address):
+        query = dns.message.from_wire(wire)
+        question = query.question[0]
+        name, rdtype = question.name.to_text().lower(), dns.rdatatype.to_text(question.rdtype)
+        self.queries[(name, rdtype)] += 1
+        time.sleep(self.delay)
+
+        response = dns.message.make_response(query)
+        records = ZONE.get((name, rdtype))
+        if records:
+            response.answer.append(dns.rrset.from_text(name, 300, 'IN', rdtype, *records))
+        else:
+            if not any(zone_name == name for zone_name, _ in ZONE):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+            response.authority.append(dns.rrset.from_text('ejemplo.co.', 60, 'IN', 'SOA', SOA))
+        self.sock.sendto(response.to_wire(), address)
+
+    def close(self):
+        self.sock.close()
+
+def domain_analysis(resolver: CachingResolver, domain: str):
+    """Mismas consultas que hacen search_domain y el análisis DNS de un dominio"""
+    for record_type in ('A', 'AAAA', 'MX', 'TXT', 'NS', 'CNAME', 'SOA'):
+        try:
+            resolver.resolve(domain, record_type)
+        except Exception:
+            pass
+    for subdomain in ('www', 'mail', 'api'):
+        try:
+            resolver.gethostbyname(f'{subdomain}.{domain}')
+        except socket.gaierror:
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Comprobación del resolver DNS con caché')
+    parser.add_argument('--verbose', action='store_true', help='Muestra las consultas por registro')
+    args = parser.parse_args()
+
+    server = StubDNSServer(delay=0.2)
+    resolver = CachingResolver(['127.0.0.1'], port=server.port, timeout=2, lifetime=4)
+    checks = []
+
+    # Tres análisis seguidos del mismo dominio: solo el primero llega al servidor
+    for _ in range(3):
+        domain_analysis(resolver, 'ejemplo.co')
+    repeated = [key for key, count in server.queries.items() if count > 1]
+    checks.append(('caché positiva y negativa', not repeated, f'{sum(server.queries.values())} consultas'))
+
+    # Positivos y negativos vuelven desde la caché
+    answer = resolver.resolve('ejemplo.co', 'MX')
+    checks.append(('registro MX', str(answer[0]) == '10 mail.ejemplo.co.', str(answer[0])))
+    try:
+        resolver.gethostbyname('noexiste.ejemplo.co')
+        checks.append(('NXDOMAIN', False, 'se resolvió'))
+    except socket.gaierror:
+        checks.append(('NXDOMAIN', True, 'socket.gaierror'))
+
+    # Veinte hilos piden el mismo nombre nuevo a la vez: una sola consulta en vuelo
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        ips = list(executor.map(lambda _: resolver.gethostbyname('www.ejemplo.co.'), range(20)))
+    resolver.clear()
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        list(executor.map(lambda _: resolver.resolve('ejemplo.co', 'NS'), range(20)))
+    ns_queries = server.queries[('ejemplo.co.', 'NS')]
+    checks.append(('coalescencia', set(ips) == {'192.0.2.11'} and ns_queries == 2,
+                   f'{ns_queries - 1} consulta NS para 20 hilos'))
+
+    server.close()
+    if args.verbose:
+        for (name, rdtype), count in sorted(server.queries.items()):
+            print(f"         {name} {rdtype}: {count}")
+    for name, ok, detail in checks:
+        print(f"[{'ok' if ok else 'FALLA'}] {name}: {detail}")
+    print(f"estadísticas: {resolver.stats}")
+
+    failures = sum(1 for _, ok, _ in checks if not ok)
+    print(f"\n{failures} comprobaciones fallidas" if failures else "\nEl resolver respeta la caché")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Comprobación de regresiones en los planes de consulta de OSINTDatabase
+Ejecuta cada consulta de lectura sobre una base temporal, captura el SQL real
+con set_trace_callback y revisa su EXPLAIN QUERY PLAN: falla si alguna tabla se
+recorre completa sin índice o si el ORDER BY principal necesita un B-tree temporal
+
+Uso: python scripts/check_query_plans.py [--verbose]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MCP import OSINTDatabase  # noqa: E402
+from osint_pagination import encode_cursor  # noqa: E402
+
+def query_cases(db: OSINTDatabase) -> Dict[str, Callable[[], object]]:
+    """Consultas a revisar: nombre -> llamada que las ejecuta"""
+    return {
+        'get_recent_results': lambda: db.get_recent_results(days=1),
+        'get_user_searches': lambda: db.get_user_searches(1, 50),
+        'get_user_by_credentials': lambda: db.get_user_by_credentials('admin', 'x'),
+        'get_user_report_configs': lambda: db.get_user_report_configs(1),
+        'get_system_counts': lambda: db.get_system_counts(),
+        'get_user_stats': lambda: db.get_user_stats(1),
+        'get_user_searches_page': lambda: db.get_user_searches_page(
+            1, 50, cursor=encode_cursor(['2100-01-01 00:00:00', 1 << 40]), search_type='general'),
+        'get_search': lambda: db.get_search(1),
+        'get_search_results_page': lambda: db.get_search_results_page(
+            1, 50, cursor=encode_cursor(['high', 1.0, 1 << 40]), sort='risk'),
+        'generate_user_report': lambda: db.generate_user_report(1, 1),
+        'search_results_fulltext': lambda: db.search_results_fulltext('plan', user_id=1),
+        # Búsqueda de casi duplicados recientes al guardar
+        'save_results_bulk': lambda: db.save_results(db.save_search('plan'), [{
+            'title': 'Plan de consultas - Ejemplo', 'url': 'https://example.org/plan/consultas',
+            'description': 'Revisión de los planes de consulta con huellas de casi duplicados'
+        }]),
+    }
+
+def plan_problems(plan: List[tuple]) -> List[str]:
+    problems = []
+    # Las consultas FTS5 ordenan por bm25, que no puede venir de un índice
+    ranked = any('VIRTUAL TABLE' in row[-1] for row in plan)
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith('SCAN') and 'INDEX' not in detail:
+            problems.append(f"recorrido completo: {detail}")
+        if detail == 'USE TEMP B-TREE FOR ORDER BY' and not ranked:
+            problems.append(f"ordenación sin índice: {detail}")
+    return problems
+
+def capture_statements(db: OSINTDatabase, call: Callable[[], object]) -> List[str]:
+    """Ejecuta la llamada y retorna las sentencias SELECT que emitió"""
+    statements = []
+    conn = db.pool.connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return [sql.strip() for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Revisión de EXPLAIN QUERY PLAN de OSINTDatabase')
+    parser.add_argument('--verbose', action='store_true', help='Muestra el plan de cada consulta')
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db = OSINTDatabase(os.path.join(tmp, 'plans.db'))
+        db.save_user_report_config(1, {'report_name': 'plan'})
+        db.save_results(db.save_search('plan'), [{
+            'title': 'Plan de consultas', 'url': 'https://example.com/plan/consultas',
+            'description': 'Revisión de los planes de consulta con huellas de casi duplicados'
+        }])
+
+        for name, call in query_cases(db).items():
+            for sql in capture_statements(db, call):
+                plan = db.pool.execute(f'EXPLAIN QUERY PLAN {sql}')
+                problems = plan_problems(plan)
+                status = 'FALLA' if problems else 'ok'
+                print(f"[{status}] {name}: {' '.join(sql.split())[:90]}")
+                if args.verbose or problems:
+                    for row in plan:
+                        print(f"         {row[-1]}")
+                for problem in problems:
+                    print(f"         -> {problem}")
+                failures += bool(problems)
+
+        db.pool.close_all()
+
+    print(f"\n{failures} consultas con regresiones en el plan" if failures else "\nTodos los planes usan índices")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Exporta los resultados recientes de la base OSINT a CSV, JSONL o HTML
+Lee la base por lotes y escribe en streaming, con memoria constante
+
+Uso: python scripts/export_results.py --output resultados.csv [--db osint_data.db]
+     [--days 7] [--format csv|jsonl|html] [--user-id N] [--include-archived]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MCP import OSINTDatabase  # noqa: E402
+from osint_export import EXPORT_FORMATS, write_export  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportación de resultados OSINT')
+    parser.add_argument('--output', required=True, help='Archivo de salida')
+    parser.add_argument('--db', default='osint_data.db', help='Base de datos a leer')
+    parser.add_argument('--days', type=int, default=7, help='Ventana de días a exportar')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), help='Formato (por defecto, la extensión)')
+    parser.add_argument('--user-id', type=int, default=None, help='Solo búsquedas de este usuario')
+    parser.add_argument('--include-archived', action='store_true', help='Incluir particiones archivadas')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f"No existe la base de datos {args.db}")
+
+    db = OSINTDatabase(args.db)
+    start = time.perf_counter()
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = db.iter_recent_results(args.days, include_archived=args.include_archived, user_id=args.user_id)
+    written = write_export(args.output, counted(rows), args.format)
+    db.pool.close_all()
+    print(f"{count} resultados exportados a {args.output} ({written / 1e6:.1f} MB, "
+          f"{time.perf_counter() - start:.1f}s)")
+
+if __name__ == '__main__':
+    main()
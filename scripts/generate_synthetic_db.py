@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Generador de una base de datos OSINT sintética para pruebas de carga
+Crea el esquema con OSINTDatabase (migraciones incluidas) e inserta usuarios,
+búsquedas y resultados repartidos en el tiempo, por lotes y con una fracción de
+URLs repetidas entre búsquedas. Cada URL tiene su propio título y descripción, así
+que la detección de casi duplicados no los enlaza entre sí
+
+Uso: python scripts/generate_synthetic_db.py --db synthetic.db [--results 10000000]
+     [--searches 500000] [--users 1000] [--days 365]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MCP import OSINTDatabase  # noqa: E402
+from osint_schema import analyze_tables  # noqa: E402
+from osint_stats import rebuild_user_stats  # noqa: E402
+
+SOURCES = ['google', 'bing', 'duckduckgo', 'google_dork', 'bing_dork', 'news_colombia', 'pastebin']
+SEARCH_TYPES = ['general', 'person', 'company', 'email', 'domain', 'phone']
+RISK_LEVELS = ['low', 'low', 'low', 'medium', 'high']
+WORDS = ['bogotá', 'medellín', 'contrato', 'empresa', 'registro', 'correo', 'dominio', 'informe',
+         'licitación', 'proveedor', 'alcaldía', 'ministerio', 'noticia', 'perfil', 'documento']
+SYLLABLES = ['ca', 'mi', 'lo', 'ra', 'te', 'sa', 'no', 'ber', 'tal', 'qui', 'ven', 'dor', 'gu', 'pe',
+             'li', 'mar', 'es', 'to', 'fa', 'ri', 'sol', 'na', 'che', 'bu', 'ro', 'al', 'men', 'zi']
+
+def build_vocabulary(rng: random.Random, size: int = 20000) -> List[str]:
+    """Palabras inventadas: con un vocabulario amplio los textos no colapsan por SimHash"""
+    return list(dict.fromkeys(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size)))
+
+def document_text(url_id: int, vocabulary: List[str]) -> Tuple[str, str]:
+    """Título y descripción propios de cada URL (la misma URL repetida conserva su texto)"""
+    text_rng = random.Random(url_id)
+    title = text_rng.sample(WORDS, 2) + text_rng.sample(vocabulary, 5)
+    text_rng.shuffle(title)
+    description = text_rng.sample(vocabulary, 20) + text_rng.sample(WORDS, 3) + [str(url_id)]
+    text_rng.shuffle(description)
+    return ' '.join(title).capitalize(), ' '.join(description)
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera una base de datos OSINT sintética')
+    parser.add_argument('--db', default='synthetic_osint.db', help='Ruta de la base a crear')
+    parser.add_argument('--results', type=int, default=10_000_000, help='Número de resultados')
+    parser.add_argument('--searches', type=int, default=500_000, help='Número de búsquedas')
+    parser.add_argument('--users', type=int, default=1000, help='Número de usuarios')
+    parser.add_argument('--days', type=int, default=365, help='Días de historial')
+    parser.add_argument('--batch', type=int, default=50_000, help='Filas por transacción')
+    parser.add_argument('--repeat-ratio', type=float, default=0.3,
+                        help='Fracción de resultados cuya URL ya apareció en otra búsqueda')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = build_vocabulary(rng)
+    db = OSINTDatabase(args.db)
+    pool = db.pool
+    conn = pool.connection()
+    # Solo para la carga inicial: la durabilidad no importa en una base sintética
+    conn.execute('PRAGMA synchronous = OFF')
+
+    start = time.perf_counter()
+    with pool.transaction() as cursor:
+        cursor.executemany(
+            'INSERT OR IGNORE INTO users (username, email, password_hash, full_name) VALUES (?, ?, ?, ?)',
+            ((f'user{i}', f'user{i}@example.com', '!', f'Usuario {i}') for i in range(2, args.users + 2))
+        )
+    user_ids = [row[0] for row in pool.execute('SELECT id FROM users')]
+
+    now = datetime.now()
+    base_search_id = pool.execute('SELECT COALESCE(MAX(id), 0) FROM searches')[0][0]
+    per_search = max(args.results // max(args.searches, 1), 1)
+
+    for offset in range(0, args.searches, args.batch):
+        rows = []
+        for i in range(offset, min(offset + args.batch, args.searches)):
+            # Búsquedas más recientes al final, como en producción
+            when = now - timedelta(seconds=(args.searches - i) * args.days * 86400 / args.searches)
+            rows.append((base_search_id + i + 1, rng.choice(user_ids),
+                         ' '.join(rng.sample(WORDS, 3)), rng.choice(SEARCH_TYPES),
+                         when.strftime('%Y-%m-%d %H:%M:%S'), per_search, 'completed'))
+        with pool.transaction() as cursor:
+            cursor.executemany(
+                'INSERT INTO searches (id, user_id, query, search_type, timestamp, results_count, status) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+    print(f"{args.searches} búsquedas en {time.perf_counter() - start:.1f}s")
+
+    inserted = 0
+    while inserted < args.results:
+        batch = {}
+        for i in range(inserted, min(inserted + args.batch, args.results)):
+            search_id = base_search_id + 1 + (i // per_search) % args.searches
+            # Una parte de las URLs se repite entre búsquedas, como en el monitoreo diario
+            url_id = rng.randrange(args.results // 4) if rng.random() < args.repeat_ratio else i
+            title, description = document_text(url_id, vocabulary)
+            batch.setdefault(search_id, []).append({
+                'source': rng.choice(SOURCES), 'title': title,
+                'url': f'https://example.com/doc/{url_id}', 'description': description,
+                'relevance_score': round(rng.random(), 4), 'risk_level': rng.choice(RISK_LEVELS)
+            })
+        db.save_results_bulk(list(batch.items()))
+        inserted += sum(len(results) for results in batch.values())
+        if inserted % (args.batch * 20) == 0 or inserted == args.results:
+            print(f"{inserted} resultados ({time.perf_counter() - start:.1f}s)")
+
+    # Las búsquedas se insertaron directamente: se recalculan las estadísticas agregadas
+    with pool.transaction() as cursor:
+        rebuild_user_stats(cursor)
+        analyze_tables(cursor)
+    pool.close_all()
+    print(f"Base sintética lista en {args.db} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Ejecuta la retención de la base OSINT (pensado para cron)
+Archiva los resultados de búsquedas antiguas en particiones comprimidas,
+elimina reportes generados vencidos y compacta la base
+
+Uso: python scripts/run_retention.py [--db osint_data.db] [--days N] [--reports-days N]
+     [--archive-dir DIR] [--no-vacuum]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MCP import OSINTDatabase  # noqa: E402
+from osint_archive import load_retention_settings  # noqa: E402
+
+def main():
+    results_days, reports_days = load_retention_settings()
+
+    parser = argparse.ArgumentParser(description='Retención y compactación de la base OSINT')
+    parser.add_argument('--db', default='osint_data.db', help='Base de datos a procesar')
+    parser.add_argument('--days', type=int, default=results_days,
+                        help=f'Antigüedad para archivar resultados (por defecto {results_days})')
+    parser.add_argument('--reports-days', type=int, default=reports_days,
+                        help=f'Antigüedad para eliminar reportes generados (por defecto {reports_days})')
+    parser.add_argument('--archive-dir', default=None, help='Directorio de las particiones archivadas')
+    parser.add_argument('--no-vacuum', action='store_true', help='No ejecutar VACUUM al terminar')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f"No existe la base de datos {args.db}")
+
+    db = OSINTDatabase(args.db, archive_dir=args.archive_dir)
+    before = Path(args.db).stat().st_size
+    stats = db.archive_old_results(args.days, vacuum=not args.no_vacuum)
+    reports = db.cleanup_old_reports(args.reports_days)
+    after = Path(args.db).stat().st_size
+    db.pool.close_all()
+
+    print(f"Búsquedas archivadas: {stats['searches']}")
+    print(f"Resultados archivados: {stats['results']} en {len(stats['partitions'])} particiones ({db.archive.archive_dir})")
+    print(f"Documentos eliminados de la base: {stats['documents_deleted']}")
+    print(f"Reportes eliminados: {reports}")
+    print(f"Tamaño de la base: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+if __name__ == '__main__':
+    main()